@@ -0,0 +1,4 @@
+"""Headless benchmarks for the SQLite and Firestore data paths.
+
+Run with `python -m benchmarks --help` from the project folder.
+"""
@@ -0,0 +1,338 @@
+import bisect
+import itertools
+import operator
+import uuid
+from types import SimpleNamespace
+
+# --------------------------
+# In-process stand-in for firestore.Client
+# --------------------------
+# Covers only what firestore_store and main.py call: collection/document refs,
+# collection groups, where/order_by/start_after/limit/select/stream queries, count()/sum()
+# aggregations, on_snapshot (one
+# initial snapshot, then local writes are pushed to listeners), WriteBatch and
+# transactions (get_all reads, then writes committed like a batch).
+# Everything lives in dicts, so benchmark timings measure the app's own code
+# rather than the network.
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, values: value in values,
+}
+
+OPERATOR_NAMES = {function: name for name, function in OPERATORS.items()}
+
+ADDED = SimpleNamespace(name="ADDED")
+MODIFIED = SimpleNamespace(name="MODIFIED")
+REMOVED = SimpleNamespace(name="REMOVED")
+
+
+def _invert_str(value):
+    return tuple(-ord(c) for c in value) + (1,)
+
+
+class NotFound(Exception):
+    """Stand-in for google.api_core.exceptions.NotFound (same HTTP code)."""
+    code = 404
+
+
+class AlreadyExists(Exception):
+    """Stand-in for google.api_core.exceptions.AlreadyExists (same HTTP code)."""
+    code = 409
+
+
+class Increment:
+    """Stand-in for firestore.Increment (JournalSyncer.increment in benchmarks)."""
+
+    def __init__(self, amount):
+        self.amount = amount
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data[field]
+
+
+class FakeDocument:
+    def __init__(self, collection, doc_id):
+        self.collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self):
+        return f"{self.collection.name}/{self.id}"
+
+    def get(self, transaction=None):
+        return FakeSnapshot(self, self.collection.docs.get(self.id))
+
+    def set(self, data, merge=False):
+        current = self.collection.docs.get(self.id, {}) if merge else {}
+        data = {key: current.get(key, 0) + value.amount if isinstance(value, Increment) else value
+                for key, value in data.items()}
+        self.collection._write(self.id, {**current, **data})
+
+    def update(self, data):
+        if self.id not in self.collection.docs:
+            raise NotFound(f"No document to update: {self.collection.name}/{self.id}")
+        self.set(data, merge=True)
+
+    def delete(self):
+        self.collection._write(self.id, None)
+
+
+class FakeQuery:
+    def __init__(self, collection, filters=(), order=None, cursor=None, limit=None, fields=None):
+        self.collection = collection
+        self.filters = filters
+        self.order = order      # (field, descending)
+        self.cursor = cursor    # snapshot to start after
+        self.limit_to = limit
+        self.fields = fields
+
+    def _copy(self, **changes):
+        state = dict(filters=self.filters, order=self.order, cursor=self.cursor, limit=self.limit_to, fields=self.fields)
+        state.update(changes)
+        return FakeQuery(self.collection, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self.filters + ((field, OPERATORS[op], value),))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(order=(field, direction == "DESCENDING"))
+
+    def start_after(self, snapshot):
+        return self._copy(cursor=snapshot)
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, fields):
+        return self._copy(fields=tuple(fields))
+
+    def matches(self, data):
+        return all(field in data and op(data[field], value) for field, op, value in self.filters)
+
+    def stream(self):
+        if self.order:
+            field, descending = self.order
+            ordered = self.collection._ordered(self.filters, field, descending)
+            start = 0
+            if self.cursor is not None:
+                position = self.collection._sort_key(self.cursor, field, descending) + (self.cursor.id,)
+                start = bisect.bisect_right(ordered, position)
+            doc_ids = (entry[-1] for entry in ordered[start:])
+        else:
+            doc_ids = (doc_id for doc_id, data in self.collection.docs.items() if self.matches(data))
+        if self.limit_to is not None:
+            doc_ids = itertools.islice(doc_ids, self.limit_to)
+        for doc_id in doc_ids:
+            data = self.collection.docs[doc_id]
+            if self.fields:
+                data = {k: data[k] for k in self.fields if k in data}
+            yield FakeSnapshot(self.collection.document(doc_id), data)
+
+    def get(self):
+        return list(self.stream())
+
+    def _to_protobuf(self):
+        # The parts of a StructuredQuery's text form that describe_query shows
+        parts = [f'from {{ collection_id: "{self.collection.name}" }}']
+        parts += [f'where {{ field: "{field}" op: "{OPERATOR_NAMES[op]}" value: {value!r} }}'
+                  for field, op, value in self.filters]
+        if self.order:
+            field, descending = self.order
+            parts.append(f'order_by {{ field: "{field}" direction: {"DESCENDING" if descending else "ASCENDING"} }}')
+        if self.limit_to is not None:
+            parts.append(f"limit: {self.limit_to}")
+        return " ".join(parts)
+
+    def count(self, alias=None):
+        return FakeAggregation(self, alias, "count { }", lambda: sum(1 for _ in self.stream()))
+
+    def sum(self, field, alias=None):
+        return FakeAggregation(self, alias, f'sum {{ field: "{field}" }}',
+                               lambda: sum(doc.to_dict().get(field, 0) for doc in self.stream()))
+
+    def on_snapshot(self, callback):
+        return self.collection._listen(self, callback)
+
+
+class FakeAggregation:
+    def __init__(self, query, alias, function, compute):
+        self.query = query
+        self.alias = alias
+        self.function = function
+        self.compute = compute
+
+    def _to_protobuf(self):
+        query = self.query._to_protobuf()
+        return f'structured_query {{ {query} }} aggregations {{ alias: "{self.alias}" {self.function} }}'
+
+    def get(self):
+        return [[SimpleNamespace(alias=self.alias, value=self.compute())]]
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client, name):
+        super().__init__(self)
+        self.client = client
+        self.name = name
+        self.docs = {}
+        self.version = 0
+        self._order_cache = {}
+        self._listeners = []
+
+    def document(self, doc_id=None):
+        return FakeDocument(self, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+    def load(self, items):
+        """Bulk-load (doc_id, data) pairs without notifying listeners (benchmark setup)."""
+        self.docs.update((doc_id, dict(data)) for doc_id, data in items)
+        self.version += 1
+
+    def _write(self, doc_id, data):
+        before = self.docs.get(doc_id)
+        if data is None:
+            self.docs.pop(doc_id, None)
+        else:
+            self.docs[doc_id] = data
+        self.version += 1
+        for query, callback in list(self._listeners):
+            was, now = before is not None and query.matches(before), data is not None and query.matches(data)
+            if not (was or now):
+                continue
+            kind = REMOVED if not now else (MODIFIED if was else ADDED)
+            snapshot = FakeSnapshot(self.document(doc_id), data if now else before)
+            callback([], [SimpleNamespace(type=kind, document=snapshot)], None)
+
+    def _listen(self, query, callback):
+        entry = (query, callback)
+        self._listeners.append(entry)
+        docs = list(query.stream())
+        callback(docs, [SimpleNamespace(type=ADDED, document=doc) for doc in docs], None)
+        return SimpleNamespace(unsubscribe=lambda: self._listeners.remove(entry))
+
+    @staticmethod
+    def _sort_key(snapshot, field, descending):
+        value = snapshot.get(field)
+        # Descending order is ascending order over inverted keys; strings are
+        # inverted code point by code point (the trailing 1 sorts a prefix
+        # after the longer strings it starts) so bisect still works
+        if descending:
+            value = _invert_str(value) if isinstance(value, str) else -value
+            return (value, _invert_str(snapshot.id))
+        return (value, snapshot.id)
+
+    def _ordered(self, filters, field, descending):
+        """Sorted [(key..., doc_id)] for a filtered ordering, rebuilt only after writes."""
+        cache_key = (filters, field, descending)
+        cached = self._order_cache.get(cache_key)
+        if cached and cached[0] == self.version:
+            return cached[1]
+        query = FakeQuery(self, filters)
+        ordered = sorted(
+            self._sort_key(FakeSnapshot(self.document(doc_id), data), field, descending) + (doc_id,)
+            for doc_id, data in self.docs.items() if field in data and query.matches(data)
+        )
+        self._order_cache[cache_key] = (self.version, ordered)
+        return ordered
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.writes = []
+
+    def create(self, ref, data):
+        self.writes.append((ref, "create", lambda: ref.set(data)))
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref, True, lambda: ref.set(data, merge=merge)))
+
+    def update(self, ref, data):
+        self.writes.append((ref, None, lambda: ref.update(data)))
+
+    def delete(self, ref):
+        self.writes.append((ref, False, ref.delete))
+
+    def commit(self):
+        # All or nothing, like a real batch: fail before writing if an update has no
+        # document or a create has one
+        if len(self.writes) > 500:
+            raise ValueError(f"{len(self.writes)} writes in one batch; Firestore allows 500")
+        exists = {}
+        for ref, creates, _ in self.writes:
+            key = (ref.collection.name, ref.id)
+            found = exists.get(key, ref.id in ref.collection.docs)
+            if creates is None and not found:
+                raise NotFound(f"No document to update: {ref.collection.name}/{ref.id}")
+            if creates == "create" and found:
+                raise AlreadyExists(f"Document already exists: {ref.collection.name}/{ref.id}")
+            if creates is not None:
+                exists[key] = bool(creates)
+        for _, _, write in self.writes:
+            write()
+        self.writes = []
+        self.client.batches_committed += 1
+
+
+class FakeTransaction(FakeBatch):
+    """Commits like a batch; with one thread writing there is nothing to contend with."""
+
+
+def transactional(fn):
+    """Stand-in for firestore.transactional (JournalSyncer.transactional in benchmarks)."""
+    def run(transaction, *args, **kwargs):
+        result = fn(transaction, *args, **kwargs)
+        transaction.commit()
+        return result
+    return run
+
+
+class FakeFirestoreClient:
+    def __init__(self):
+        self.collections = {}
+        self.batches_committed = 0
+
+    def collection(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    def collection_group(self, name):
+        """Query over every collection called `name` (a snapshot of them, not live)."""
+        group = FakeCollection(self, name)
+        group.load((f"{path}/{doc_id}", data) for path, collection in self.collections.items()
+                   if path.rsplit("/", 1)[-1] == name for doc_id, data in collection.docs.items())
+        return group
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def get_all(self, references, transaction=None):
+        return [ref.get() for ref in references]
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import metrics
+import worklog_db
+import worklog_io
+from firestore_store import (CollectionCache, DashboardStats, JobRecord, LogPager, WriteJournal, JournalSyncer, counter_writes,
+                             delete_documents, history_writes, load_report_rows, log_cache_cutoff, new_doc_id, sorted_logs,
+                             vehicle_index)
+from view_model import PickerIndex
+from benchmarks.fake_firestore import FakeFirestoreClient, Increment, transactional
+from benchmarks.synthetic import TECHNICIANS, generate_jobs, generate_vehicles, write_jobs_csv
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+FIRESTORE_MAX_ROWS = 100_000  # the fake keeps every document in memory
+SAVE_COUNT = 500              # single-job saves timed per run
+BULK_COUNT = 1000             # rows touched by the bulk operations
+SCROLL_PAGES = 10
+
+NO_FILTERS = {"jobnum": "", "vin": "", "technician": "", "text": ""}
+
+
+class Recorder:
+    def __init__(self, backend, size):
+        self.backend = backend
+        self.size = size
+        self.results = []
+
+    def time(self, op, fn, *args, **kwargs):
+        """Run fn once, record how long it took (and any Firestore reads it billed) and return its result."""
+        with metrics.timed(f"{self.backend}.{op}") as timing:
+            start = time.perf_counter()
+            value = fn(*args, **kwargs)
+            seconds = time.perf_counter() - start
+        result = {"backend": self.backend, "size": self.size, "op": op, "seconds": round(seconds, 6)}
+        reads = f"{timing.reads:>9} reads" if timing.reads else ""
+        if timing.reads:
+            result["reads"] = timing.reads
+        self.results.append(result)
+        print(f"  {self.backend:<9} {self.size:>9} {op:<24} {seconds:9.4f}s{reads}", file=sys.stderr)
+        return value
+
+    def memory(self, op, build, rows):
+        """Record the bytes per row still allocated by build()'s result."""
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            kept = build()
+            per_row = (tracemalloc.get_traced_memory()[0] - start) / max(rows, 1)
+        finally:
+            tracemalloc.stop()
+        del kept
+        self.results.append({"backend": self.backend, "size": self.size, "op": op, "bytes_per_row": round(per_row)})
+        print(f"  {self.backend:<9} {self.size:>9} {op:<24} {per_row:9.0f} B/row", file=sys.stderr)
+
+    def skip(self, op, reason):
+        self.results.append({"backend": self.backend, "size": self.size, "op": op, "skipped": reason})
+
+
+# --------------------------
+# SQLite (main_sql.py paths)
+# --------------------------
+def run_sqlite(size, workdir, seed=0):
+    rec = Recorder("sqlite", size)
+    csv_path = rec.time("generate_csv", write_jobs_csv, os.path.join(workdir, "jobs.csv"), size, seed)
+    db_path = os.path.join(workdir, "bench.db")
+    with worklog_db.transaction(db_path) as conn:
+        worklog_db.create_schema(conn)
+    try:
+        rec.time("import", worklog_io.import_csv, csv_path, db_path)
+        conn = worklog_db.get_connection(db_path)
+
+        def load(sort="date", descending=True, filters=NO_FILTERS):
+            # What load_logs does: a total count plus the first page
+            worklog_db.count_logs(conn, **filters)
+            return worklog_db.fetch_log_page(conn, filters, sort=sort, descending=descending)
+
+        rec.time("load", load)
+
+        def scroll():
+            rows = load()
+            for _ in range(SCROLL_PAGES):
+                rows = worklog_db.fetch_log_page(conn, NO_FILTERS, after=worklog_db.log_key(rows[-1]))
+        rec.time(f"scroll_{SCROLL_PAGES}_pages", scroll)
+
+        for key in worklog_db.SORT_KEYS:
+            rec.time(f"sort:{key}:asc", load, key, False)
+            rec.time(f"sort:{key}:desc", load, key, True)
+
+        vin = conn.execute("SELECT vin FROM logs LIMIT 1").fetchone()[0]
+        searches = {
+            "text": {"text": "brake"},
+            "technician": {"technician": "Sarah"},
+            "vin": {"vin": vin[:8]},
+            "short_term": {"text": "O2"},
+        }
+        for name, terms in searches.items():
+            rec.time(f"search:{name}", load, filters={**NO_FILTERS, **terms})
+
+        rec.time("export:csv", worklog_io.export_logs, os.path.join(workdir, "out.csv"), db_path=db_path)
+        rec.time("export:jsonl", worklog_io.export_logs, os.path.join(workdir, "out.jsonl"), db_path=db_path)
+
+        jobs = list(generate_jobs(SAVE_COUNT, seed + 1))
+
+        def save():
+            # One transaction per job, as the Save Entry button does
+            for job in jobs:
+                with worklog_db.transaction(db_path) as c:
+                    worklog_db.insert_log(c, job["jobnum"], job["vin"], job["technician"],
+                                          job["description"], job["date"], job["status"])
+        rec.time(f"save_x{SAVE_COUNT}", save)
+
+        ids = [row[0] for row in conn.execute("SELECT id FROM logs LIMIT ?", (BULK_COUNT,))]
+
+        def bulk(fn, *args):
+            with worklog_db.transaction(db_path) as c:
+                fn(c, ids, *args)
+        rec.time(f"bulk_status_x{len(ids)}", bulk, worklog_db.set_logs_field, "status", "Complete")
+        rec.time(f"bulk_delete_x{len(ids)}", bulk, worklog_db.delete_logs)
+        rec.time("reports", lambda: worklog_db.build_reports(
+            worklog_db.summary_rows(conn, worklog_db.report_since()), worklog_db.total_rows(conn)))
+    finally:
+        worklog_db.close_connection(db_path)
+    return rec.results
+
+
+# --------------------------
+# Firestore (main.py paths, against the in-process fake)
+# --------------------------
+def run_firestore(size, workdir, seed=0):
+    rec = Recorder("firestore", size)
+    client = FakeFirestoreClient()
+
+    def populate():
+        vehicles = [(new_doc_id(), v) for v in generate_vehicles(max(size // 50, 50), seed)]
+        client.collection("vehicles").load(vehicles)
+        client.collection("technicians").load((new_doc_id(), {"name": name}) for name in TECHNICIANS)
+        labels = list(vehicle_index(vehicles))
+        client.collection("logs").load((new_doc_id(), job) for job in generate_jobs(size, seed, labels))
+    rec.time("generate", populate)
+
+    def load_vehicles():
+        cache = CollectionCache(client.collection("vehicles")).start()
+        return vehicle_index(cache.items())
+    vehicles = rec.time("load_vehicles", load_vehicles)
+
+    picker = PickerIndex()
+    rec.time("picker:index", picker.add_many, ((v.label, v.registration) for v in vehicles.values()))
+
+    def type_into_picker(text):
+        # One search per keystroke, as the vehicle picker does
+        for end in range(1, len(text) + 1):
+            picker.search(text[:end])
+    sample = next(iter(vehicles.values()))
+    rec.time("picker:type_make_model", type_into_picker, f"{sample.make} {sample.model}")
+    rec.time("picker:type_registration", type_into_picker, sample.registration)
+
+    cutoff = log_cache_cutoff()
+    logs = client.collection("logs")
+    log_cache = CollectionCache(logs.where("date", ">=", cutoff), record=JobRecord)
+    pager = LogPager(logs.where("date", "<", cutoff))
+
+    def view_job_logs():
+        # Recent jobs from the live cache, then the first page of older ones
+        log_cache.start()
+        rows = sorted_logs(log_cache.items())
+        return rows, pager.next_page()
+    rec.time("view_job_logs", view_job_logs)
+
+    def scroll():
+        for _ in range(SCROLL_PAGES):
+            pager.next_page()
+    rec.time(f"scroll_{SCROLL_PAGES}_pages", scroll)
+    rec.time("load_all", pager.rest)
+
+    # What holding the jobs costs: decoded documents as plain dicts vs JobRecords.
+    # Documents go through JSON so every string is a fresh object, as off the wire.
+    wire = [json.dumps(doc.to_dict()) for doc in logs.stream()]
+    rec.memory("memory:job_dict", lambda: [json.loads(doc) for doc in wire], len(wire))
+    rec.memory("memory:job_record", lambda: [JobRecord(json.loads(doc)) for doc in wire], len(wire))
+    vehicle_wire = [(doc.id, json.dumps(doc.to_dict())) for doc in client.collection("vehicles").stream()]
+    rec.memory("memory:vehicle", lambda: vehicle_index((doc_id, json.loads(doc)) for doc_id, doc in vehicle_wire),
+               len(vehicle_wire))
+    del wire, vehicle_wire
+
+    journal = WriteJournal(os.path.join(workdir, "journal.db"))
+    try:
+        jobs = list(generate_jobs(SAVE_COUNT, seed + 1))
+
+        def save():
+            # What save_job does: the job, its report counters and history event in one journal txn
+            for job in jobs:
+                doc_id = new_doc_id()
+                history = history_writes([doc_id])
+                journal.enqueue_many([("logs", doc_id, "set", job)] + counter_writes([(None, job)]) + history)
+                log_cache.put(doc_id, job)
+        rec.time(f"save_x{SAVE_COUNT}", save)
+
+        syncer = JournalSyncer(journal, client)
+        syncer.increment = Increment
+        syncer.transactional = transactional
+
+        def sync():
+            # The syncer thread's loop body, run inline until the journal is empty
+            while True:
+                entries = journal.pending(syncer.batch_size)
+                if not entries:
+                    break
+                error = syncer.sync(entries)
+                if error is not None:
+                    raise error
+        rec.time(f"sync_x{SAVE_COUNT}", sync)
+
+        rec.time("reports:first_open", lambda: worklog_db.build_reports(*load_report_rows(client)))  # seeds counters
+        rec.time("reports", lambda: worklog_db.build_reports(*load_report_rows(client)))
+
+        stats = DashboardStats(client)
+        rec.time("dashboard:totals", stats.totals)
+        rec.time("dashboard:by_technician", stats.by_technician, TECHNICIANS)
+        rec.time("dashboard:cached", stats.by_technician, TECHNICIANS)
+
+        jobs = log_cache.items()[:BULK_COUNT]
+        doc_ids = [doc_id for doc_id, _ in jobs]
+
+        def bulk_status():
+            # What bulk_update_jobs does: one journal txn per job, all in one local commit
+            journal.enqueue_txns([[("logs", doc_id, "update", {"status": "Complete"})]
+                                  + counter_writes([(job, {**job, "status": "Complete"})])
+                                  + history_writes([doc_id])
+                                  for doc_id, job in jobs])
+        rec.time(f"bulk_status_x{len(doc_ids)}", bulk_status)
+        rec.time(f"bulk_delete_x{len(doc_ids)}", delete_documents, client, logs, doc_ids)
+    finally:
+        log_cache.stop()
+        worklog_db.close_connection(journal.path)
+    return rec.results
+
+
+# --------------------------
+# Command line
+# --------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time the work log data paths on synthetic shop data.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated row counts (default: %(default)s)")
+    parser.add_argument("--backends", default="sqlite,firestore", help="sqlite, firestore or both")
+    parser.add_argument("--firestore-max", type=int, default=FIRESTORE_MAX_ROWS,
+                        help="skip the Firestore fake above this many rows (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="write JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(n) for n in args.sizes.split(",") if n.strip()]
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    results = []
+    for size in sizes:
+        for backend in backends:
+            if backend == "firestore" and size > args.firestore_max:
+                rec = Recorder(backend, size)
+                rec.skip("*", f"above --firestore-max {args.firestore_max}")
+                results.extend(rec.results)
+                continue
+            runner = {"sqlite": run_sqlite, "firestore": run_firestore}[backend]
+            with tempfile.TemporaryDirectory(prefix="worklog-bench-") as workdir:
+                results.extend(runner(size, workdir, args.seed))
+
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
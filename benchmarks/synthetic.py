@@ -0,0 +1,104 @@
+import csv
+import random
+from datetime import date, timedelta
+
+import worklog_db
+
+# --------------------------
+# Synthetic shop data
+# --------------------------
+VIN_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"  # no I, O or Q, as on real VINs
+
+TECHNICIANS = ["John", "Mike", "Sarah", "Alex", "Priya", "Tom", "Grace", "Omar", "Lena", "Dave",
+               "Chen", "Maria", "Sam", "Ivan", "Rosa", "Ben"]
+
+VEHICLE_MODELS = {
+    "Ford": ["Focus", "Fiesta", "Transit", "Ranger", "Kuga"],
+    "Toyota": ["Corolla", "Yaris", "Hilux", "RAV4", "Prius"],
+    "Volkswagen": ["Golf", "Polo", "Passat", "Transporter", "Tiguan"],
+    "Honda": ["Civic", "Jazz", "CR-V", "Accord"],
+    "BMW": ["1 Series", "3 Series", "5 Series", "X3"],
+    "Nissan": ["Qashqai", "Micra", "Leaf", "Navara"],
+}
+
+JOB_TEMPLATES = [
+    "Replaced front brake pads and discs",
+    "Replaced rear brake pads",
+    "Full service, oil and filter change",
+    "Interim service, topped up fluids",
+    "Diagnosed engine warning light, replaced {part}",
+    "Replaced {part} after customer reported noise",
+    "MOT failure repair: {part}",
+    "Fitted two new tyres and wheel alignment",
+    "Air conditioning regas and leak test",
+    "Replaced timing belt and water pump",
+    "Battery test, replaced battery",
+    "Investigated intermittent fault, replaced {part}",
+]
+
+PARTS = ["alternator", "starter motor", "O2 sensor", "wheel bearing", "CV joint", "clutch kit",
+         "exhaust back box", "coil pack", "thermostat", "drop link", "wiper motor", "glow plugs"]
+
+DATE_SPAN_DAYS = 730  # jobs are spread over the two years before today
+
+
+def random_vin(rng):
+    return "".join(rng.choice(VIN_CHARS) for _ in range(17))
+
+
+def random_description(rng):
+    return rng.choice(JOB_TEMPLATES).format(part=rng.choice(PARTS))
+
+
+def generate_vehicles(count, seed=0):
+    """Yield vehicle dicts shaped like documents in the `vehicles` collection."""
+    rng = random.Random(seed)
+    makes = list(VEHICLE_MODELS)
+    for i in range(count):
+        make = rng.choice(makes)
+        yield {
+            "make": make,
+            "model": rng.choice(VEHICLE_MODELS[make]),
+            "registration": f"{rng.choice(VIN_CHARS)}{rng.choice(VIN_CHARS)}{i % 100:02d} {random_vin(rng)[:3]}",
+            "year": str(rng.randint(2005, 2025)),
+        }
+
+
+def generate_jobs(count, seed=0, vehicle_labels=None, today=None):
+    """Yield job dicts with jobnum, vin, technician, description, date and status.
+
+    Job numbers wrap at 99999 to stay valid for the entry form. Around one
+    vehicle in five comes back for another job, as in a real shop.
+    `vehicle_labels`, if given, adds a `vehicle_label` field (Firestore shape).
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    returning = []
+    for i in range(count):
+        if returning and rng.random() < 0.2:
+            vin = rng.choice(returning)
+        else:
+            vin = random_vin(rng)
+            if len(returning) < 5000:
+                returning.append(vin)
+        job = {
+            "jobnum": str(i % 99999 + 1),
+            "vin": vin,
+            "technician": rng.choice(TECHNICIANS),
+            "description": random_description(rng),
+            "date": (today - timedelta(days=rng.randrange(DATE_SPAN_DAYS))).strftime("%Y-%m-%d"),
+            "status": rng.choices(worklog_db.STATUSES, weights=(1, 1, 8))[0],
+        }
+        if vehicle_labels:
+            job["vehicle_label"] = rng.choice(vehicle_labels)
+        yield job
+
+
+def write_jobs_csv(path, count, seed=0):
+    """Write `count` jobs in the import_from_csv format; returns the path."""
+    columns = ("jobnum", "vin", "technician", "description", "date", "status")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows([job[col] for col in columns] for job in generate_jobs(count, seed))
+    return path
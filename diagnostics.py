@@ -0,0 +1,93 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+import metrics
+
+# --------------------------
+# Diagnostics window (used by both apps)
+# --------------------------
+
+class DiagnosticsWindow(tk.Toplevel):
+    """Latency, rows and Firestore reads per operation, and the slow-operation log."""
+    OP_COLUMNS = ("op", "count", "errors", "mean_ms", "p95_ms", "max_ms", "rows", "reads")
+    SLOW_COLUMNS = ("at", "op", "ms", "rows", "reads", "query")
+
+    def __init__(self, parent, registry=metrics.METRICS):
+        super().__init__(parent)
+        self.registry = registry
+        self.title("Diagnostics")
+        self.geometry("860x560")
+
+        self.screens_var = tk.StringVar()
+        tk.Label(self, textvariable=self.screens_var, anchor="w", justify="left").pack(fill="x", padx=10, pady=5)
+
+        ops_frame = tk.LabelFrame(self, text="Operations")
+        ops_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.ops_tree = ttk.Treeview(ops_frame, columns=self.OP_COLUMNS, show="headings", height=10)
+        for col in self.OP_COLUMNS:
+            self.ops_tree.heading(col, text=col.replace("_", " ").title())
+            self.ops_tree.column(col, width=220 if col == "op" else 80, anchor="w" if col == "op" else "e")
+        self.ops_tree.pack(fill="both", expand=True)
+
+        slow_frame = tk.LabelFrame(self, text=f"Slow operations (over {registry.slow_seconds * 1000:g} ms)")
+        slow_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.slow_tree = ttk.Treeview(slow_frame, columns=self.SLOW_COLUMNS, show="headings", height=6)
+        for col in self.SLOW_COLUMNS:
+            self.slow_tree.heading(col, text=col.title())
+            self.slow_tree.column(col, width=360 if col == "query" else 70 if col != "at" else 140)
+        self.slow_tree.pack(fill="both", expand=True)
+        self.slow_tree.bind("<Double-1>", self.show_slow_entry)
+
+        btn_frame = tk.Frame(self)
+        btn_frame.pack(pady=5)
+        tk.Button(btn_frame, text="Refresh", command=self.refresh).grid(row=0, column=0, padx=5)
+        tk.Button(btn_frame, text="Reset", command=self.reset).grid(row=0, column=1, padx=5)
+        tk.Button(btn_frame, text="Save JSON…", command=self.save_json).grid(row=0, column=2, padx=5)
+
+        self.slow_entries = []
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.registry.snapshot()
+        screens = sorted(snapshot["screens"].items(), key=lambda item: -item[1]["reads"])
+        reads = ", ".join(f"{screen} {totals['reads']:,}" for screen, totals in screens if totals["reads"])
+        self.screens_var.set(f"Since {snapshot['since']}. Firestore reads by screen: {reads or 'none'}")
+
+        self.ops_tree.delete(*self.ops_tree.get_children())
+        ops = sorted(snapshot["ops"].items(), key=lambda item: -item[1]["total_ms"])
+        for op, stats in ops:
+            self.ops_tree.insert("", "end", values=(op, *("" if stats[col] is None else stats[col]
+                                                          for col in self.OP_COLUMNS[1:])))
+
+        self.slow_entries = list(reversed(snapshot["slow"]))  # newest first
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for i, entry in enumerate(self.slow_entries):
+            query = entry["queries"][0] if entry["queries"] else entry["detail"] or ""
+            self.slow_tree.insert("", "end", iid=str(i), values=(
+                entry["at"], entry["op"], entry["ms"], entry["rows"], entry["reads"], " ".join(query.split())))
+
+    def show_slow_entry(self, event):
+        selected = self.slow_tree.selection()
+        if not selected:
+            return
+        entry = self.slow_entries[int(selected[0])]
+        text = "\n\n".join(filter(None, [entry["detail"], *entry["queries"]])) or "(no query text recorded)"
+        messagebox.showinfo(f"{entry['op']} — {entry['ms']} ms", text, parent=self)
+
+    def reset(self):
+        self.registry.reset()
+        self.refresh()
+
+    def save_json(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")],
+            title="Save diagnostics"
+        )
+        if not file_path:
+            return
+        try:
+            self.registry.dump(file_path)
+        except OSError as e:
+            messagebox.showerror("Save Error", f"An error occurred:\n{e}", parent=self)
@@ -0,0 +1,1085 @@
+# --------------------------
+# Firestore data access for main.py (no Tk imports here)
+# --------------------------
+import json
+import sys
+import threading
+import time
+import uuid
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+
+import metrics
+import worklog_db
+
+# --------------------------
+# Models
+# --------------------------
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Vehicle:
+    __slots__ = ("make", "model", "registration", "year", "doc_id", "_label")
+
+    def __init__(self, make: str, model: str, registration: str, year: str, doc_id: str = None):
+        # Makes, models and years repeat across the fleet; interning shares one copy of each
+        self.make = sys.intern((make or "").strip())
+        self.model = sys.intern((model or "").strip())
+        self.registration = (registration or "").strip().upper()
+        self.year = sys.intern((year or "").strip())
+        self.doc_id = doc_id
+        self._label = None
+
+    @property
+    def label(self) -> str:
+        if self._label is None:
+            parts = [p for p in (self.make, self.model) if p]
+            label_left = " ".join(parts) if parts else "Unknown"
+            reg_part = f"({self.registration})" if self.registration else ""
+            year_part = f"{self.year}" if self.year else ""
+            self._label = " ".join([label_left, reg_part, year_part]).strip()
+        return self._label
+
+    def __repr__(self):
+        return f"<Vehicle {self.label}>"
+
+
+def vehicle_from_data(doc_id, data):
+    return Vehicle(data.get("make", ""), data.get("model", ""), data.get("registration", ""),
+                   str(data.get("year", "")), doc_id)
+
+
+def vehicle_index(items):
+    """label -> Vehicle for (doc_id, data) pairs from the vehicles collection."""
+    vehicles = {}
+    for doc_id, data in items:
+        v = vehicle_from_data(doc_id, data)
+        vehicles[v.label] = v
+    return vehicles
+
+
+JOB_FIELDS = ("jobnum", "vehicle_label", "vehicle_id", "technician", "status", "date", "description",
+              "history_version", "completed_on")
+_MISSING = object()
+
+
+class JobRecord(Mapping):
+    """Compact read-only copy of one job document.
+
+    Slots instead of a per-job dict, and the strings that repeat from job to
+    job (vehicle, technician, status, date) interned, so a large log cache
+    costs a fraction of the doc.to_dict() dicts. It is a Mapping (get, [],
+    {**record}), so code written for those dicts keeps working; build a new
+    record to change a job. Unexpected fields are kept in `extra`.
+    """
+    __slots__ = JOB_FIELDS + ("extra",)
+
+    def __init__(self, data):
+        get = data.get
+        self.jobnum = get("jobnum", _MISSING)
+        self.vehicle_label = _intern(get("vehicle_label", _MISSING))
+        self.vehicle_id = _intern(get("vehicle_id", _MISSING))
+        self.technician = _intern(get("technician", _MISSING))
+        self.status = _intern(get("status", _MISSING))
+        self.date = _intern(get("date", _MISSING))
+        self.description = get("description", _MISSING)
+        self.history_version = get("history_version", _MISSING)
+        self.completed_on = _intern(get("completed_on", _MISSING))
+        self.extra = None
+        if len(data) > sum(1 for field in JOB_FIELDS if getattr(self, field) is not _MISSING):
+            self.extra = {key: value for key, value in data.items() if key not in JOB_FIELDS}
+
+    def __getitem__(self, key):
+        value = getattr(self, key, _MISSING) if key in JOB_FIELDS else (self.extra or {}).get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        for field in JOB_FIELDS:
+            if getattr(self, field) is not _MISSING:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"JobRecord({dict(self)!r})"
+
+
+# --------------------------
+# Billed reads
+# --------------------------
+# Firestore bills one read per document a get or query returns, and at least
+# one per query even when nothing matches. Reads go through these helpers so
+# they are counted (see metrics.py) against the op the calling thread is in,
+# and what they read (collection, filters, order, limit) shows in the slow log.
+def describe_query(query):
+    """One line naming a query's collection, filters, order and limit (or an
+    aggregation's query and functions), as in its StructuredQuery."""
+    try:
+        if hasattr(query, "_query"):  # a CollectionReference
+            query = query._query()
+        return " ".join(str(query._to_protobuf()).split())
+    except Exception:  # never let the slow log break a read
+        return repr(query)
+
+
+def get_document(ref, transaction=None):
+    metrics.note_query(f"get {ref.path}")
+    snapshot = ref.get(transaction=transaction) if transaction else ref.get()
+    metrics.add(rows=int(snapshot.exists), reads=1)
+    return snapshot
+
+
+def stream_counted(query):
+    """query.stream(), counting the documents read even if the caller stops early."""
+    metrics.note_query(describe_query(query))
+    count = 0
+    try:
+        for doc in query.stream():
+            count += 1
+            yield doc
+    finally:
+        metrics.add(rows=count, reads=max(count, 1))
+
+
+# --------------------------
+# Paged log reads
+# --------------------------
+DESCENDING = "DESCENDING"  # same value as firestore.Query.DESCENDING
+
+LOG_PAGE_SIZE = 100
+
+
+class LogPager:
+    """Reads the `logs` collection one page at a time, newest first.
+
+    Each page is a `limit` query that resumes with `start_after` from the last
+    document snapshot already read, so the cost of a page does not depend on
+    how many jobs were logged before it.
+    """
+
+    def __init__(self, query, page_size=LOG_PAGE_SIZE, order_field="date", direction=DESCENDING):
+        self.base_query = query  # the collection itself or a filtered query on it
+        self.page_size = page_size
+        self.order_field = order_field
+        self.direction = direction
+        self.last_doc = None
+        self.exhausted = False
+        self.loaded = 0
+
+    def _query(self):
+        query = self.base_query.order_by(self.order_field, direction=self.direction)
+        if self.last_doc is not None:
+            query = query.start_after(self.last_doc)
+        return query
+
+    def next_page(self):
+        """Return the next page of document snapshots ([] once exhausted)."""
+        if self.exhausted:
+            return []
+        docs = list(stream_counted(self._query().limit(self.page_size)))
+        self._advance(docs)
+        self.exhausted = len(docs) < self.page_size
+        return docs
+
+    def rest(self):
+        """Return every remaining document in one query (the "load all" path)."""
+        if self.exhausted:
+            return []
+        docs = list(stream_counted(self._query()))
+        self._advance(docs)
+        self.exhausted = True
+        return docs
+
+    def _advance(self, docs):
+        if docs:
+            self.last_doc = docs[-1]
+            self.loaded += len(docs)
+
+
+class CollectionCache:
+    """In-memory copy of a collection or query, kept current by an on_snapshot listener.
+
+    The first snapshot delivers every matching document once; after that only
+    added, modified and removed documents are applied. Listener callbacks run
+    on Firestore's watch thread, so subscribers must hand work back to Tk
+    themselves (e.g. with root.after).
+    """
+
+    def __init__(self, query, record=None, name="cache"):
+        self.query = query
+        self.name = name  # metrics op: listen.<name>
+        self.record = record  # e.g. JobRecord: stored form of each document's dict
+        self.data = {}       # doc id -> dict (or record)
+        self.snapshots = {}  # doc id -> DocumentSnapshot (usable as a query cursor)
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._watch = None
+
+    def start(self):
+        if self._watch is None:
+            self._watch = self.query.on_snapshot(self._on_snapshot)
+        return self
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def subscribe(self, callback):
+        """Call `callback(changes)` with [(type, doc_id, data)] after each snapshot."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _on_snapshot(self, docs, changes, read_time):
+        applied = []
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                kind = change.type.name  # ADDED / MODIFIED / REMOVED
+                if kind == "REMOVED":
+                    self.data.pop(doc.id, None)
+                    self.snapshots.pop(doc.id, None)
+                    applied.append((kind, doc.id, None))
+                else:
+                    data = doc.to_dict() or {}
+                    if self.record:
+                        data = self.record(data)
+                    self.data[doc.id] = data
+                    self.snapshots[doc.id] = doc
+                    applied.append((kind, doc.id, data))
+        # Each changed document is a billed read; the first snapshot costs one even if empty
+        metrics.record(f"listen.{self.name}", rows=len(applied), reads=max(len(applied), 0 if self.ready.is_set() else 1))
+        self.ready.set()
+        self._notify(applied)
+
+    def put(self, doc_id, data):
+        """Apply a local write straight away; the listener confirms it later."""
+        self.put_many([(doc_id, data)])
+
+    def put_many(self, items):
+        """put() for many documents with a single subscriber notification."""
+        applied = []
+        with self._lock:
+            for doc_id, data in items:
+                kind = "MODIFIED" if doc_id in self.data else "ADDED"
+                if self.record:
+                    data = self.record(data)
+                self.data[doc_id] = data
+                applied.append((kind, doc_id, data))
+        self._notify(applied)
+
+    def discard(self, doc_id):
+        self.discard_many([doc_id])
+
+    def discard_many(self, doc_ids):
+        with self._lock:
+            for doc_id in doc_ids:
+                self.data.pop(doc_id, None)
+                self.snapshots.pop(doc_id, None)
+        self._notify([("REMOVED", doc_id, None) for doc_id in doc_ids])
+
+    def _notify(self, changes):
+        for callback in list(self._subscribers):
+            callback(changes)
+
+    def get(self, doc_id):
+        with self._lock:
+            return self.data.get(doc_id)
+
+    def items(self):
+        with self._lock:
+            return list(self.data.items())
+
+    def __len__(self):
+        return len(self.data)
+
+
+# --------------------------
+# Log cache window
+# --------------------------
+# The log cache listens to jobs dated within the last LOG_CACHE_DAYS only;
+# older jobs are paged in on demand with a LogPager over the rest.
+LOG_CACHE_DAYS = 30
+
+
+def log_cache_cutoff(today=None, days=LOG_CACHE_DAYS):
+    today = today or date.today()
+    return (today - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def log_order_key(doc_id, data):
+    """Sort key of one job; newest first means descending on this key, as a LogPager pages."""
+    return (data.get("date", ""), doc_id)
+
+
+def sorted_logs(items):
+    """(doc_id, data) pairs newest first, in the same order as a LogPager."""
+    return sorted(items, key=lambda item: log_order_key(*item), reverse=True)
+
+
+# --------------------------
+# Batched writes
+# --------------------------
+BATCH_LIMIT = 500  # Firestore's maximum operations per WriteBatch
+SYNC_BATCH_SIZE = BATCH_LIMIT // 2  # journal entries per push: a txn marker can follow each one
+
+
+def delete_documents(client, collection_ref, doc_ids):
+    """Delete documents by id with one WriteBatch commit per BATCH_LIMIT ids."""
+    doc_ids = list(doc_ids)
+    for start in range(0, len(doc_ids), BATCH_LIMIT):
+        batch = client.batch()
+        for doc_id in doc_ids[start:start + BATCH_LIMIT]:
+            batch.delete(collection_ref.document(doc_id))
+        batch.commit()
+
+
+# --------------------------
+# Job numbers
+# --------------------------
+JOBNUM_BLOCK_SIZE = 50
+
+
+def provisional_jobnum():
+    """A stand-in job number for saves made while no number can be reserved."""
+    return "P-" + new_doc_id()[:8].upper()
+
+
+def max_logged_jobnum(logs_ref):
+    """Highest numeric jobnum in `logs` (one-off scan, only fetches the jobnum field)."""
+    highest = 0
+    for doc in stream_counted(logs_ref.select(["jobnum"])):
+        value = str((doc.to_dict() or {}).get("jobnum", "")).strip()
+        if value.isdigit():
+            highest = max(highest, int(value))
+    return highest
+
+
+class JobNumberAllocator:
+    """Hands out job numbers from a counter document, a block at a time.
+
+    Each terminal reserves JOBNUM_BLOCK_SIZE numbers in one transaction on
+    `counters/jobnum` and then hands them out locally, so a save costs no
+    extra round trip and two terminals can never get the same number.
+    Reserved numbers are kept in the local journal database, so they survive
+    a restart and can be handed out while offline; top_up() reserves the next
+    block while half of the current ones are still left.
+    """
+
+    def __init__(self, client, block_size=JOBNUM_BLOCK_SIZE, path=None):
+        self.client = client
+        self.block_size = block_size
+        self.path = path or JOURNAL_PATH
+        self.counter_ref = client.collection("counters").document("jobnum")
+        self._lock = threading.Lock()
+        with worklog_db.transaction(self.path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS jobnum_blocks (start INTEGER NOT NULL, stop INTEGER NOT NULL)")
+
+    def available(self):
+        """Reserved numbers not yet handed out."""
+        return worklog_db.get_connection(self.path).execute(
+            "SELECT IFNULL(SUM(stop - start), 0) FROM jobnum_blocks").fetchone()[0]
+
+    def next(self):
+        """The next reserved number; reserves a block first (online) only when none are left."""
+        with self._lock:
+            if not self.available():
+                self._add_block(self._reserve_block())
+            with worklog_db.transaction(self.path) as conn:
+                rowid, jobnum, stop = conn.execute(
+                    "SELECT rowid, start, stop FROM jobnum_blocks ORDER BY start LIMIT 1").fetchone()
+                if jobnum + 1 < stop:
+                    conn.execute("UPDATE jobnum_blocks SET start = ? WHERE rowid = ?", (jobnum + 1, rowid))
+                else:
+                    conn.execute("DELETE FROM jobnum_blocks WHERE rowid = ?", (rowid,))
+        return str(jobnum)
+
+    def top_up(self):
+        """Reserve another block if half or fewer of the reserved numbers are left."""
+        with self._lock:
+            if self.available() <= self.block_size // 2:
+                self._add_block(self._reserve_block())
+
+    def _add_block(self, start):
+        with worklog_db.transaction(self.path) as conn:
+            conn.execute("INSERT INTO jobnum_blocks (start, stop) VALUES (?, ?)", (start, start + self.block_size))
+
+    def _reserve_block(self):
+        from google.cloud.firestore import transactional
+
+        if not get_document(self.counter_ref).exists:
+            self.seed()
+
+        @transactional
+        def reserve(transaction):
+            snapshot = get_document(self.counter_ref, transaction)
+            start = snapshot.get("next")
+            transaction.update(self.counter_ref, {"next": start + self.block_size})
+            return start
+
+        return reserve(self.client.transaction())
+
+    def seed(self):
+        """Migration: create the counter just above the highest jobnum already logged."""
+        from google.cloud.firestore import transactional
+
+        start = max_logged_jobnum(self.client.collection("logs")) + 1
+
+        @transactional
+        def create(transaction):
+            if not get_document(self.counter_ref, transaction).exists:
+                transaction.set(self.counter_ref, {"next": start})
+
+        create(self.client.transaction())
+
+
+# --------------------------
+# Offline write journal
+# --------------------------
+# Job writes are committed to a local SQLite journal first and pushed to
+# Firestore by a background syncer, so saving works during outages. Every
+# entry is replay-safe: creates use a client-generated document id with set(),
+# updates are update() and deletes are naturally idempotent, so an entry that
+# was committed but not yet removed from the journal can be sent again. An
+# update of a job another terminal has deleted fails with NotFound; its txn is
+# dropped rather than bringing the job back.
+# Writes enqueued together share a txn id and are always pushed in the same
+# WriteBatch, so a job and its report counters commit or fail as one. A txn
+# that Firestore rejects SYNC_MAX_ATTEMPTS times (anything but an outage or
+# contention) is moved to the failed_writes table so it no longer holds back
+# the writes queued after it.
+JOURNAL_PATH = "firestore_journal.db"
+SYNC_MAX_BACKOFF = 60  # seconds
+SYNC_MAX_ATTEMPTS = 5
+RETRYABLE_CODES = (408, 409, 429)  # timeout, aborted (contention), resource exhausted
+
+
+def new_doc_id():
+    return uuid.uuid4().hex[:20]
+
+
+def is_not_found(error):
+    return getattr(error, "code", None) == 404
+
+
+def is_already_applied(error):
+    """True when a push failed because one of its txn markers (see APPLIED_COLLECTION) exists.
+
+    AlreadyExists shares HTTP 409 with Aborted, so it is told apart by class.
+    """
+    return any(cls.__name__ == "AlreadyExists" for cls in type(error).__mro__)
+
+
+def is_transient(error):
+    """True for errors worth retrying as they are: outages, timeouts and contention.
+
+    Client-side validation errors and Firestore's 4xx rejections (bad
+    argument, permission denied, not found…) fail the same way every time.
+    """
+    if isinstance(error, (ValueError, TypeError)) or is_already_applied(error):
+        return False
+    code = getattr(error, "code", None)
+    return not (isinstance(code, int) and 400 <= code < 500 and code not in RETRYABLE_CODES)
+
+
+class WriteJournal:
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        with worklog_db.transaction(path) as conn:
+            # Journals from older versions also have an unused op_id column
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_writes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    data TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    txn TEXT
+                )
+            """)
+            if "txn" not in {row[1] for row in conn.execute("PRAGMA table_info(pending_writes)")}:
+                conn.execute("ALTER TABLE pending_writes ADD COLUMN txn TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS failed_writes (
+                    seq INTEGER PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    data TEXT,
+                    attempts INTEGER NOT NULL,
+                    last_error TEXT,
+                    txn TEXT,
+                    failed_at TEXT NOT NULL
+                )
+            """)
+
+    def enqueue(self, collection, doc_id, op, data=None):
+        """Durably record one write ("set", "update", "delete" or "increment"); returns its txn id."""
+        return self.enqueue_many([(collection, doc_id, op, data)])
+
+    def enqueue_many(self, writes):
+        """Record (collection, doc_id, op, data) writes in one local transaction: all or none.
+
+        Returns the txn id they share.
+        """
+        return self.enqueue_txns([writes])[0]
+
+    def enqueue_txns(self, txns):
+        """Record several lists of writes in one local transaction, each list as its own txn.
+
+        Firestore applies or rejects each txn on its own (see JournalSyncer.sync).
+        Returns the txn ids.
+        """
+        ids = [uuid.uuid4().hex for _ in txns]
+        rows = [(collection, doc_id, op, json.dumps(data) if data is not None else None, txn)
+                for txn, writes in zip(ids, txns) for collection, doc_id, op, data in writes]
+        with worklog_db.transaction(self.path) as conn:
+            conn.executemany(
+                "INSERT INTO pending_writes (collection, doc_id, op, data, txn) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return ids
+
+    def pending(self, limit=BATCH_LIMIT):
+        """Oldest (seq, collection, doc_id, op, data, txn) entries, at most `limit`,
+        never splitting a txn unless it alone exceeds `limit`."""
+        rows = worklog_db.get_connection(self.path).execute(
+            "SELECT seq, collection, doc_id, op, data, txn FROM pending_writes ORDER BY seq LIMIT ?", (limit + 1,)
+        ).fetchall()
+        if len(rows) > limit:
+            cut = limit
+            while cut > 0 and rows[cut - 1][5] is not None and rows[cut - 1][5] == rows[limit][5]:
+                cut -= 1
+            rows = rows[:cut or limit]
+        return [(seq, collection, doc_id, op, json.loads(data) if data else None, txn)
+                for seq, collection, doc_id, op, data, txn in rows]
+
+    def remove(self, seqs):
+        with worklog_db.transaction(self.path) as conn:
+            conn.executemany("DELETE FROM pending_writes WHERE seq=?", [(seq,) for seq in seqs])
+
+    def record_failure(self, seqs, error, counted=True, max_attempts=SYNC_MAX_ATTEMPTS):
+        """Note a failed push of `seqs`. Counted failures move a txn to failed_writes
+        once any of its entries has failed `max_attempts` times; returns how many moved."""
+        with worklog_db.transaction(self.path) as conn:
+            conn.executemany("UPDATE pending_writes SET attempts=attempts+?, last_error=? WHERE seq=?",
+                             [(int(counted), str(error), seq) for seq in seqs])
+            if not counted:
+                return 0
+            dead = "txn IN (SELECT txn FROM pending_writes WHERE attempts >= ?) OR (txn IS NULL AND attempts >= ?)"
+            conn.execute(f"""
+                INSERT INTO failed_writes (seq, collection, doc_id, op, data, attempts, last_error, txn, failed_at)
+                SELECT seq, collection, doc_id, op, data, attempts, last_error, txn, datetime('now')
+                FROM pending_writes WHERE {dead}
+            """, (max_attempts, max_attempts))
+            return conn.execute(f"DELETE FROM pending_writes WHERE {dead}", (max_attempts, max_attempts)).rowcount
+
+    def count(self):
+        return worklog_db.get_connection(self.path).execute("SELECT COUNT(*) FROM pending_writes").fetchone()[0]
+
+    def failed_count(self):
+        return worklog_db.get_connection(self.path).execute("SELECT COUNT(*) FROM failed_writes").fetchone()[0]
+
+
+def firestore_increment(amount):
+    from google.cloud.firestore import Increment
+
+    return Increment(amount)
+
+
+def firestore_transactional(fn):
+    from google.cloud.firestore import transactional
+
+    return transactional(fn)
+
+
+def txn_groups(entries):
+    """Split journal entries into runs that share a txn id."""
+    groups = []
+    for entry in entries:
+        if groups and entry[5] is not None and entry[5] == groups[-1][-1][5]:
+            groups[-1].append(entry)
+        else:
+            groups.append([entry])
+    return groups
+
+
+class JournalSyncer(threading.Thread):
+    """Pushes journal entries to Firestore in WriteBatch commits, oldest first.
+
+    Failed commits are retried with exponential backoff (1s doubling up to
+    SYNC_MAX_BACKOFF); `last_error` holds the latest failure until a push
+    succeeds. `on_change(pending_count)` is called from this thread after
+    every attempt.
+    """
+
+    increment = staticmethod(firestore_increment)  # field transform for "increment" entries
+    transactional = staticmethod(firestore_transactional)  # retrying wrapper for pushes with history
+
+    def __init__(self, journal, client, on_change=None, batch_size=SYNC_BATCH_SIZE):
+        super().__init__(name="journal-sync", daemon=True)
+        self.journal = journal
+        self.client = client
+        self.on_change = on_change
+        self.batch_size = batch_size
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def notify(self):
+        """Call after enqueueing so the write is pushed straight away."""
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self):
+        delay = 0
+        try:
+            while not self._stopping.is_set():
+                self._wake.clear()
+                entries = self.journal.pending(self.batch_size)
+                if not entries:
+                    self._wake.wait()
+                    continue
+                try:
+                    self.last_error = self.sync(entries)
+                except Exception as e:  # the local journal itself failed
+                    self.last_error = e
+                if self.last_error is None:
+                    delay = 0
+                else:
+                    delay = min(max(delay * 2, 1), SYNC_MAX_BACKOFF)
+                    self._stopping.wait(delay)
+                if self.on_change:
+                    self.on_change(self.journal.count())
+        finally:
+            worklog_db.close_connection(self.journal.path)
+
+    def sync(self, entries):
+        """Push one batch of entries and drop what was committed.
+
+        If Firestore rejects the batch outright, its txns are retried one by
+        one so a bad txn holds back only itself. Returns the error that left
+        entries in the journal, or None.
+        """
+        try:
+            self.push(entries)
+        except Exception as e:
+            groups = txn_groups(entries)
+            if is_transient(e) or len(groups) == 1:
+                return self.push_failed(entries, e)
+            error = None
+            for group in groups:
+                try:
+                    self.push(group)
+                except Exception as e:
+                    error = self.push_failed(group, e) or error
+                    if is_transient(e):
+                        break
+                else:
+                    self.journal.remove([entry[0] for entry in group])
+            return error
+        self.journal.remove([entry[0] for entry in entries])
+        return None
+
+    def push_failed(self, entries, error):
+        seqs = [entry[0] for entry in entries]
+        if is_already_applied(error):
+            # A replay of a txn whose earlier commit landed but was never acknowledged
+            self.journal.remove(seqs)
+            metrics.record("sync.already_applied", rows=len(entries))
+            return None
+        if is_not_found(error):
+            # An update of a job deleted elsewhere: nothing left to apply it to
+            self.journal.remove(seqs)
+            metrics.record("sync.dropped_not_found", rows=len(entries))
+            return None
+        self.journal.record_failure(seqs, error, counted=not is_transient(error))
+        return error
+
+    @metrics.instrumented("sync.push")
+    def push(self, entries):
+        """Commit entries in one WriteBatch, or in one transaction if they carry history events.
+
+        History events need the jobs as stored, so their versions follow the
+        order the server applied the writes in, whichever terminal made them.
+        """
+        metrics.add(rows=len(entries))
+        jobs = [doc_id for _, _, doc_id, op, _, _ in entries if op == "history"]
+        if not jobs:
+            batch = self.client.batch()
+            self.write(batch, entries, {})
+            batch.commit()
+            return
+        refs = [self.client.collection("logs").document(doc_id) for doc_id in dict.fromkeys(jobs)]
+
+        metrics.note_query(f"get {len(refs)} logs in a transaction")
+
+        @self.transactional
+        def apply(transaction):
+            stored = {snapshot.id: snapshot.to_dict() if snapshot.exists else None
+                      for snapshot in self.client.get_all(refs, transaction=transaction)}
+            metrics.add(reads=len(refs))
+            self.write(transaction, entries, stored)
+        apply(self.client.transaction())
+
+    def write(self, batch, entries, jobs):
+        """Add entries to a batch or transaction. `jobs` maps the doc id of each job
+        with a history entry to its stored data (None if missing)."""
+        markers = {}
+        for group in txn_groups(entries):
+            history = {doc_id: data for _, _, doc_id, op, data, _ in group if op == "history"}
+            for seq, collection, doc_id, op, data, txn in group:
+                if op in ("increment", "history") and txn is not None:
+                    markers.setdefault(txn, seq)
+                if op == "history":
+                    continue
+                ref = self.client.collection(collection).document(doc_id)
+                if collection == "logs" and doc_id in history:
+                    old = jobs[doc_id]
+                    new = None if op == "delete" else data if op == "set" else {**(old or {}), **data}
+                    event = history_event(doc_id, old, new, history[doc_id]["at"])
+                    if event:
+                        batch.set(self.client.collection(history_path(doc_id)).document(history[doc_id]["id"]), event)
+                        if new is not None:
+                            data = {**data, HISTORY_VERSION: event["version"]}
+                            new = {**new, HISTORY_VERSION: event["version"]}
+                    jobs[doc_id] = new
+                if op == "set":
+                    batch.set(ref, data)
+                elif op == "update":
+                    batch.update(ref, data)
+                elif op == "delete":
+                    batch.delete(ref)
+                elif op == "increment":
+                    fields = dict(data.get("set", {}))
+                    fields.update({name: self.increment(amount) for name, amount in data["increment"].items()})
+                    batch.set(ref, fields, merge=True)
+        for txn, seq in markers.items():
+            # Keyed by the txn's first seq in this push too, so a txn too big for one batch
+            # gets a marker per part
+            marker = self.client.collection(APPLIED_COLLECTION).document(f"{txn}-{seq}")
+            batch.create(marker, {"applied_at": datetime.now()})
+
+
+# --------------------------
+# Report counters
+# --------------------------
+# One document per (month, technician, status) in `report_counters` holding a
+# job count. Every journalled job write carries the counter increments it
+# implies, so the Reports window reads a few hundred small documents instead
+# of every job. Unlike the other journal entries an increment is not
+# replay-safe, so JournalSyncer.push creates a marker document in
+# `applied_txns` for each txn carrying increments, in the same batch. A batch
+# resent after a timeout or crash whose commit had in fact landed then fails
+# with AlreadyExists as a whole and is dropped instead of counting twice.
+# Markers are never read; give `applied_at` a TTL policy to expire them.
+# `report_totals` rolls the same counts up per (technician, status), so the
+# Reports window reads the latest REPORT_MONTHS months of counters plus one
+# document per technician and status, however long the history gets.
+COUNTERS_COLLECTION = "report_counters"
+COUNTER_FIELDS = ("month", "technician", "status")
+TOTALS_COLLECTION = "report_totals"
+TOTAL_FIELDS = ("technician", "status")
+APPLIED_COLLECTION = "applied_txns"
+COUNTERS_VERSION = 2  # counters/report_counters "version" once seeded with report_totals
+
+
+def summary_key(data):
+    parsed = worklog_db.parse_date(data.get("date", ""))
+    return (parsed.strftime("%Y-%m") if parsed else "", data.get("technician") or "", data.get("status") or "")
+
+
+def counter_doc_id(key):
+    return "|".join(part.replace("/", "_") for part in key)
+
+
+def counter_writes(changes):
+    """Journal writes that move jobs between counters and totals for (old, new) data pairs.
+
+    Pass None as old for a new job and as new for a deleted one. Changes that
+    land in the same counter are merged, so a bulk edit costs one write per
+    counter touched.
+    """
+    deltas = {}
+    for old, new in changes:
+        if old is not None:
+            key = summary_key(old)
+            deltas[key] = deltas.get(key, 0) - 1
+        if new is not None:
+            key = summary_key(new)
+            deltas[key] = deltas.get(key, 0) + 1
+    totals = {}
+    for key, delta in deltas.items():
+        totals[key[1:]] = totals.get(key[1:], 0) + delta
+    return [(collection, counter_doc_id(key), "increment",
+             {"set": dict(zip(fields, key)), "increment": {"jobs": delta}})
+            for collection, fields, counts in ((COUNTERS_COLLECTION, COUNTER_FIELDS, deltas),
+                                               (TOTALS_COLLECTION, TOTAL_FIELDS, totals))
+            for key, delta in counts.items() if delta]
+
+
+def counter_rows(docs, fields=COUNTER_FIELDS):
+    """(*fields, jobs) rows for worklog_db.build_reports."""
+    rows = []
+    for doc in docs:
+        data = doc.to_dict() or {}
+        if data.get("jobs"):
+            rows.append((*(data.get(field, "") for field in fields), data["jobs"]))
+    return rows
+
+
+def seed_report_counters(client):
+    """Migration: build the counters and totals from one scan of `logs` (absolute values).
+
+    Jobs written while the scan runs may be counted wrongly; run it from a
+    quiet terminal. Marks counters/report_counters as seeded when done.
+    """
+    counts = {}
+    for doc in stream_counted(client.collection("logs").select(["date", "technician", "status"])):
+        key = summary_key(doc.to_dict() or {})
+        counts[key] = counts.get(key, 0) + 1
+    totals = {}
+    for key, jobs in counts.items():
+        totals[key[1:]] = totals.get(key[1:], 0) + jobs
+    for name, fields, values in ((COUNTERS_COLLECTION, COUNTER_FIELDS, counts), (TOTALS_COLLECTION, TOTAL_FIELDS, totals)):
+        collection = client.collection(name)
+        wanted = {counter_doc_id(key) for key in values}
+        delete_documents(client, collection,
+                         [doc.id for doc in stream_counted(collection.select([])) if doc.id not in wanted])
+        items = list(values.items())
+        for start in range(0, len(items), BATCH_LIMIT):
+            batch = client.batch()
+            for key, jobs in items[start:start + BATCH_LIMIT]:
+                batch.set(collection.document(counter_doc_id(key)), {**dict(zip(fields, key)), "jobs": jobs})
+            batch.commit()
+    client.collection("counters").document("report_counters").set({"seeded": True, "version": COUNTERS_VERSION})
+
+
+def ensure_report_counters(client):
+    """Seed the counters and totals unless a seed of the current version exists."""
+    marker = get_document(client.collection("counters").document("report_counters"))
+    if (marker.to_dict() or {}).get("version", 0) < COUNTERS_VERSION:
+        seed_report_counters(client)
+
+
+def load_report_rows(client, months=worklog_db.REPORT_MONTHS):
+    """(counter rows, total rows) for worklog_db.build_reports, seeding on first use.
+
+    Only counters for the latest `months` months are read.
+    """
+    ensure_report_counters(client)
+    since = worklog_db.report_since(months=months)
+    rows = counter_rows(stream_counted(client.collection(COUNTERS_COLLECTION).where("month", ">=", since)))
+    return rows, counter_rows(stream_counted(client.collection(TOTALS_COLLECTION)), TOTAL_FIELDS)
+
+
+# --------------------------
+# Dashboard stats
+# --------------------------
+# Shop-wide counts come from server-side count()/sum() aggregation queries,
+# which cost one read per 1000 index entries matched instead of one per
+# document. Per-technician open counts come from the report_totals rollup and
+# completions from one count() per technician, so a busy day costs no more
+# than a quiet one. "Completed today" counts jobs by `completed_on`, the day
+# their status last became Complete (set by completion_fields; jobs completed
+# before it existed have none). Each result is cached for STATS_TTL seconds;
+# call invalidate() after a write. Equality-only filters need no composite
+# indexes.
+STATS_TTL = 60  # seconds
+OPEN_STATUSES = ("Pending", "In Progress")
+COMPLETED_ON = "completed_on"
+
+
+def completion_fields(writes, olds, today=None):
+    """Set or clear `completed_on` in place in (doc_id, op, data) job writes whose status changes.
+
+    `olds` are the jobs' data before each write (None if new or unknown).
+    """
+    today = today or date.today().strftime("%Y-%m-%d")
+    for (doc_id, op, data), old in zip(writes, olds):
+        if op == "delete" or "status" not in data:
+            continue
+        was_complete = (old or {}).get("status") == "Complete"
+        if data["status"] == "Complete" and not was_complete:
+            data[COMPLETED_ON] = today
+        elif data["status"] != "Complete" and was_complete:
+            data[COMPLETED_ON] = None
+
+
+def aggregate_value(query):
+    """Single value of an aggregation query (0 when nothing matched a sum)."""
+    return query.get()[0][0].value or 0
+
+
+class DashboardStats:
+    def __init__(self, client, ttl=STATS_TTL, clock=time.monotonic):
+        self.client = client
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._cache = {}  # key -> (fetched at, value)
+
+    def _cached(self, key, compute):
+        with self._lock:
+            hit = self._cache.get(key)
+        if hit and self.clock() - hit[0] < self.ttl:
+            return hit[1]
+        value = compute()
+        with self._lock:
+            self._cache[key] = (self.clock(), value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _run(self, queries):
+        # Aggregations are independent round trips; run them side by side
+        for query in queries:
+            metrics.note_query(describe_query(query))
+        with ThreadPoolExecutor(max_workers=min(len(queries), 8) or 1) as pool:
+            values = list(pool.map(aggregate_value, queries))
+        # One read per 1000 entries matched (at least one per query); for sum() the
+        # matched counter documents are fewer than the jobs summed, so this is an upper bound
+        metrics.add(reads=sum(1 + int(value) // 1000 for value in values))
+        return values
+
+    def totals(self, today=None):
+        """{"pending", "in_progress", "completed_today", "completed_month"} for the whole shop."""
+        today = today or date.today().strftime("%Y-%m-%d")
+
+        def compute():
+            logs = self.client.collection("logs")
+            queries = [logs.where("status", "==", status).count(alias="jobs") for status in OPEN_STATUSES]
+            queries.append(logs.where(COMPLETED_ON, "==", today).count(alias="jobs"))
+            queries.append(self.client.collection(COUNTERS_COLLECTION).where("month", "==", today[:7])
+                           .where("status", "==", "Complete").sum("jobs", alias="jobs"))
+            values = self._run(queries)
+            return dict(zip(("pending", "in_progress", "completed_today", "completed_month"), values))
+        return self._cached(("totals", today), compute)
+
+    def by_technician(self, names, today=None):
+        """{name: (pending, in progress, completed today)}: the open totals plus a completions count each."""
+        today = today or date.today().strftime("%Y-%m-%d")
+        names = tuple(names)
+
+        def compute():
+            ensure_report_counters(self.client)
+            open_jobs = {}
+            totals = self.client.collection(TOTALS_COLLECTION).where("status", "in", list(OPEN_STATUSES))
+            for technician, status, jobs in counter_rows(stream_counted(totals), TOTAL_FIELDS):
+                open_jobs[technician, status] = jobs
+            logs = self.client.collection("logs")
+            completed = self._run([logs.where("technician", "==", name).where(COMPLETED_ON, "==", today)
+                                   .count(alias="jobs") for name in names])
+            return {name: (*(open_jobs.get((name, status), 0) for status in OPEN_STATUSES), done)
+                    for name, done in zip(names, completed)}
+        return self._cached(("technicians", today, names), compute)
+
+
+# --------------------------
+# Job history
+# --------------------------
+# Every journalled job write also appends an event to logs/<id>/history with
+# only the fields that changed ({"field": [old, new]}), so deleting a job
+# keeps its trail. Every HISTORY_SNAPSHOT_EVERY-th event of a job carries its
+# full state and snapshot=True; job_state_at() then reads one snapshot plus
+# the events after it. Needs a composite index on history (snapshot, at) and,
+# for history_by_technician(), a collection-group index on (technician, at).
+# The journal holds only a placeholder per event: JournalSyncer.push reads the
+# job inside the transaction that writes it, diffs against that and takes the
+# next version from its stored history_version. Terminals writing the same
+# job at once therefore get consecutive versions in commit order, and a
+# terminal that never cached the job still records only what it changed.
+HISTORY_COLLECTION = "history"
+HISTORY_FIELDS = ("jobnum", "vehicle_label", "vehicle_id", "technician", "status", "date", "description")
+HISTORY_VERSION = "history_version"  # stored on the job, read back when the next event is pushed
+HISTORY_SNAPSHOT_EVERY = worklog_db.HISTORY_SNAPSHOT_EVERY
+
+
+def history_path(doc_id):
+    return f"logs/{doc_id}/{HISTORY_COLLECTION}"
+
+
+def history_timestamp():
+    """Local time in the same text format as the SQLite history."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def history_writes(doc_ids, at=None):
+    """Journal entries adding a history event for each job written in the same txn.
+
+    The event itself is worked out when the txn is pushed (see history_event),
+    against the job as stored in Firestore rather than this terminal's copy.
+    """
+    at = at or history_timestamp()
+    return [("logs", doc_id, "history", {"at": at, "id": new_doc_id()}) for doc_id in doc_ids]
+
+
+def history_event(doc_id, old, new, at):
+    """The history event for a job going from `old` to `new` (None if absent), or None if
+    no tracked field changed. The version follows the `history_version` stored on `old`."""
+    old, new = old or {}, new or {}
+    changes = {field: [old.get(field), new.get(field)]
+               for field in HISTORY_FIELDS if old.get(field) != new.get(field)}
+    if not changes and new:
+        return None
+    op = "delete" if not new else "update" if old else "create"
+    version = old.get(HISTORY_VERSION, 0) + 1
+    event = {"at": at, "op": op, "version": version, "job": doc_id,
+             "technician": (new or old).get("technician"), "changes": changes}
+    if new and version % HISTORY_SNAPSHOT_EVERY == 0:
+        event["snapshot"] = True
+        event["state"] = {field: new.get(field) for field in HISTORY_FIELDS}
+    return event
+
+
+def job_history(client, doc_id):
+    """History events (dicts) for one job, oldest first."""
+    return [doc.to_dict() for doc in stream_counted(client.collection(history_path(doc_id)).order_by("version"))]
+
+
+def job_state_at(client, doc_id, at):
+    """A job's tracked fields as they were at `at` ('YYYY-MM-DD[ HH:MM:SS]'), or None."""
+    history = client.collection(history_path(doc_id))
+    snapshots = list(stream_counted(history.where("snapshot", "==", True).where("at", "<=", at)
+                                    .order_by("at", direction=DESCENDING).limit(1)))
+    state, query = None, history.where("at", "<=", at)
+    if snapshots:
+        snapshot = snapshots[0].to_dict()
+        state = snapshot["state"]
+        query = query.where("at", ">", snapshot["at"])
+    # Replayed in version (commit) order; `at` is the writing terminal's clock
+    for event in sorted((doc.to_dict() for doc in stream_counted(query.order_by("at"))), key=itemgetter("version")):
+        state = worklog_db.apply_history(state, event["op"], event["changes"])
+    return state
+
+
+def history_by_technician(client, technician, since, until=None):
+    """History events for one technician's jobs from `since`, oldest first (a collection-group query).
+
+    Each event's "job" is the job's document id.
+    """
+    query = client.collection_group(HISTORY_COLLECTION).where("technician", "==", technician).where("at", ">=", since)
+    if until:
+        query = query.where("at", "<", until)
+    return [doc.to_dict() for doc in stream_counted(query.order_by("at"))]
@@ -1,46 +1,109 @@
+import time
+_started = time.perf_counter()  # startup trace origin, taken before the other imports
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from tkcalendar import DateEntry
-from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
+from datetime import datetime, timedelta
 import os
+import sys
 import csv
+import heapq
+import metrics
+from tasks import TaskRunner
+from diagnostics import DiagnosticsWindow
+from firestore_store import (Vehicle, vehicle_from_data, JobRecord, LogPager, LOG_PAGE_SIZE, CollectionCache, log_cache_cutoff, log_order_key, delete_documents, JobNumberAllocator, provisional_jobnum,
+                             WriteJournal, JournalSyncer, new_doc_id, counter_writes, history_writes, job_history, load_report_rows,
+                             job_state_at, history_by_technician, HISTORY_FIELDS,
+                             DashboardStats, STATS_TTL, completion_fields, get_document, stream_counted)
+from worklog_db import build_reports, describe_changes, REPORT_MONTHS
+from worklog_db import STATUSES
+from view_model import SortedTreeRows, PickerIndex
+_imported = time.perf_counter()
 
 # --------------------------
 # Firebase Setup
 # --------------------------
+# firebase_admin takes seconds to import and the client does network setup,
+# so both happen on a worker thread once the window is already up.
 SERVICE_ACCOUNT_PATH = "serviceAccount.json"
-if not os.path.exists(SERVICE_ACCOUNT_PATH):
-    raise FileNotFoundError(f"Firebase service account file not found at: {SERVICE_ACCOUNT_PATH}")
+db = None
 
-cred = credentials.Certificate(SERVICE_ACCOUNT_PATH)
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
 
-db = firestore.client()
+def connect_firestore():
+    global db
+    if db is None:
+        if not os.path.exists(SERVICE_ACCOUNT_PATH):
+            raise FileNotFoundError(f"Firebase service account file not found at: {SERVICE_ACCOUNT_PATH}")
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(SERVICE_ACCOUNT_PATH))
+        db = firestore.client()
+    return db
 
 # --------------------------
-# Models
+# Startup trace (--startup-trace)
 # --------------------------
-class Vehicle:
-    def __init__(self, make: str, model: str, registration: str, year: str, doc_id: str = None):
-        self.make = (make or "").strip()
-        self.model = (model or "").strip()
-        self.registration = (registration or "").strip().upper()
-        self.year = (year or "").strip()
-        self.doc_id = doc_id
-
-    @property
-    def label(self) -> str:
-        parts = [p for p in (self.make, self.model) if p]
-        label_left = " ".join(parts) if parts else "Unknown"
-        reg_part = f"({self.registration})" if self.registration else ""
-        year_part = f"{self.year}" if self.year else ""
-        return " ".join([label_left, reg_part, year_part]).strip()
-
-    def __repr__(self):
-        return f"<Vehicle {self.label}>"
+class StartupTrace:
+    MILESTONES = ("window shown","firestore connected","vehicles loaded","technicians loaded",
+                  "recent jobs loaded","job number ready")
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.marks = {}
+        self.reported = False
+        self.mark("imports done",_imported)
+
+    def mark(self,name,at=None):
+        """Record seconds since start for a milestone (first time only)."""
+        if not self.enabled or name in self.marks:
+            return
+        self.marks[name] = (at or time.perf_counter()) - _started
+        if all(m in self.marks for m in self.MILESTONES):
+            self.report()
+
+    def report(self):
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print("Startup trace (seconds since process start):",file=sys.stderr)
+        for name, seconds in sorted(self.marks.items(),key=lambda item:item[1]):
+            print(f"  {seconds:8.3f}  {name}",file=sys.stderr)
+        missing = [m for m in self.MILESTONES if m not in self.marks]
+        if missing:
+            print(f"  not reached: {', '.join(missing)}",file=sys.stderr)
+
+# --------------------------
+# Type-to-filter picker
+# --------------------------
+class PickerCombobox(ttk.Combobox):
+    """Editable Combobox listing the best PickerIndex matches for what has been typed.
+
+    Matches are looked up per keystroke and when the list opens, never built
+    for the whole collection. Return picks the first match.
+    """
+    def __init__(self, parent, index, **kwargs):
+        super().__init__(parent, postcommand=self.show_matches, **kwargs)
+        self.index = index
+        self.bind("<KeyRelease>", self.on_key)
+        self.bind("<Return>", self.pick_first)
+        self.bind("<FocusIn>", lambda e: self.select_range(0, "end"))
+
+    def show_matches(self):
+        self["values"] = self.index.search(self.get())
+
+    def on_key(self, event):
+        if event.keysym not in ("Up", "Down", "Return", "Escape", "Tab"):
+            self.show_matches()
+
+    def pick_first(self, event=None):
+        if self.get() in self.index:
+            return
+        matches = self.index.search(self.get(), limit=1)
+        if matches:
+            self.set(matches[0])
+            self.icursor("end")
+            self.event_generate("<<ComboboxSelected>>")
 
 # --------------------------
 # Reusable Popups
@@ -102,7 +165,7 @@ class TechnicianPopup(BasePopup):
         self.destroy()
 
 class JobPopup(BasePopup):
-    def __init__(self, parent, vehicles, technicians, job_data=None, callback=None):
+    def __init__(self, parent, vehicles, technicians, vehicle_search, tech_search, job_data=None, callback=None):
         super().__init__(parent, "Edit Job" if job_data else "Add Job", 400, 450)
         self.vehicles = vehicles
         self.technicians = technicians
@@ -117,22 +180,20 @@ class JobPopup(BasePopup):
         # Vehicle
         tk.Label(self, text="Vehicle:").pack(anchor="w", padx=10, pady=(10,0))
         self.vehicle_var = tk.StringVar(value=job_data.get("vehicle_label") if job_data else "")
-        self.vehicle_dropdown = ttk.Combobox(self, textvariable=self.vehicle_var,
-                                             values=list(self.vehicles.keys()), state="readonly")
+        self.vehicle_dropdown = PickerCombobox(self, vehicle_search, textvariable=self.vehicle_var)
         self.vehicle_dropdown.pack(fill="x", padx=10)
 
         # Technician
         tk.Label(self, text="Technician:").pack(anchor="w", padx=10, pady=(10,0))
         self.tech_var = tk.StringVar(value=job_data.get("technician") if job_data else "")
-        self.tech_dropdown = ttk.Combobox(self, textvariable=self.tech_var,
-                                          values=self.technicians, state="readonly")
+        self.tech_dropdown = PickerCombobox(self, tech_search, textvariable=self.tech_var)
         self.tech_dropdown.pack(fill="x", padx=10)
 
         # Status
         tk.Label(self, text="Status:").pack(anchor="w", padx=10, pady=(10,0))
         self.status_var = tk.StringVar(value=job_data.get("status") if job_data else "Pending")
         self.status_dropdown = ttk.Combobox(self, textvariable=self.status_var,
-                                            values=["Pending","In Progress","Complete"], state="readonly")
+                                            values=list(STATUSES), state="readonly")
         self.status_dropdown.pack(fill="x", padx=10)
 
         # Date
@@ -161,6 +222,9 @@ class JobPopup(BasePopup):
         if not jobnum or not vehicle_label or not technician:
             messagebox.showerror("Error","Please fill all required fields")
             return
+        if technician not in self.technicians:
+            messagebox.showerror("Error","Technician not found")
+            return
 
         if self.callback:
             self.callback({
@@ -180,26 +244,139 @@ class JobPopup(BasePopup):
 # Main App
 # --------------------------
 class WorkLogApp:
-    def __init__(self, root):
+    def __init__(self, root, trace=None):
         self.root = root
         self.root.title("Work Log App")
         self.root.geometry("900x400")
-
-        self.jobnum_input = tk.StringVar(value=self.get_next_jobnum())
+        self.trace = trace or StartupTrace()
+
+        # Every Firestore call runs on this pool; results come back via root.after
+        self.activity_var = tk.StringVar()
+        self.tasks = TaskRunner(self.root, on_busy=self.show_busy)
+
+        # Job writes land in a local journal first and sync to Firestore in the background
+        self.sync_var = tk.StringVar()
+        self.journal = WriteJournal()
+        self.jobnum_allocator = None  # these need the Firestore client (see on_connected)
+        self.syncer = None
+        self.stats = None
+        self.badge_var = tk.StringVar()
+        self.jobnum_input = tk.StringVar()
+        self.jobnum_note = tk.StringVar()
         self.vehicle_var = tk.StringVar()
         self.tech_var = tk.StringVar(value="Select...")
         self.status_var = tk.StringVar(value="Pending")
         self.date_var = tk.StringVar(value=datetime.today().strftime("%Y-%m-%d"))
 
         self.vehicles = {}  # label -> Vehicle
+        self.vehicle_labels = {}  # doc id -> label
         self.tech_list = []
+        self.tech_ids = {}  # name -> doc id
+        self.vehicle_search = PickerIndex()  # what the pickers match typed text against
+        self.tech_search = PickerIndex()
 
-        self.load_vehicles()
-        self.load_technicians()
+        # Live caches: one full read once connected, then only changed documents
+        self.log_cache_cutoff = log_cache_cutoff()
+        self.vehicle_cache = self.tech_cache = self.log_cache = None
+        self.paged_jobs = {}  # doc id -> JobRecord for jobs older than the cache window
 
+        # The form is shown straight away; dropdowns fill in as the first snapshots arrive
         self.create_input_section()
         self.create_buttons()
         self.job_logs_window = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.show_pending(self.journal.count())
+        self.save_button.config(state="disabled")
+        self.sync_var.set("Connecting to Firestore…")
+        self.root.after_idle(lambda: self.trace.mark("window shown"))
+        self.tasks.submit(connect_firestore, on_done=self.on_connected, op="startup.connect",
+                          on_error=lambda e: messagebox.showerror("Error",f"Failed to connect to Firestore: {e}"))
+
+    def on_connected(self,client):
+        self.trace.mark("firestore connected")
+        self.jobnum_allocator = JobNumberAllocator(client,path=self.journal.path)
+        self.syncer = JournalSyncer(self.journal, client,
+                                    on_change=lambda n: self.root.after(0, lambda: self.sync_changed(n)))
+
+        self.vehicle_cache = CollectionCache(client.collection("vehicles"),name="vehicles")
+        self.tech_cache = CollectionCache(client.collection("technicians"),name="technicians")
+        self.log_cache = CollectionCache(client.collection("logs").where("date", ">=", self.log_cache_cutoff),
+                                         record=JobRecord,name="recent_logs")
+        self.vehicle_cache.subscribe(lambda changes: self.root.after(0, lambda: self.apply_vehicle_changes(changes)))
+        self.tech_cache.subscribe(lambda changes: self.root.after(0, self.refresh_technicians))
+        self.log_cache.subscribe(lambda changes: self.root.after(0, lambda: self.trace.mark("recent jobs loaded")))
+
+        self.show_pending(self.journal.count())
+        self.stats = DashboardStats(client)
+        self.refresh_badges()
+        self.syncer.start()
+        self.tasks.submit(self.start_caches,op="startup.caches",
+                          on_error=lambda e: messagebox.showerror("Error",f"Failed to connect to Firestore: {e}"))
+        self.get_next_jobnum()
+
+    def connected(self):
+        if db is None or self.log_cache is None:
+            messagebox.showinfo("Connecting","Still connecting to Firestore, please try again in a moment")
+            return False
+        return True
+
+    def start_caches(self):
+        for cache in (self.vehicle_cache, self.tech_cache, self.log_cache):
+            cache.start()
+
+    def on_close(self):
+        if self.syncer:
+            self.syncer.stop()
+        self.tasks.shutdown()
+        for cache in (self.vehicle_cache, self.tech_cache, self.log_cache):
+            if cache:
+                cache.stop()
+        self.trace.report()
+        self.root.destroy()
+
+    def show_busy(self,count):
+        self.activity_var.set(f"Working… ({count} pending)" if count else "")
+
+    def sync_changed(self,count):
+        self.show_pending(count)
+        if not count and self.stats:
+            # Everything written is in Firestore now, so fresh counts include it
+            self.stats.invalidate()
+            self.refresh_badges()
+
+    def show_pending(self,count):
+        text = f"Unsynced changes: {count}" if count else "All changes synced"
+        error = self.syncer.last_error if self.syncer else None
+        if count and error is not None:
+            message = str(error).splitlines()[0] if str(error) else type(error).__name__
+            text += f" (last error: {message[:120]})"
+        failed = self.journal.failed_count()
+        if failed:
+            text += f" — {failed} failed write(s) set aside in {self.journal.path}"
+        self.sync_var.set(text)
+
+    def journal_write(self,doc_id,op,data=None,old=None):
+        self.journal_write_many([(doc_id,op,data)],[old])
+
+    def journal_write_many(self,writes,olds=None):
+        # A local disk commit; the syncer pushes it to Firestore when it can,
+        # at most 500 operations per WriteBatch. `olds` are the jobs' data
+        # before each write (None if new or unknown). Each job is its own
+        # journal txn with the report counter moves and history event it
+        # implies, so a job deleted on another terminal drops only its own txn.
+        olds = olds or [None]*len(writes)
+        completion_fields(writes,olds)
+        txns = []
+        for (doc_id,op,data),old in zip(writes,olds):
+            changes = [(old,None if op == "delete" else {**(old or {}),**data})] if old is not None or op == "set" else []
+            txns.append([("logs",doc_id,op,data)] + counter_writes(changes) + history_writes([doc_id]))
+        self.journal.enqueue_txns(txns)
+        if self.stats:
+            self.stats.invalidate()
+        self.show_pending(self.journal.count())
+        if self.syncer:
+            self.syncer.notify()
 
     # --------------------------
     # UI
@@ -210,21 +387,20 @@ class WorkLogApp:
 
         tk.Label(frame, text="Job Number:").grid(row=0,column=0,padx=5,pady=5,sticky="w")
         tk.Entry(frame,textvariable=self.jobnum_input,width=20).grid(row=0,column=1,padx=5,pady=5)
+        tk.Label(frame,textvariable=self.jobnum_note,fg="gray").grid(row=2,column=2,columnspan=2,padx=5,sticky="w")
 
         tk.Label(frame,text="Vehicle:").grid(row=0,column=2,padx=5,pady=5,sticky="w")
-        self.vehicle_dropdown = ttk.Combobox(frame,textvariable=self.vehicle_var,
-                                             values=list(self.vehicles.keys()), state="readonly",width=30)
+        self.vehicle_dropdown = PickerCombobox(frame,self.vehicle_search,textvariable=self.vehicle_var,width=30)
         self.vehicle_dropdown.grid(row=0,column=3,padx=5,pady=5)
         self.vehicle_dropdown.bind("<<ComboboxSelected>>", self.vehicle_dropdown_selected)
 
         tk.Label(frame,text="Technician:").grid(row=1,column=0,padx=5,pady=5,sticky="w")
-        self.tech_dropdown = ttk.Combobox(frame,textvariable=self.tech_var,
-                                          values=self.tech_list, state="readonly",width=18)
+        self.tech_dropdown = PickerCombobox(frame,self.tech_search,textvariable=self.tech_var,width=18)
         self.tech_dropdown.grid(row=1,column=1,padx=5,pady=5)
 
         tk.Label(frame,text="Status:").grid(row=1,column=2,padx=5,pady=5,sticky="w")
         self.status_dropdown = ttk.Combobox(frame,textvariable=self.status_var,
-                                            values=["Pending","In Progress","Complete"],state="readonly",width=18)
+                                            values=list(STATUSES),state="readonly",width=18)
         self.status_dropdown.grid(row=1,column=3,padx=5,pady=5)
 
         tk.Label(frame,text="Date:").grid(row=2,column=0,padx=5,pady=5,sticky="w")
@@ -237,34 +413,52 @@ class WorkLogApp:
     def create_buttons(self):
         frame = tk.Frame(self.root)
         frame.pack(pady=10)
-        tk.Button(frame,text="Save Job",command=self.save_job).grid(row=0,column=0,padx=5)
+        self.save_button = tk.Button(frame,text="Save Job",command=self.save_job)
+        self.save_button.grid(row=0,column=0,padx=5)
         tk.Button(frame,text="Reset",command=self.reset_form).grid(row=0,column=1,padx=5)
         tk.Button(frame,text="View Job Logs",command=self.view_job_logs).grid(row=0,column=2,padx=5)
         tk.Button(frame,text="Manage Vehicles",command=self.manage_vehicles).grid(row=0,column=3,padx=5)
         tk.Button(frame,text="Manage Technicians",command=self.manage_technicians).grid(row=0,column=4,padx=5)
+        tk.Button(frame,text="Reports",command=self.view_reports).grid(row=0,column=5,padx=5)
+        tk.Button(frame,text="Dashboard",command=self.view_dashboard).grid(row=0,column=6,padx=5)
+        tk.Button(frame,text="Diagnostics",command=lambda:DiagnosticsWindow(self.root)).grid(row=0,column=7,padx=5)
+        tk.Label(self.root,textvariable=self.badge_var,anchor="w").pack(fill="x",padx=10)
+        tk.Label(self.root,textvariable=self.activity_var,anchor="w",fg="gray").pack(fill="x",padx=10)
+        tk.Label(self.root,textvariable=self.sync_var,anchor="w",fg="gray").pack(fill="x",padx=10)
 
     # --------------------------
     # Data Load
     # --------------------------
-    def load_vehicles(self):
-        self.vehicles.clear()
-        try:
-            for doc in db.collection("vehicles").stream():
-                data = doc.to_dict() or {}
-                v = Vehicle(data.get("make",""),data.get("model",""),data.get("registration",""),str(data.get("year","")), doc.id)
-                self.vehicles[v.label] = v
-        except Exception as e:
-            messagebox.showerror("Error",f"Failed to load vehicles: {e}")
+    def apply_vehicle_changes(self,changes):
+        # Only the changed vehicles are touched, in self.vehicles (which
+        # ManageWindow holds a reference to) and in the picker index
+        added = []
+        for kind, doc_id, data in changes:
+            label = self.vehicle_labels.pop(doc_id,None)
+            if label is not None and getattr(self.vehicles.get(label),"doc_id",doc_id) == doc_id:
+                self.vehicles.pop(label,None)
+                self.vehicle_search.remove(label)
+            if kind != "REMOVED":
+                vehicle = vehicle_from_data(doc_id,data)
+                self.vehicles[vehicle.label] = vehicle
+                self.vehicle_labels[doc_id] = vehicle.label
+                added.append((vehicle.label,vehicle.registration))
+        self.vehicle_search.add_many(added)
+        self.trace.mark("vehicles loaded")
 
     def load_technicians(self):
         self.tech_list.clear()
-        try:
-            for doc in db.collection("technicians").stream():
-                name = doc.to_dict().get("name")
-                if name:
-                    self.tech_list.append(name)
-        except Exception as e:
-            messagebox.showerror("Error",f"Failed to load technicians: {e}")
+        self.tech_ids.clear()
+        for doc_id, data in self.tech_cache.items():
+            name = data.get("name")
+            if name:
+                self.tech_list.append(name)
+                self.tech_ids[name] = doc_id
+        self.tech_search.replace((name,) for name in self.tech_list)
+        self.trace.mark("technicians loaded")
+
+    def refresh_technicians(self):
+        self.load_technicians()
 
     # --------------------------
     # Save Job
@@ -285,34 +479,57 @@ class WorkLogApp:
         if not vehicle:
             messagebox.showerror("Error","Vehicle not found")
             return
+        if technician not in self.tech_ids:
+            messagebox.showerror("Error","Technician not found")
+            return
 
+        data = {
+            "jobnum": jobnum,
+            "vehicle_label": vehicle.label,
+            "vehicle_id": vehicle.doc_id,
+            "technician": technician,
+            "status": status,
+            "date": date,
+            "description": description
+        }
         try:
-            db.collection("logs").add({
-                "jobnum": jobnum,
-                "vehicle_label": vehicle.label,
-                "vehicle_id": vehicle.doc_id,
-                "technician": technician,
-                "status": status,
-                "date": date,
-                "description": description
-            })
-            messagebox.showinfo("Saved","Job saved successfully")
-            self.jobnum_input.set(self.get_next_jobnum())
-            self.reset_form()
+            doc_id = new_doc_id()
+            with metrics.timed("form.save_job"):
+                self.journal_write(doc_id,"set",data)
         except Exception as e:
             messagebox.showerror("Error",f"Failed to save job: {e}")
+            return
+        self.cache_job(doc_id,data)
+        messagebox.showinfo("Saved","Job saved successfully")
+        self.get_next_jobnum()
+        self.reset_form()
 
     # --------------------------
     # Utilities
     # --------------------------
     def get_next_jobnum(self):
-        try:
-            last = list(db.collection("logs").order_by("jobnum",direction=firestore.Query.DESCENDING).limit(1).stream())
-            if last:
-                return str(int(last[0].to_dict().get("jobnum",0))+1)
-            return "1"
-        except:
-            return "1"
+        # Served from the locally reserved numbers; only an empty pool needs Firestore.
+        # Save stays disabled until the number arrives so the previous one can't be saved twice.
+        self.jobnum_input.set("")
+        self.save_button.config(state="disabled")
+        self.tasks.submit(self.jobnum_allocator.next, on_done=self.show_jobnum, on_error=self.jobnum_failed,
+                          op="form.get_next_jobnum")
+
+    def show_jobnum(self,jobnum):
+        self.jobnum_input.set(jobnum)
+        self.save_button.config(state="normal")
+        self.trace.mark("job number ready")
+        # Reserve the next block while numbers are still left, so going offline doesn't block saving
+        self.tasks.submit(self.jobnum_allocator.top_up, on_done=lambda _: self.jobnum_note.set(""),
+                          on_error=lambda e: self.jobnum_note.set(
+                              f"{self.jobnum_allocator.available()} job numbers left offline"),
+                          op="form.reserve_jobnums")
+
+    def jobnum_failed(self,error):
+        # Offline with no reserved numbers left: save under a provisional number instead
+        self.jobnum_input.set(provisional_jobnum())
+        self.save_button.config(state="normal")
+        self.jobnum_note.set(f"Provisional number: could not reserve one ({(str(error) or type(error).__name__).splitlines()[0][:80]})")
 
     def reset_form(self):
         self.vehicle_var.set("")
@@ -325,27 +542,37 @@ class WorkLogApp:
         if self.vehicle_var.get()=="Add new…":
             VehiclePopup(self.root,callback=self.add_vehicle)
 
-    def add_vehicle(self,vehicle):
-        try:
-            doc_ref = db.collection("vehicles").add({
-                "make": vehicle.make,
-                "model": vehicle.model,
-                "registration": vehicle.registration,
-                "year": vehicle.year,
-                "label": vehicle.label,
-                "created_at": datetime.now().replace(microsecond=0)
-            })[0]
+    def add_vehicle(self,vehicle,on_added=None):
+        if not self.connected():
+            return
+        data = {
+            "make": vehicle.make,
+            "model": vehicle.model,
+            "registration": vehicle.registration,
+            "year": vehicle.year,
+            "label": vehicle.label,
+            "created_at": datetime.now().replace(microsecond=0)
+        }
+
+        def added(result):
+            _, doc_ref = result
             vehicle.doc_id = doc_ref.id
+            self.vehicle_cache.put(doc_ref.id, data)
+            self.apply_vehicle_changes([("ADDED",doc_ref.id,data)])  # now, for ManageWindow's refresh
             messagebox.showinfo("Added",f"Vehicle {vehicle.label} added")
-            self.load_vehicles()
             self.vehicle_var.set(vehicle.label)
-        except Exception as e:
-            messagebox.showerror("Error",f"Failed to add vehicle: {e}")
+            if on_added:
+                on_added()
+
+        self.tasks.submit(db.collection("vehicles").add, data, on_done=added, op="manage.add_vehicle",
+                          on_error=lambda e: messagebox.showerror("Error",f"Failed to add vehicle: {e}"))
 
     # --------------------------
     # Job Logs
     # --------------------------
     def view_job_logs(self):
+        if not self.connected():
+            return
         if self.job_logs_window and tk.Toplevel.winfo_exists(self.job_logs_window):
             self.job_logs_window.focus()
             return
@@ -355,11 +582,15 @@ class WorkLogApp:
         self.job_logs_window.geometry("1000x500")
 
         columns = ("jobnum","vehicle_label","technician","status","date","description")
-        tree = ttk.Treeview(self.job_logs_window, columns=columns,show="headings")
+        tree_frame = tk.Frame(self.job_logs_window)
+        tree_frame.pack(fill="both",expand=True,padx=10,pady=10)
+        tree = ttk.Treeview(tree_frame, columns=columns,show="headings",selectmode="extended")
+        scrollbar = ttk.Scrollbar(tree_frame,orient="vertical",command=tree.yview)
         for col in columns:
             tree.heading(col,text=col.replace("_"," ").title())
             tree.column(col,width=150)
-        tree.pack(fill="both",expand=True,padx=10,pady=10)
+        scrollbar.pack(side="right",fill="y")
+        tree.pack(side="left",fill="both",expand=True)
 
         # Buttons
         btn_frame = tk.Frame(self.job_logs_window)
@@ -367,71 +598,308 @@ class WorkLogApp:
 
         tk.Button(btn_frame,text="Edit",command=lambda:self.edit_selected_job(tree)).grid(row=0,column=0,padx=5)
         tk.Button(btn_frame,text="Delete",command=lambda:self.delete_selected_job(tree)).grid(row=0,column=1,padx=5)
-        tk.Button(btn_frame,text="Export CSV",command=lambda:self.export_tree_csv(tree)).grid(row=0,column=2,padx=5)
-
-        # Load jobs
-        for row in tree.get_children():
-            tree.delete(row)
-        try:
-            for doc in db.collection("logs").order_by("date",direction=firestore.Query.DESCENDING).stream():
-                data = doc.to_dict() or {}
-                tree.insert("", "end", iid=doc.id, values=(
-                    data.get("jobnum",""),
-                    data.get("vehicle_label",""),
-                    data.get("technician",""),
-                    data.get("status",""),
-                    data.get("date",""),
-                    data.get("description","")
-                ))
-        except Exception as e:
+        tk.Button(btn_frame,text="Set Status…",
+                  command=lambda:self.bulk_update_popup(tree,"status",STATUSES)).grid(row=0,column=2,padx=5)
+        tk.Button(btn_frame,text="Reassign…",
+                  command=lambda:self.bulk_update_popup(tree,"technician",self.tech_list)).grid(row=0,column=3,padx=5)
+        tk.Button(btn_frame,text="Export CSV",command=lambda:self.export_tree_csv(tree)).grid(row=0,column=4,padx=5)
+        load_all_button = tk.Button(btn_frame,text="Load All",command=lambda:self.load_job_page(tree,load_all=True))
+        load_all_button.grid(row=0,column=5,padx=5)
+        tk.Button(btn_frame,text="History",command=lambda:self.view_job_history(tree)).grid(row=0,column=6,padx=5)
+
+        self.job_logs_status = tk.StringVar(value="Jobs loaded: 0")
+        tk.Label(self.job_logs_window,textvariable=self.job_logs_status,anchor="w").pack(fill="x",padx=10,pady=2)
+
+        # Recent jobs come from the live cache and older ones from Firestore,
+        # both a LOG_PAGE_SIZE page at a time as the user scrolls near the end
+        self.job_pager = LogPager(db.collection("logs").where("date", "<", self.log_cache_cutoff))
+        self.paged_jobs = {}
+        self.job_load_all_button = load_all_button
+        # Saves, edits and deletes change single rows by doc id from here on
+        self.job_rows = SortedTreeRows(tree,descending=True)
+        self.cache_shown_all = False
+        with metrics.timed("view_job_logs.open") as timing:
+            self.show_cached_page()
+            timing.rows = len(self.job_rows)  # from the cache: no Firestore reads
+
+        unsubscribe = self.log_cache.subscribe(
+            lambda changes: self.root.after(0, lambda: self.apply_log_changes(tree, changes)))
+        self.job_logs_window.bind("<Destroy>",
+            lambda e: unsubscribe() if e.widget is self.job_logs_window else None)
+
+        self.job_page_loading = False
+
+        def on_scroll(first,last):
+            scrollbar.set(first,last)
+            if float(last) >= 0.95:
+                self.load_job_page(tree)
+        tree.configure(yscrollcommand=on_scroll)
+
+        if self.cache_shown_all:
+            self.load_job_page(tree)
+
+    @staticmethod
+    def job_row_values(data):
+        return (
+            data.get("jobnum",""),
+            data.get("vehicle_label",""),
+            data.get("technician",""),
+            data.get("status",""),
+            data.get("date",""),
+            data.get("description","")
+        )
+
+    def show_job_row(self,doc_id,data):
+        self.job_rows.upsert(doc_id,self.job_row_values(data),log_order_key(doc_id,data))
+
+    def show_loaded_job(self,doc_id,data):
+        # Only rows inside what has been paged in so far; the rest show up when paging reaches them
+        at_end = self.cache_shown_all and self.job_pager.exhausted
+        if self.job_rows.covers(log_order_key(doc_id,data),at_end=at_end):
+            self.show_job_row(doc_id,data)
+        else:
+            self.job_rows.remove(doc_id)
+
+    def show_cached_page(self,load_all=False):
+        # The next LOG_PAGE_SIZE cached jobs older than the oldest row shown
+        oldest = self.job_rows.order[0] if self.job_rows.order else None
+        items = ((log_order_key(doc_id,data),doc_id,data) for doc_id,data in self.log_cache.items())
+        if oldest is not None:
+            items = (item for item in items if item[0] < oldest)
+        page = sorted(items,key=lambda item: item[0],reverse=True) if load_all else \
+            heapq.nlargest(LOG_PAGE_SIZE + 1,items,key=lambda item: item[0])
+        for _, doc_id, data in page[:None if load_all else LOG_PAGE_SIZE]:
+            self.show_job_row(doc_id,data)
+        self.cache_shown_all = load_all or len(page) <= LOG_PAGE_SIZE
+
+    def job_logs_open(self):
+        return bool(self.job_logs_window and tk.Toplevel.winfo_exists(self.job_logs_window))
+
+    def cache_job(self,doc_id,data):
+        # log_cache only holds jobs inside its listener's window (nothing else would
+        # ever evict them); older jobs are kept with the paged ones
+        if data.get("date","") >= self.log_cache_cutoff:
+            self.paged_jobs.pop(doc_id,None)
+            self.log_cache.put(doc_id,data)
+            return
+        self.log_cache.discard(doc_id)
+        if self.job_logs_open():
+            self.paged_jobs[doc_id] = JobRecord(data)
+            self.show_loaded_job(doc_id,self.paged_jobs[doc_id])
+
+    def apply_log_changes(self,tree,changes):
+        # Apply listener deltas to the open log window row by row
+        if not tree.winfo_exists():
+            return
+        for kind, doc_id, data in changes:
+            if kind == "REMOVED":
+                self.job_rows.remove(doc_id)
+            else:
+                self.show_loaded_job(doc_id,data)
+        self.update_job_status(tree)
+
+    def load_job_page(self,tree,load_all=False):
+        if not self.cache_shown_all:
+            self.show_cached_page(load_all)
+            self.update_job_status(tree)
+            if not load_all:
+                return
+        pager = self.job_pager
+        if pager.exhausted or self.job_page_loading:
+            return
+        self.job_page_loading = True
+
+        def loaded(docs):
+            self.job_page_loading = False
+            for doc in docs:
+                if doc.id in self.job_rows:
+                    continue
+                data = JobRecord(doc.to_dict() or {})
+                self.paged_jobs[doc.id] = data
+                self.show_job_row(doc.id,data)
+            self.update_job_status(tree)
+            if pager.exhausted:
+                self.job_load_all_button.config(state="disabled")
+
+        def failed(e):
+            self.job_page_loading = False
+            self.update_job_status(tree)
             messagebox.showerror("Error",f"Failed to load jobs: {e}")
 
+        self.update_job_status(tree)
+        self.tasks.submit(pager.rest if load_all else pager.next_page,
+                          on_done=loaded, on_error=failed, owner=self.job_logs_window,
+                          op="view_job_logs.load_all" if load_all else "view_job_logs.next_page")
+
+    def update_job_status(self,tree):
+        if self.job_page_loading:
+            more = " (loading…)"
+        else:
+            more = "" if self.cache_shown_all and self.job_pager.exhausted else " (scroll for more)"
+        self.job_logs_status.set(f"Jobs loaded: {len(tree.get_children())}{more}")
+
+    def job_data(self,doc_id):
+        return self.log_cache.get(doc_id) or self.paged_jobs.get(doc_id)
+
     def edit_selected_job(self,tree):
         selected = tree.selection()
         if not selected:
             messagebox.showwarning("Select","Select a job to edit")
             return
         doc_id = selected[0]
-        doc = db.collection("logs").document(doc_id).get()
-        if not doc.exists:
-            messagebox.showerror("Error","Job not found")
-            return
-        JobPopup(self.root,vehicles=self.vehicles,technicians=self.tech_list,job_data=doc.to_dict(),
-                 callback=lambda data:self.update_job(doc_id,data))
+        def open_popup(job_data):
+            JobPopup(self.root,vehicles=self.vehicles,technicians=self.tech_list,vehicle_search=self.vehicle_search,
+                     tech_search=self.tech_search,job_data=job_data,
+                     callback=lambda data:self.update_job(doc_id,data))
+
+        def fetched(doc):
+            if not doc.exists:
+                messagebox.showerror("Error","Job not found")
+                return
+            self.paged_jobs[doc_id] = JobRecord(doc.to_dict())
+            open_popup(self.paged_jobs[doc_id])
+
+        job_data = self.job_data(doc_id)
+        if job_data is not None:
+            open_popup(job_data)
+        else:
+            self.tasks.submit(get_document, db.collection("logs").document(doc_id), on_done=fetched,
+                              op="view_job_logs.edit",
+                              on_error=lambda e: messagebox.showerror("Error",f"Failed to load job: {e}"),
+                              owner=tree.winfo_toplevel())
 
     def update_job(self,doc_id,data):
         vehicle = self.vehicles.get(data["vehicle_label"])
         if not vehicle:
             messagebox.showerror("Error","Vehicle not found")
             return
+        fields = {
+            "jobnum": data["jobnum"],
+            "vehicle_label": vehicle.label,
+            "vehicle_id": vehicle.doc_id,
+            "technician": data["technician"],
+            "status": data["status"],
+            "date": data["date"],
+            "description": data["description"]
+        }
+        old = self.job_data(doc_id)
         try:
-            db.collection("logs").document(doc_id).update({
-                "jobnum": data["jobnum"],
-                "vehicle_label": vehicle.label,
-                "vehicle_id": vehicle.doc_id,
-                "technician": data["technician"],
-                "status": data["status"],
-                "date": data["date"],
-                "description": data["description"]
-            })
-            messagebox.showinfo("Updated","Job updated successfully")
-            self.view_job_logs()
+            with metrics.timed("view_job_logs.update_job"):
+                self.journal_write(doc_id,"update",fields,old=old)
         except Exception as e:
             messagebox.showerror("Error",f"Failed to update job: {e}")
+            return
+        self.cache_job(doc_id,{**(old or {}),**fields})
+        messagebox.showinfo("Updated","Job updated successfully")
+
+    def bulk_update_popup(self,tree,field,choices):
+        selected = tree.selection()
+        if not selected:
+            messagebox.showwarning("Select","Select one or more jobs")
+            return
+        popup = BasePopup(self.root,"Set Status" if field == "status" else "Reassign Jobs",260,120)
+        tk.Label(popup,text=f"New {field} for {len(selected)} job(s):").pack(pady=5)
+        value_var = tk.StringVar()
+        ttk.Combobox(popup,textvariable=value_var,values=list(choices),state="readonly").pack(pady=5)
+
+        def apply():
+            if value_var.get():
+                self.bulk_update_jobs(tree,selected,field,value_var.get())
+                popup.destroy()
+        tk.Button(popup,text="Apply",command=apply).pack(pady=5)
+
+    def bulk_update_jobs(self,tree,doc_ids,field,value):
+        # One journal transaction for the whole selection; synced as WriteBatch commits
+        writes = [(doc_id,"update",{field:value}) for doc_id in doc_ids]
+        try:
+            with metrics.timed(f"view_job_logs.set_{field}"):
+                self.journal_write_many(writes,[self.job_data(doc_id) for doc_id in doc_ids])
+        except Exception as e:
+            messagebox.showerror("Error",f"Failed to update jobs: {e}")
+            return
+        cached = []
+        for doc_id,_,data in writes:
+            if self.log_cache.get(doc_id) is not None:
+                cached.append((doc_id,{**self.log_cache.get(doc_id),**data}))
+            elif doc_id in self.paged_jobs:
+                self.paged_jobs[doc_id] = JobRecord({**self.paged_jobs[doc_id],**data})
+                if tree.winfo_exists():
+                    self.show_job_row(doc_id,self.paged_jobs[doc_id])
+        self.log_cache.put_many(cached)
+        messagebox.showinfo("Updated",f"{len(doc_ids)} job(s) updated")
 
     def delete_selected_job(self,tree):
         selected = tree.selection()
         if not selected:
             messagebox.showwarning("Select","Select a job to delete")
             return
-        doc_id = selected[0]
-        if messagebox.askyesno("Confirm","Delete this job?"):
+        question = "Delete this job?" if len(selected) == 1 else f"Delete {len(selected)} jobs?"
+        if messagebox.askyesno("Confirm",question):
             try:
-                db.collection("logs").document(doc_id).delete()
-                messagebox.showinfo("Deleted","Job deleted")
-                self.view_job_logs()
+                with metrics.timed("view_job_logs.delete"):
+                    self.journal_write_many([(doc_id,"delete",None) for doc_id in selected],
+                                            [self.job_data(doc_id) for doc_id in selected])
             except Exception as e:
                 messagebox.showerror("Error",f"Failed to delete job: {e}")
+                return
+            self.log_cache.discard_many(selected)
+            for doc_id in selected:
+                self.paged_jobs.pop(doc_id,None)
+                self.job_rows.remove(doc_id)
+            self.update_job_status(tree)
+            messagebox.showinfo("Deleted",f"{len(selected)} job(s) deleted")
+
+    def view_job_history(self,tree):
+        selected = tree.selection()
+        if len(selected) != 1:
+            messagebox.showwarning("Select","Select one job to see its history")
+            return
+        doc_id = selected[0]
+        popup = tk.Toplevel(self.root)
+        popup.title(f"History of Job #{tree.set(doc_id,'jobnum')}")
+        popup.geometry("760x300")
+        columns = ("version","at","op","technician","changes")
+        history_tree = ttk.Treeview(popup,columns=columns,show="headings")
+        for col in columns:
+            history_tree.heading(col,text=col.title())
+            history_tree.column(col,width=380 if col == "changes" else 90)
+        history_tree.pack(fill="both",expand=True,padx=10,pady=10)
+
+        def loaded(events):
+            for event in events:
+                history_tree.insert("","end",values=(event.get("version"),event.get("at"),event.get("op"),
+                                                     event.get("technician"),
+                                                     describe_changes(event.get("op"),event.get("changes",{}))))
+
+        self.tasks.submit(job_history,db,doc_id,on_done=loaded,owner=popup,op="view_job_logs.history",
+                          on_error=lambda e: messagebox.showerror("Error",f"Failed to load history: {e}"))
+
+        # The job as it was at a given time: nearest snapshot plus the events after it
+        as_of_frame = tk.Frame(popup)
+        as_of_frame.pack(fill="x",padx=10,pady=(0,10))
+        tk.Label(as_of_frame,text="As of (YYYY-MM-DD HH:MM):").pack(side="left")
+        at_var = tk.StringVar(value=datetime.now().strftime("%Y-%m-%d %H:%M"))
+        tk.Entry(as_of_frame,textvariable=at_var,width=18).pack(side="left",padx=5)
+
+        def show_state(state,at):
+            if state is None:
+                messagebox.showinfo("Job State",f"The job did not exist at {at}",parent=popup)
+                return
+            messagebox.showinfo(f"Job as of {at}","\n".join(f"{field}: {state.get(field) or ''}" for field in HISTORY_FIELDS),
+                                parent=popup)
+
+        def state_at():
+            at = at_var.get().strip()
+            try:
+                datetime.strptime(at[:10],"%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Error","Enter a time as YYYY-MM-DD HH:MM",parent=popup)
+                return
+            self.tasks.submit(job_state_at,db,doc_id,at,on_done=lambda state: show_state(state,at),owner=popup,
+                              op="view_job_logs.state_at",
+                              on_error=lambda e: messagebox.showerror("Error",f"Failed to load the job state: {e}"))
+
+        tk.Button(as_of_frame,text="Show Job",command=state_at).pack(side="left")
 
     def export_tree_csv(self,tree):
         if not tree.get_children():
@@ -447,38 +915,171 @@ class WorkLogApp:
                 writer.writerow(tree.item(row)["values"])
         messagebox.showinfo("Exported","Data exported to CSV")
 
+    # --------------------------
+    # Reports
+    # --------------------------
+    def view_reports(self):
+        # Rendered from the report_counters documents, never from the logs themselves
+        if not self.connected():
+            return
+        popup = tk.Toplevel(self.root)
+        popup.title("Reports")
+        popup.geometry("640x420")
+
+        monthly_frame = tk.LabelFrame(popup,text=f"Completed jobs per month (last {REPORT_MONTHS})")
+        monthly_frame.pack(side="left",fill="both",padx=10,pady=10)
+        monthly_tree = ttk.Treeview(monthly_frame,columns=("month","completed"),show="headings")
+        for col in ("month","completed"):
+            monthly_tree.heading(col,text=col.title())
+            monthly_tree.column(col,width=90)
+        monthly_tree.pack(fill="both",expand=True)
+
+        workload_frame = tk.LabelFrame(popup,text="Technician workload")
+        workload_frame.pack(side="left",fill="both",expand=True,padx=10,pady=10)
+        workload_columns = ("technician",) + STATUSES + ("total",)
+        workload_tree = ttk.Treeview(workload_frame,columns=workload_columns,show="headings")
+        for col in workload_columns:
+            workload_tree.heading(col,text=col.title())
+            workload_tree.column(col,width=70)
+        workload_tree.pack(fill="both",expand=True)
+
+        def loaded(result):
+            monthly, workload = build_reports(*result)
+            for tree, table in ((monthly_tree,monthly),(workload_tree,workload)):
+                tree.delete(*tree.get_children())
+                for row in table:
+                    tree.insert("","end",values=row)
+
+        def refresh():
+            self.tasks.submit(load_report_rows,db,on_done=loaded,owner=popup,op="reports.load",
+                              on_error=lambda e: messagebox.showerror("Error",f"Failed to load reports: {e}"))
+
+        tk.Button(workload_frame,text="Refresh",command=refresh).pack(pady=5)
+        refresh()
+
+    # --------------------------
+    # Dashboard (aggregation counts)
+    # --------------------------
+    def refresh_badges(self):
+        # Shop-wide counts under the buttons; refreshed once writes have synced
+        # and, while the dashboard is open, every STATS_TTL seconds
+        def show(totals):
+            self.badge_var.set(f"Pending: {totals['pending']}   In progress: {totals['in_progress']}   "
+                               f"Completed today: {totals['completed_today']}   "
+                               f"This month: {totals['completed_month']}")
+        self.tasks.submit(self.stats.totals,on_done=show,op="form.badges",
+                          on_error=lambda e: self.badge_var.set(f"Counts unavailable: {e}"))
+
+    def view_dashboard(self):
+        if not self.connected():
+            return
+        popup = tk.Toplevel(self.root)
+        popup.title("Dashboard")
+        popup.geometry("520x360")
+
+        columns = ("technician","pending","in_progress","completed_today")
+        tree = ttk.Treeview(popup,columns=columns,show="headings")
+        for col in columns:
+            tree.heading(col,text=col.replace("_"," ").title())
+            tree.column(col,width=120)
+        tree.pack(fill="both",expand=True,padx=10,pady=10)
+        tree.bind("<Double-1>",lambda e: tree.selection() and
+                  self.view_technician_history(tree.set(tree.selection()[0],"technician")))
+        updated_var = tk.StringVar(value="Loading…")
+        tk.Label(popup,textvariable=updated_var,anchor="w").pack(fill="x",padx=10,pady=(0,5))
+
+        def loaded(counts):
+            tree.delete(*tree.get_children())
+            for name, values in counts.items():
+                tree.insert("","end",values=(name,*values))
+            updated_var.set(f"Refreshed every {STATS_TTL}s. Double-click a technician for this week's changes")
+
+        def refresh():
+            if not popup.winfo_exists():
+                return
+            self.tasks.submit(self.stats.by_technician,list(self.tech_list),on_done=loaded,owner=popup,
+                              op="dashboard.by_technician",
+                              on_error=lambda e: updated_var.set(f"Failed to load counts: {e}"))
+            self.refresh_badges()
+            popup.after(STATS_TTL * 1000,refresh)
+        refresh()
+
+    def view_technician_history(self,technician):
+        # This week's changes to the technician's jobs, from one collection-group query
+        since = (datetime.today() - timedelta(days=datetime.today().weekday())).strftime("%Y-%m-%d")
+        popup = tk.Toplevel(self.root)
+        popup.title(f"Changes by {technician} since {since}")
+        popup.geometry("760x300")
+        columns = ("at","job","version","op","changes")
+        history_tree = ttk.Treeview(popup,columns=columns,show="headings")
+        for col in columns:
+            history_tree.heading(col,text=col.title())
+            history_tree.column(col,width=380 if col == "changes" else 140 if col == "at" else 70)
+        history_tree.pack(fill="both",expand=True,padx=10,pady=10)
+
+        def loaded(events):
+            for event in events:
+                job = (self.job_data(event.get("job")) or {}).get("jobnum") or event.get("job","")
+                history_tree.insert("","end",values=(event.get("at"),job,event.get("version"),event.get("op"),
+                                                     describe_changes(event.get("op"),event.get("changes",{}))))
+
+        self.tasks.submit(history_by_technician,db,technician,since,on_done=loaded,owner=popup,
+                          op="dashboard.technician_history",
+                          on_error=lambda e: messagebox.showerror("Error",f"Failed to load history: {e}"))
+
     # --------------------------
     # Manage Vehicles
     # --------------------------
     def manage_vehicles(self):
-        ManageWindow(self.root,"Vehicles",self.vehicles,self.add_vehicle,db.collection("vehicles"))
+        if not self.connected():
+            return
+        ManageWindow(self.root,"Vehicles",self.vehicles,self.add_vehicle,db.collection("vehicles"),
+                     key_field="label",delete_callback=self.vehicles_deleted,tasks=self.tasks)
+
+    def vehicles_deleted(self,doc_ids):
+        self.vehicle_cache.discard_many(doc_ids)
 
     # --------------------------
     # Manage Technicians
     # --------------------------
     def manage_technicians(self):
-        def add_tech(name):
-            try:
-                db.collection("technicians").add({"name":name})
+        if not self.connected():
+            return
+        def add_tech(name,on_added=None):
+            def added(result):
+                _, doc_ref = result
+                self.tech_cache.put(doc_ref.id, {"name":name})
                 messagebox.showinfo("Added",f"Technician {name} added")
-                self.load_technicians()
-            except Exception as e:
-                messagebox.showerror("Error",f"Failed to add technician: {e}")
-        ManageWindow(self.root,"Technicians", {t:t for t in self.tech_list}, add_tech, db.collection("technicians"))
+                self.refresh_technicians()
+                if on_added:
+                    on_added()
+            self.tasks.submit(db.collection("technicians").add, {"name":name}, on_done=added, op="manage.add_technician",
+                              on_error=lambda e: messagebox.showerror("Error",f"Failed to add technician: {e}"))
+        ManageWindow(self.root,"Technicians", self.tech_ids, add_tech, db.collection("technicians"),
+                     key_field="name",delete_callback=self.technicians_deleted,tasks=self.tasks)
+
+    def technicians_deleted(self,doc_ids):
+        for doc_id in doc_ids:
+            self.tech_cache.discard(doc_id)
+        self.refresh_technicians()
 
 # --------------------------
 # Generic Manage Window
 # --------------------------
 class ManageWindow(tk.Toplevel):
-    def __init__(self,parent,title,items,add_callback,collection_ref):
+    def __init__(self,parent,title,items,add_callback,collection_ref,key_field="name",delete_callback=None,tasks=None):
         super().__init__(parent)
         self.title(title)
         self.geometry("500x400")
-        self.items = items
+        self.items = items  # key -> Vehicle, or key -> doc id
         self.add_callback = add_callback
         self.collection_ref = collection_ref
+        self.key_field = key_field
+        self.delete_callback = delete_callback
+        self.tasks = tasks
+        self.doc_ids = {}  # key -> doc id, rebuilt with the tree
 
-        self.tree = ttk.Treeview(self,columns=("Name",),show="headings")
+        self.tree = ttk.Treeview(self,columns=("Name",),show="headings",selectmode="extended")
         self.tree.heading("Name",text="Name")
         self.tree.pack(fill="both",expand=True,padx=10,pady=10)
 
@@ -491,7 +1092,9 @@ class ManageWindow(tk.Toplevel):
     def refresh_tree(self):
         for row in self.tree.get_children():
             self.tree.delete(row)
-        for name in self.items.keys():
+        self.doc_ids = {}
+        for name, value in self.items.items():
+            self.doc_ids[name] = getattr(value, "doc_id", value)
             self.tree.insert("", "end", iid=name, values=(name,))
 
     def add_item(self):
@@ -501,38 +1104,48 @@ class ManageWindow(tk.Toplevel):
             TechnicianPopup(self,callback=self._callback_add)
 
     def _callback_add(self,item):
-        if isinstance(item,str):
-            self.add_callback(item)
-        else:
-            self.add_callback(item)
-        self.refresh_tree()
+        # The add finishes in the background; refresh once it lands
+        self.add_callback(item,on_added=lambda: self.refresh_tree() if self.winfo_exists() else None)
+
+    def find_doc_id(self,key):
+        doc_id = self.doc_ids.get(key)
+        if doc_id:
+            return doc_id
+        # Not in the index (e.g. added elsewhere before our cache caught up): one indexed lookup
+        for doc in stream_counted(self.collection_ref.where(self.key_field, "==", key).limit(1)):
+            return doc.id
+        return None
 
     def delete_item(self):
         selected = self.tree.selection()
         if not selected:
             messagebox.showwarning("Select","Select item to delete")
             return
-        key = selected[0]
-        if messagebox.askyesno("Confirm","Delete this item?"):
-            try:
-                # Find doc id
-                doc_id = None
-                for doc in self.collection_ref.stream():
-                    data = doc.to_dict()
-                    if data.get("label", data.get("name"))==key:
-                        doc_id = doc.id
-                        break
-                if doc_id:
-                    self.collection_ref.document(doc_id).delete()
-                    messagebox.showinfo("Deleted","Item deleted")
-                    self.refresh_tree()
-            except Exception as e:
-                messagebox.showerror("Error",f"Failed to delete: {e}")
+        prompt = "Delete this item?" if len(selected) == 1 else f"Delete these {len(selected)} items?"
+        if messagebox.askyesno("Confirm",prompt):
+            def delete_selected():
+                found = {key: self.find_doc_id(key) for key in selected}
+                delete_documents(db, self.collection_ref, [doc_id for doc_id in found.values() if doc_id])
+                return found
+
+            def deleted(found):
+                doc_ids = [doc_id for doc_id in found.values() if doc_id]
+                for key, doc_id in found.items():
+                    if doc_id:
+                        self.items.pop(key, None)
+                if self.delete_callback:
+                    self.delete_callback(doc_ids)
+                self.refresh_tree()
+                messagebox.showinfo("Deleted","Item deleted" if len(doc_ids) == 1 else f"{len(doc_ids)} items deleted")
+
+            self.tasks.submit(delete_selected, on_done=deleted, owner=self,
+                              op=f"manage.delete_{self.title().lower()}",
+                              on_error=lambda e: messagebox.showerror("Error",f"Failed to delete: {e}"))
 
 # --------------------------
 # Run App
 # --------------------------
 if __name__=="__main__":
     root = tk.Tk()
-    app = WorkLogApp(root)
+    app = WorkLogApp(root,trace=StartupTrace(enabled="--startup-trace" in sys.argv[1:]))
     root.mainloop()
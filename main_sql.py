@@ -2,10 +2,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
 import sqlite3
-import csv
+import threading
 from datetime import datetime
+import metrics
+import worklog_db
+import worklog_io
+from diagnostics import DiagnosticsWindow
+from tasks import TaskRunner
+from view_model import SortedTreeRows
 
 class WorkLogApp:
+    PAGE_SIZE = worklog_db.PAGE_SIZE
+    MAX_TREE_ROWS = 1000
+    SEARCH_DELAY_MS = 250  # search-as-you-type waits this long after the last keystroke
+
     def __init__(self, root):
         self.root = root
         self.root.title("Work Log App")
@@ -15,6 +25,7 @@ class WorkLogApp:
         self.jobnum_input = tk.StringVar()
         self.vin_input = tk.StringVar()
         self.tech_input = tk.StringVar()
+        self.status_input = tk.StringVar(value=worklog_db.STATUSES[0])
         self.date_var = tk.StringVar(value="Choose Date")  # Date button text
 
         # Build UI
@@ -27,6 +38,12 @@ class WorkLogApp:
         # Browser window placeholder
         self.browser_window = None
 
+        # Viewer searches run one at a time on their own thread and connection
+        self.search_tasks = TaskRunner(self.root, max_workers=1)
+        self.search_task = None
+        self.search_conn = None
+        self.search_after = None
+
     # --------------------------
     # UI: Input Section
     # --------------------------
@@ -60,6 +77,11 @@ class WorkLogApp:
         self.dateButton = tk.Button(inputs, textvariable=self.date_var, command=self.date_entry, width=15)
         self.dateButton.grid(row=1, column=3, padx=5, pady=5, sticky="w")
 
+        # Status
+        tk.Label(inputs, text="Status:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Combobox(inputs, textvariable=self.status_input, values=worklog_db.STATUSES,
+                     state="readonly", width=18).grid(row=2, column=1, padx=5, pady=5, sticky="w")
+
         # Job Description
         tk.Label(self.root, text="Job Description:").pack(anchor="w", padx=12)
         self.jobdesc_input = tk.Text(self.root, height=5)
@@ -75,52 +97,26 @@ class WorkLogApp:
         tk.Button(btn_frame, text="Save Entry", command=self.save).grid(row=0, column=0, padx=10)
         tk.Button(btn_frame, text="Reset", command=self.reset).grid(row=0, column=1, padx=10)
         tk.Button(btn_frame, text="View Logs", command=self.view_logs).grid(row=0, column=2, padx=10)
+        tk.Button(btn_frame, text="Reports", command=self.view_reports).grid(row=0, column=3, padx=10)
+        tk.Button(btn_frame, text="Diagnostics", command=lambda: DiagnosticsWindow(self.root)).grid(row=0, column=4, padx=10)
 
     # --------------------------
     # Database Initialization
     # --------------------------
     def initialize_database(self):
         try:
-            conn = sqlite3.connect("worklogs.db")
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    jobnum TEXT,
-                    vin TEXT,
-                    technician TEXT,
-                    description TEXT,
-                    date TEXT
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS technicians (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE
-                )
-            """)
-            # Add default technicians if empty
-            cursor.execute("SELECT COUNT(*) FROM technicians")
-            if cursor.fetchone()[0] == 0:
-                for name in ["John", "Mike", "Sarah", "Alex"]:
-                    cursor.execute("INSERT INTO technicians (name) VALUES (?)", (name,))
-            conn.commit()
+            with worklog_db.transaction() as conn:
+                worklog_db.create_schema(conn)
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"An error occurred: {e}")
-        finally:
-            conn.close()
         self.load_technicians()
 
     # --------------------------
     # Load technicians from DB
     # --------------------------
     def load_technicians(self):
-        conn = sqlite3.connect("worklogs.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM technicians ORDER BY name")
-        rows = cursor.fetchall()
-        conn.close()
-        self.tech_list = [row[0] for row in rows] + ["Add new…"]
+        with metrics.timed("form.load_technicians"):
+            self.tech_list = worklog_db.load_technician_names(worklog_db.get_connection()) + ["Add new…"]
         if hasattr(self, "tech_dropdown"):
             self.tech_dropdown["values"] = self.tech_list
 
@@ -142,11 +138,8 @@ class WorkLogApp:
             name = new_name_var.get().strip()
             if name and name not in self.tech_list:
                 try:
-                    conn = sqlite3.connect("worklogs.db")
-                    cursor = conn.cursor()
-                    cursor.execute("INSERT OR IGNORE INTO technicians (name) VALUES (?)", (name,))
-                    conn.commit()
-                    conn.close()
+                    with metrics.timed("form.add_technician"), worklog_db.transaction() as conn:
+                        worklog_db.add_technicians(conn, [name])
                 except sqlite3.Error as e:
                     messagebox.showerror("DB Error", f"An error occurred: {e}")
                 self.load_technicians()  # Refresh dropdowns
@@ -165,7 +158,7 @@ class WorkLogApp:
         cal.pack(padx=10, pady=10)
 
         def save_date():
-            self.date_var.set(cal.get())
+            self.date_var.set(cal.get_date().isoformat())  # stored as ISO whatever the locale
             top.destroy()
 
         tk.Button(top, text="Save", command=save_date).pack(pady=10)
@@ -185,56 +178,95 @@ class WorkLogApp:
             messagebox.showerror("Error", "Please fill all fields and select a date.")
             return
 
-        # Job number validation
-        if not jobnum.isdigit() or len(jobnum) > 5:
-            messagebox.showerror("Invalid Job Number", "Job number must be numeric and up to 5 digits.")
-            return
-
-        # VIN validation
-        if len(vin) != 17 or not vin.isalnum():
-            messagebox.showerror("Invalid VIN", "VIN must be exactly 17 alphanumeric characters.")
+        # Job number and VIN validation
+        error = worklog_db.validate_job(jobnum, vin)
+        if error:
+            messagebox.showerror(*error)
             return
 
         # Save to DB
-        conn = sqlite3.connect("worklogs.db")
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO logs (jobnum, vin, technician, description, date) VALUES (?, ?, ?, ?, ?)",
-            (jobnum, vin, technician, jobdesc, date)
-        )
-        conn.commit()
-        conn.close()
+        with metrics.timed("form.save"), worklog_db.transaction() as conn:
+            log_id = worklog_db.insert_log(conn, jobnum, vin, technician, jobdesc, date, self.status_input.get())
         messagebox.showinfo("Success", "Job added successfully!")
         self.reset()
-        self.load_logs() if self.browser_window else None
+        self.refresh_log_rows([log_id])
 
 
     # --------------------------
     # Import & Export CSV
     # --------------------------
+    def open_progress_popup(self, title, on_cancel=None):
+        """Progress window for a background job. Returns (popup, report) where
+        report(text, fraction) may be called from any thread."""
+        popup = tk.Toplevel(self.root)
+        popup.title(title)
+        popup.geometry("320x130")
+        progress_var = tk.StringVar(value="Starting…")
+        tk.Label(popup, textvariable=progress_var).pack(pady=5)
+        progress_bar = ttk.Progressbar(popup, length=280, maximum=100)
+        progress_bar.pack(pady=5)
+        if on_cancel:
+            tk.Button(popup, text="Cancel", command=on_cancel).pack(pady=5)
+            popup.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        def report(text, fraction):
+            def update():
+                if popup.winfo_exists():
+                    progress_var.set(text)
+                    progress_bar["value"] = fraction * 100
+            self.root.after(0, update)
+
+        return popup, report
+
     def export_to_csv(self):
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv")],
-            title="Save logs as CSV"
+            filetypes=[("CSV files", "*.csv"), ("Compressed CSV", "*.csv.gz"), ("JSON Lines", "*.jsonl")],
+            title="Export logs"
         )
         if not file_path:
             return
 
-        rows = [self.tree.item(child)["values"] for child in self.tree.get_children()]
-
-        if not rows:
+        # Export everything matching the current search, in the current sort order,
+        # straight from the database rather than from the rows loaded in the viewer
+        filters = dict(self.log_filters)
+        sort, descending = self.sort_column, self.sort_descending
+        if worklog_db.count_logs(worklog_db.get_connection(), **filters) == 0:
             messagebox.showwarning("No Data", "There are no logs to export.")
             return
 
-        try:
-            with open(file_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(self.columns)
-                writer.writerows(rows)
-            messagebox.showinfo("Export Successful", f"{len(rows)} logs exported to:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"An error occurred:\n{e}")
+        cancel = threading.Event()
+        popup, report = self.open_progress_popup("Exporting logs", on_cancel=cancel.set)
+        self.export_button.config(state="disabled")
+
+        def on_done(rows_written, error):
+            if popup.winfo_exists():
+                popup.destroy()
+            if self.browser_window and self.browser_window.winfo_exists():
+                self.export_button.config(state="normal")
+            if isinstance(error, worklog_io.ExportCancelled):
+                messagebox.showinfo("Export Cancelled", "The export was cancelled.")
+            elif error:
+                messagebox.showerror("Export Error", f"An error occurred:\n{error}")
+            else:
+                messagebox.showinfo("Export Successful", f"{rows_written} logs exported to:\n{file_path}")
+
+        def worker():
+            rows_written, error = 0, None
+            try:
+                with metrics.timed("viewer.export", detail=file_path):
+                    rows_written = worklog_io.export_logs(
+                        file_path, filters, sort=sort, descending=descending,
+                        progress=lambda n, fraction: report(f"Rows written: {n}", fraction),
+                        cancel=cancel
+                    )
+            except Exception as e:
+                error = e
+            finally:
+                worklog_db.close_connection()
+            self.root.after(0, lambda: on_done(rows_written, error))
+
+        threading.Thread(target=worker, daemon=True).start()
 
     def import_from_csv(self):
         file_path = filedialog.askopenfilename(
@@ -244,35 +276,78 @@ class WorkLogApp:
         if not file_path:
             return
 
-        try:
-            with open(file_path, newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                rows_added = 0
-                conn = sqlite3.connect("worklogs.db")
-                cursor = conn.cursor()
-                for row in reader:
-                    keys = {k.lower().strip(): k for k in row.keys()}
-                    if all(col in keys for col in ("jobnum", "vin", "technician", "description", "date")):
-                        tech_name = row[keys["technician"]].strip()
-                        cursor.execute("INSERT OR IGNORE INTO technicians (name) VALUES (?)", (tech_name,))
-                        cursor.execute("""
-                            INSERT INTO logs (jobnum, vin, technician, description, date)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (
-                            row[keys["jobnum"]],
-                            row[keys["vin"]],
-                            tech_name,
-                            row[keys["description"]],
-                            row[keys["date"]]
-                        ))
-                        rows_added += 1
-                conn.commit()
-                conn.close()
+        # The import itself runs on a worker thread
+        popup, report = self.open_progress_popup("Importing CSV")
+        self.import_button.config(state="disabled")
+
+        def on_done(result, error):
+            if popup.winfo_exists():
+                popup.destroy()
+            if self.browser_window and self.browser_window.winfo_exists():
+                self.import_button.config(state="normal")
+            if error:
+                messagebox.showerror("Import Error", f"An error occurred:\n{error}")
+                return
             self.load_technicians()
             self.load_logs()
-            messagebox.showinfo("Import Complete", f"{rows_added} jobs imported successfully!")
-        except Exception as e:
-            messagebox.showerror("Import Error", f"An error occurred:\n{e}")
+            message = f"{result.imported} jobs imported successfully!"
+            if result.rejected:
+                message += f"\n{result.rejected} invalid rows were skipped and saved to:\n{result.reject_path}"
+            messagebox.showinfo("Import Complete", message)
+
+        def worker():
+            result, error = None, None
+            try:
+                with metrics.timed("viewer.import_from_csv", detail=file_path):
+                    result = worklog_io.import_csv(
+                        file_path, progress=lambda n, fraction: report(f"Rows read: {n}", fraction)
+                    )
+            except Exception as e:
+                error = e
+            finally:
+                worklog_db.close_connection()
+            self.root.after(0, lambda: on_done(result, error))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    # --------------------------
+    # Reports
+    # --------------------------
+    def view_reports(self):
+        # Reads the trigger-maintained log_summary and log_totals tables, never the logs themselves
+        popup = tk.Toplevel(self.root)
+        popup.title("Reports")
+        popup.geometry("640x420")
+
+        monthly_frame = tk.LabelFrame(popup, text=f"Completed jobs per month (last {worklog_db.REPORT_MONTHS})")
+        monthly_frame.pack(side="left", fill="both", padx=10, pady=10)
+        monthly_tree = ttk.Treeview(monthly_frame, columns=("month", "completed"), show="headings")
+        for col in ("month", "completed"):
+            monthly_tree.heading(col, text=col.title())
+            monthly_tree.column(col, width=90)
+        monthly_tree.pack(fill="both", expand=True)
+
+        workload_frame = tk.LabelFrame(popup, text="Technician workload")
+        workload_frame.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+        workload_columns = ("technician",) + worklog_db.STATUSES + ("total",)
+        workload_tree = ttk.Treeview(workload_frame, columns=workload_columns, show="headings")
+        for col in workload_columns:
+            workload_tree.heading(col, text=col.title())
+            workload_tree.column(col, width=70)
+        workload_tree.pack(fill="both", expand=True)
+
+        def refresh():
+            with metrics.timed("reports.refresh"):
+                conn = worklog_db.get_connection()
+                monthly, workload = worklog_db.build_reports(
+                    worklog_db.summary_rows(conn, worklog_db.report_since()), worklog_db.total_rows(conn))
+            for tree, rows in ((monthly_tree, monthly), (workload_tree, workload)):
+                tree.delete(*tree.get_children())
+                for row in rows:
+                    tree.insert("", "end", values=row)
+
+        tk.Button(workload_frame, text="Refresh", command=refresh).pack(pady=5)
+        refresh()
 
     # --------------------------
     # Reset form
@@ -283,6 +358,7 @@ class WorkLogApp:
         self.tech_input.set("Select...")
         self.jobdesc_input.delete("1.0", "end")
         self.date_var.set("Choose Date")
+        self.status_input.set(worklog_db.STATUSES[0])
 
     # --------------------------
     # Treeview button activation
@@ -290,8 +366,11 @@ class WorkLogApp:
     def on_tree_select(self, event):
         selected = self.tree.selection()
         state = "normal" if selected else "disabled"
-        self.edit_button.config(state=state)
+        self.edit_button.config(state="normal" if len(selected) == 1 else "disabled")
+        self.history_button.config(state="normal" if len(selected) == 1 else "disabled")
         self.delete_button.config(state=state)
+        self.status_button.config(state=state)
+        self.reassign_button.config(state=state)
 
     # --------------------------
     # View logs
@@ -302,7 +381,7 @@ class WorkLogApp:
 
         self.browser_window = tk.Toplevel(self.root)
         self.browser_window.title("Work Log Viewer")
-        self.browser_window.geometry("1000x550")  # slightly taller for status bar
+        self.browser_window.geometry("1000x580")  # slightly taller for status bar
 
         # Search frame
         search_frame = tk.Frame(self.browser_window)
@@ -320,18 +399,43 @@ class WorkLogApp:
         self.search_tech = tk.StringVar()
         tk.Entry(search_frame, textvariable=self.search_tech, width=15).grid(row=0, column=5, padx=5)
 
+        tk.Label(search_frame, text="Search Any (incl. description):").grid(row=1, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+        self.search_text = tk.StringVar()
+        tk.Entry(search_frame, textvariable=self.search_text, width=40).grid(row=1, column=2, columnspan=4, padx=5, sticky="we")
+
+        tk.Label(search_frame, text="From (YYYY-MM-DD):").grid(row=2, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+        self.search_from = tk.StringVar()
+        tk.Entry(search_frame, textvariable=self.search_from, width=15).grid(row=2, column=2, padx=5, sticky="w")
+        tk.Label(search_frame, text="To:").grid(row=2, column=3, padx=5, pady=2, sticky="e")
+        self.search_to = tk.StringVar()
+        tk.Entry(search_frame, textvariable=self.search_to, width=15).grid(row=2, column=4, padx=5, sticky="w")
+
+        for var in (self.search_jobnum, self.search_vin, self.search_tech,
+                    self.search_text, self.search_from, self.search_to):
+            var.trace_add("write", self.on_search_typed)
+
         tk.Button(search_frame, text="Search", command=self.load_logs).grid(row=0, column=6, padx=5)
         tk.Button(search_frame, text="Clear", command=self.clear_search).grid(row=0, column=7, padx=5)
 
         # Treeview
-        self.columns = ("id", "jobnum", "vin", "technician", "description", "date")
-        self.tree = ttk.Treeview(self.browser_window, columns=self.columns, show="headings")
-        self.tree.pack(fill="both", expand=True)
+        self.columns = ("id", "jobnum", "vin", "technician", "description", "date", "status")
+        tree_frame = tk.Frame(self.browser_window)
+        tree_frame.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=self.columns, show="headings", selectmode="extended")
+        self.tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
+        self.tree_scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.rows = SortedTreeRows(self.tree)
 
         for col in self.columns:
-            width = 300 if col == "description" else 120
+            width = 300 if col == "description" else 100
             self.tree.heading(col, text=col.title(), command=lambda c=col: self.sort_tree(c, False))
             self.tree.column(col, width=width)
+        self.sort_column = "date"
+        self.sort_descending = True
+        self.sort_picked = False  # a heading was clicked: keep that order even for text searches
+        self.update_sort_headings()
 
         # Buttons
         btn_frame = tk.Frame(self.browser_window)
@@ -342,10 +446,18 @@ class WorkLogApp:
         self.edit_button.grid(row=0, column=1, padx=5)
         self.delete_button = tk.Button(btn_frame, text="Delete Selected", command=self.delete_selected_job, state="disabled")
         self.delete_button.grid(row=0, column=2, padx=5)
-        self.export_button = tk.Button(btn_frame, text="Export to CSV", command=self.export_to_csv)
-        self.export_button.grid(row=0, column=3, padx=5)
+        self.status_button = tk.Button(btn_frame, text="Set Status…", state="disabled",
+                                       command=lambda: self.bulk_update_popup("status", worklog_db.STATUSES))
+        self.status_button.grid(row=0, column=3, padx=5)
+        self.reassign_button = tk.Button(btn_frame, text="Reassign…", state="disabled",
+                                         command=lambda: self.bulk_update_popup("technician", self.tech_list[:-1]))
+        self.reassign_button.grid(row=0, column=4, padx=5)
+        self.export_button = tk.Button(btn_frame, text="Export…", command=self.export_to_csv)
+        self.export_button.grid(row=0, column=5, padx=5)
         self.import_button = tk.Button(btn_frame, text="Import CSV", command=self.import_from_csv)
-        self.import_button.grid(row=0, column=4, padx=5)
+        self.import_button.grid(row=0, column=6, padx=5)
+        self.history_button = tk.Button(btn_frame, text="History", command=self.view_job_history, state="disabled")
+        self.history_button.grid(row=0, column=7, padx=5)
 
         # Status bar
         self.status_var = tk.StringVar()
@@ -357,47 +469,205 @@ class WorkLogApp:
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
         self.tree.bind("<Double-1>", lambda e: self.edit_selected_job())
 
-        # Load logs
+        # Load logs (the Treeview fills in when the first search returns)
+        self.log_filters = {}
+        self.total_logs = 0
+        self.row_keys = {}
+        self.at_start = self.at_end = True
+        self.paging = False
         self.load_logs()
 
     # --------------------------
     # Load logs
     # --------------------------
-    def load_logs(self):
-        if not hasattr(self, "tree"):
+    def load_logs(self, live=False):
+        """Re-run the search on the search thread; only the newest result is shown.
+
+        A search still running for older input is cancelled and its query
+        interrupted, so the newest one never queues behind it.
+        """
+        if not self.viewer_open():
             return
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        if self.search_after:
+            self.browser_window.after_cancel(self.search_after)
+            self.search_after = None
+
+        filters = {
+            "jobnum": self.search_jobnum.get().strip(),
+            "vin": self.search_vin.get().strip(),
+            "technician": self.search_tech.get().strip(),
+            "text": self.search_text.get().strip(),
+            "date_from": self.search_from.get().strip(),
+            "date_to": self.search_to.get().strip(),
+        }
+        # Text searches list the best matches first until a heading is clicked
+        if filters["text"] and not self.sort_picked:
+            self.sort_column, self.sort_descending = worklog_db.RELEVANCE, True
+        elif not filters["text"] and self.sort_column == worklog_db.RELEVANCE:
+            self.sort_column, self.sort_descending = "date", True
+        self.update_sort_headings()
+        if self.search_task:
+            self.search_task.cancel()
+            if self.search_conn:
+                self.search_conn.interrupt()
+        self.status_var.set("Searching…")
+        self.search_task = self.search_tasks.submit(
+            self.run_search, filters, self.sort_column, self.sort_descending,
+            on_done=lambda result: self.show_search_result(filters, result),
+            on_error=lambda e: self.search_failed(e, live),
+            owner=self.browser_window, op="viewer.load_logs"
+        )
 
-        jobnum_filter = self.search_jobnum.get().strip() if hasattr(self, "search_jobnum") else ""
-        vin_filter = self.search_vin.get().strip() if hasattr(self, "search_vin") else ""
-        tech_filter = self.search_tech.get().strip() if hasattr(self, "search_tech") else ""
+    def on_search_typed(self, *args):
+        if self.search_after:
+            self.browser_window.after_cancel(self.search_after)
+        self.search_after = self.browser_window.after(self.SEARCH_DELAY_MS, lambda: self.load_logs(live=True))
+
+    def run_search(self, filters, sort, descending):
+        # Runs on the search thread; its pooled connection is the one load_logs interrupts
+        conn = self.search_conn = worklog_db.get_connection()
+        total = worklog_db.count_logs(conn, **filters)
+        rows = worklog_db.fetch_log_page(conn, filters, sort=sort, descending=descending, limit=self.PAGE_SIZE)
+        return total, rows
+
+    def show_search_result(self, filters, result):
+        # Only a window of at most MAX_TREE_ROWS rows lives in the Treeview;
+        # pages are fetched on demand as the user scrolls either way.
+        self.search_task = None
+        self.total_logs, rows = result
+        self.log_filters = filters
+        self.rows.reset(descending=self.sort_descending)
+        self.row_keys = {}  # iid -> (sort value, id) keyset position
+        self.at_start = True
+        self.at_end = len(rows) < self.PAGE_SIZE
+        self.paging = False
+        for row in rows:
+            self.insert_log_row(row)
+        self.update_status()
+
+    def search_failed(self, error, live):
+        self.search_task = None
+        if isinstance(error, ValueError) and live:
+            # Half-typed dates are expected while typing; only a Search click gets a dialog
+            self.status_var.set(str(error))
+            return
+        self.update_status()
+        if isinstance(error, ValueError):
+            messagebox.showerror("Invalid Date", str(error), parent=self.browser_window)
+            return
+        messagebox.showerror("DB Error", f"An error occurred: {error}", parent=self.browser_window)
 
-        conn = sqlite3.connect("worklogs.db")
-        cursor = conn.cursor()
+    def load_next_page(self):
+        if self.at_end:
+            return
+        children = self.tree.get_children()
+        after = self.row_keys[children[-1]] if children else None
+        with metrics.timed("viewer.next_page"):
+            rows = worklog_db.fetch_log_page(worklog_db.get_connection(), self.log_filters,
+                                             sort=self.sort_column, descending=self.sort_descending,
+                                             after=after, limit=self.PAGE_SIZE)
+        self.at_end = len(rows) < self.PAGE_SIZE
+        for row in rows:
+            self.insert_log_row(row)
+        self.trim_tree_window(from_top=True)
+        self.update_status()
 
-        query = "SELECT * FROM logs WHERE 1=1"
-        params = []
+    def load_previous_page(self):
+        if self.at_start:
+            return
+        children = self.tree.get_children()
+        before = self.row_keys[children[0]] if children else None
+        with metrics.timed("viewer.previous_page"):
+            rows = worklog_db.fetch_log_page(worklog_db.get_connection(), self.log_filters,
+                                             sort=self.sort_column, descending=self.sort_descending,
+                                             before=before, limit=self.PAGE_SIZE)
+        self.at_start = len(rows) < self.PAGE_SIZE
+        for row in rows:
+            self.insert_log_row(row)
+        self.tree.yview_scroll(len(rows), "units")  # keep the same rows under the cursor
+        self.trim_tree_window(from_top=False)
+        self.update_status()
+
+    def insert_log_row(self, row):
+        # Inserts or updates the row in place; SortedTreeRows finds its position
+        iid = str(row[0])
+        self.rows.upsert(iid, row[:len(self.columns)], worklog_db.order_key(row, self.sort_column))
+        self.row_keys[iid] = worklog_db.log_key(row)
+
+    def remove_log_row(self, iid):
+        if self.rows.remove(iid):
+            self.row_keys.pop(iid, None)
+
+    def refresh_log_rows(self, log_ids):
+        """Apply saved changes to the viewer one row at a time instead of reloading it.
+
+        Each id is re-read with the current filters: a row that no longer
+        matches is removed, one that does is updated in place (or inserted,
+        if it sorts inside the loaded window). The total is recounted, since
+        an edit can move a row into or out of the filters whether or not it
+        was loaded. Nothing else is touched.
+        """
+        if not self.viewer_open():
+            return
+        if self.search_task:
+            # The pending search may have read the rows before this change
+            self.load_logs(live=True)
+            return
+        conn = worklog_db.get_connection()
+        for log_id in log_ids:
+            iid = str(log_id)
+            with metrics.timed("viewer.refresh_row"):
+                row = worklog_db.fetch_log_row(conn, log_id, self.log_filters, self.sort_column)
+            if row is None:
+                self.remove_log_row(iid)
+                continue
+            if self.rows.covers(worklog_db.order_key(row, self.sort_column), self.at_start, self.at_end):
+                self.insert_log_row(row)
+            else:
+                self.remove_log_row(iid)
+        self.total_logs = worklog_db.count_logs(conn, **self.log_filters)
+        self.update_status()
+
+    def viewer_open(self):
+        return bool(self.browser_window and self.browser_window.winfo_exists())
+
+    def trim_tree_window(self, from_top):
+        excess = len(self.rows) - self.MAX_TREE_ROWS
+        if excess <= 0:
+            return
+        if from_top:
+            self.at_start = False
+        else:
+            self.at_end = False
+        for iid in self.rows.edge_iids(excess, from_top):
+            self.remove_log_row(iid)
+        if from_top:
+            self.tree.yview_scroll(-excess, "units")
+
+    def on_tree_scroll(self, first, last):
+        self.tree_scrollbar.set(first, last)
+        if self.paging or self.search_task:
+            return
+        if float(last) >= 0.95 and not self.at_end:
+            self.schedule_page(self.load_next_page)
+        elif float(first) <= 0.05 and not self.at_start:
+            self.schedule_page(self.load_previous_page)
 
-        if jobnum_filter:
-            query += " AND jobnum LIKE ?"
-            params.append(f"%{jobnum_filter}%")
-        if vin_filter:
-            query += " AND vin LIKE ?"
-            params.append(f"%{vin_filter}%")
-        if tech_filter:
-            query += " AND technician LIKE ?"
-            params.append(f"%{tech_filter}%")
+    def schedule_page(self, load_page):
+        # Runs after the current scroll event so Tk isn't re-entered mid-redraw
+        self.paging = True
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+        def run():
+            try:
+                load_page()
+            finally:
+                self.paging = False
 
-        for row in rows:
-            self.tree.insert("", "end", values=row)
+        self.browser_window.after_idle(run)
 
-        # Update status bar
-        self.status_var.set(f"Jobs loaded: {len(rows)}")
+    def update_status(self):
+        order = " (best matches first)" if self.sort_column == worklog_db.RELEVANCE else ""
+        self.status_var.set(f"Jobs loaded: {len(self.rows)} of {self.total_logs}{order}")
 
     # --------------------------
     # Clear search
@@ -406,40 +676,114 @@ class WorkLogApp:
         self.search_jobnum.set("")
         self.search_vin.set("")
         self.search_tech.set("")
+        self.search_text.set("")
+        self.search_from.set("")
+        self.search_to.set("")
+        self.sort_picked = False
         self.load_logs()
 
     # --------------------------
     # Sort Treeview
     # --------------------------
     def sort_tree(self, col, reverse):
-        data = [(self.tree.item(child)["values"][self.columns.index(col)], child)
-                for child in self.tree.get_children()]
-        try:
-            data.sort(key=lambda x: float(x[0]), reverse=reverse)
-        except:
-            data.sort(key=lambda x: str(x[0]).lower(), reverse=reverse)
-        for idx, item in enumerate(data):
-            self.tree.move(item[1], "", idx)
+        # Sorting is an ORDER BY on the indexed column; the visible window is re-queried
+        self.sort_column = col
+        self.sort_descending = reverse
+        self.sort_picked = True
+        self.update_sort_headings()
         self.tree.heading(col, command=lambda: self.sort_tree(col, not reverse))
+        self.load_logs()
+
+    def update_sort_headings(self):
+        for col in self.columns:
+            arrow = ""
+            if col == self.sort_column:
+                arrow = " ▼" if self.sort_descending else " ▲"
+            self.tree.heading(col, text=col.title() + arrow)
 
     # --------------------------
-    # Delete job
+    # Bulk status change / reassign
+    # --------------------------
+    def bulk_update_popup(self, field, choices):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showwarning("No selection", "Please select one or more jobs.")
+            return
+        popup = tk.Toplevel(self.browser_window)
+        popup.title("Set Status" if field == "status" else "Reassign Jobs")
+        popup.geometry("260x120")
+
+        tk.Label(popup, text=f"New {field} for {len(selected)} job(s):").pack(pady=5)
+        value_var = tk.StringVar()
+        ttk.Combobox(popup, textvariable=value_var, values=list(choices), state="readonly").pack(pady=5)
+
+        def apply():
+            value = value_var.get()
+            if not value:
+                return
+            # One transaction and one executemany for the whole selection
+            try:
+                with metrics.timed(f"viewer.set_{field}"), worklog_db.transaction() as conn:
+                    worklog_db.set_logs_field(conn, [int(iid) for iid in selected], field, value)
+            except sqlite3.Error as e:
+                messagebox.showerror("DB Error", f"An error occurred: {e}")
+                return
+            self.refresh_log_rows(selected)
+            popup.destroy()
+            messagebox.showinfo("Updated", f"{len(selected)} job(s) updated.")
+
+        tk.Button(popup, text="Apply", command=apply).pack(pady=5)
+
+    # --------------------------
+    # Delete job(s)
     # --------------------------
     def delete_selected_job(self):
         selected = self.tree.selection()
         if not selected:
             messagebox.showwarning("No selection", "Please select a job to delete.")
             return
-        item = self.tree.item(selected[0])
-        job_id, jobnum = item["values"][0], item["values"][1]
-        if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete Job #{jobnum}?"):
-            conn = sqlite3.connect("worklogs.db")
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM logs WHERE id=?", (job_id,))
-            conn.commit()
-            conn.close()
-            self.tree.delete(selected[0])
-            messagebox.showinfo("Deleted", f"Job #{jobnum} has been deleted.")
+        if len(selected) == 1:
+            jobnum = self.tree.set(selected[0], "jobnum")
+            question, done = f"Are you sure you want to delete Job #{jobnum}?", f"Job #{jobnum} has been deleted."
+        else:
+            question, done = f"Are you sure you want to delete {len(selected)} jobs?", f"{len(selected)} jobs have been deleted."
+        if messagebox.askyesno("Confirm Delete", question):
+            try:
+                with metrics.timed("viewer.delete"), worklog_db.transaction() as conn:
+                    worklog_db.delete_logs(conn, [int(iid) for iid in selected])
+            except sqlite3.Error as e:
+                messagebox.showerror("DB Error", f"An error occurred: {e}")
+                return
+            for iid in selected:
+                self.remove_log_row(iid)
+            self.total_logs = worklog_db.count_logs(worklog_db.get_connection(), **self.log_filters)
+            self.update_status()
+            messagebox.showinfo("Deleted", done)
+
+    # --------------------------
+    # Job history
+    # --------------------------
+    def view_job_history(self):
+        selected = self.tree.selection()
+        if len(selected) != 1:
+            messagebox.showwarning("No selection", "Please select one job.")
+            return
+        log_id = int(selected[0])
+        popup = tk.Toplevel(self.browser_window)
+        popup.title(f"History of Job #{self.tree.set(selected[0], 'jobnum')}")
+        popup.geometry("760x300")
+
+        columns = ("version", "at", "op", "technician", "changes")
+        tree = ttk.Treeview(popup, columns=columns, show="headings")
+        for col in columns:
+            tree.heading(col, text=col.title())
+            tree.column(col, width=380 if col == "changes" else 90)
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        with metrics.timed("viewer.history"):
+            history = worklog_db.log_history(worklog_db.get_connection(), log_id)
+        for version, at, op, technician, changes in history:
+            tree.insert("", "end", values=(version, at, op, technician, worklog_db.describe_changes(op, changes)))
 
     # --------------------------
     # Edit job
@@ -450,15 +794,16 @@ class WorkLogApp:
             messagebox.showwarning("No selection", "Please select a job to edit.")
             return
         item = self.tree.item(selected[0])
-        job_id, jobnum, vin, technician, description, date_str = item["values"]
+        job_id, jobnum, vin, technician, description, date_str, status = item["values"]
 
         popup = tk.Toplevel(self.root)
         popup.title(f"Edit Job #{job_id}")
-        popup.geometry("400x350")
+        popup.geometry("400x390")
 
         jobnum_var = tk.StringVar(value=jobnum)
         vin_var = tk.StringVar(value=vin)
         tech_var = tk.StringVar(value=technician)
+        status_var = tk.StringVar(value=status)
 
         tk.Label(popup, text="Job Number:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
         tk.Entry(popup, textvariable=jobnum_var).grid(row=0, column=1, padx=5, pady=5)
@@ -473,10 +818,7 @@ class WorkLogApp:
             lambda e: self.add_new_technician_for_popup(tech_dropdown, tech_var))
 
         tk.Label(popup, text="Date:").grid(row=3, column=0, padx=5, pady=5, sticky="w")
-        try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-        except:
-            date_obj = datetime.today().date()
+        date_obj = worklog_db.parse_date(date_str) or datetime.today().date()
         date_picker = DateEntry(popup, width=12, background="darkblue", foreground="white")
         date_picker.set_date(date_obj)
         date_picker.grid(row=3, column=1, padx=5, pady=5)
@@ -486,35 +828,32 @@ class WorkLogApp:
         desc_text.grid(row=4, column=1, padx=5, pady=5)
         desc_text.insert("1.0", description)
 
+        tk.Label(popup, text="Status:").grid(row=5, column=0, padx=5, pady=5, sticky="w")
+        ttk.Combobox(popup, textvariable=status_var, values=worklog_db.STATUSES,
+                     state="readonly").grid(row=5, column=1, padx=5, pady=5)
+
         def save_changes():
-            conn = sqlite3.connect("worklogs.db")
-            cursor = conn.cursor()
-            if not jobnum_var.get().isdigit() or len(jobnum_var.get()) > 5:
-                messagebox.showerror("Invalid Job Number", "Job number must be numeric and up to 5 digits.")
-                return
-            if len(vin_var.get()) != 17 or not vin_var.get().isalnum():
-                messagebox.showerror("Invalid VIN", "VIN must be exactly 17 alphanumeric characters.")
+            error = worklog_db.validate_job(jobnum_var.get(), vin_var.get())
+            if error:
+                messagebox.showerror(*error)
                 return
 
-            cursor.execute("""
-                UPDATE logs
-                SET jobnum=?, vin=?, technician=?, description=?, date=?
-                WHERE id=?
-            """, (
-                jobnum_var.get(),
-                vin_var.get(),
-                tech_var.get(),
-                desc_text.get("1.0", "end-1c"),
-                date_picker.get(),
-                job_id
-            ))
-            conn.commit()
-            conn.close()
-            self.load_logs()
+            with metrics.timed("edit.save_changes"), worklog_db.transaction() as conn:
+                worklog_db.update_log(
+                    conn,
+                    job_id,
+                    jobnum_var.get(),
+                    vin_var.get(),
+                    tech_var.get(),
+                    desc_text.get("1.0", "end-1c"),
+                    date_picker.get_date().isoformat(),
+                    status_var.get()
+                )
+            self.refresh_log_rows([job_id])
             popup.destroy()
             messagebox.showinfo("Success", f"Job #{job_id} updated successfully!")
 
-        tk.Button(popup, text="Save Changes", command=save_changes).grid(row=5, column=0, columnspan=2, pady=10)
+        tk.Button(popup, text="Save Changes", command=save_changes).grid(row=6, column=0, columnspan=2, pady=10)
 
 # --------------------------
 # Run App
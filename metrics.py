@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# --------------------------
+# Per-operation latency metrics (no Tk imports here)
+# --------------------------
+# Every database or Firestore call runs inside timed(op). Each op keeps a call
+# count, a latency histogram, the rows/documents it returned and, for
+# Firestore, the billed reads it caused. Counts reported with add() go to every
+# op being timed on the calling thread, so a screen-level op such as
+# "view_job_logs.next_page" also totals the reads of the data calls it made.
+# Calls slower than slow_seconds are kept in a short slow-operation log with
+# their query text: the SQL, or each Firestore query's collection, filters,
+# order and limit.
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)  # upper bounds; one more bucket for slower
+SLOW_SECONDS = 0.25
+SLOW_LOG_SIZE = 200
+MAX_QUERY_TEXTS = 8   # statements kept per timed call for the slow log
+MAX_QUERY_LENGTH = 500
+
+
+class OpStats:
+    __slots__ = ("count", "errors", "total", "max", "buckets", "rows", "reads")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.rows = 0
+        self.reads = 0
+
+    def percentile(self, fraction):
+        """Upper bound (ms) of the bucket holding the given fraction of calls."""
+        rank = fraction * self.count
+        seen = 0
+        for bound, calls in zip(BUCKETS_MS, self.buckets):
+            seen += calls
+            if calls and seen >= rank:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+    def as_dict(self):
+        timed_calls = sum(self.buckets)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / timed_calls, 3) if timed_calls else None,
+            "p50_ms": round(self.percentile(0.5), 3) if timed_calls else None,
+            "p95_ms": round(self.percentile(0.95), 3) if timed_calls else None,
+            "max_ms": round(self.max * 1000, 3),
+            "rows": self.rows,
+            "reads": self.reads,
+            "histogram": dict(zip([f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"], self.buckets)),
+        }
+
+
+class Timing:
+    """One call in progress; add() and note_query() fill it in."""
+    __slots__ = ("op", "detail", "rows", "reads", "queries")
+
+    def __init__(self, op, detail=None):
+        self.op = op
+        self.detail = detail
+        self.rows = 0
+        self.reads = 0
+        self.queries = []
+
+
+class Metrics:
+    def __init__(self, slow_seconds=SLOW_SECONDS, slow_log_size=SLOW_LOG_SIZE):
+        self.slow_seconds = slow_seconds
+        self.started = datetime.now()
+        self.ops = {}  # op -> OpStats
+        self.slow = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def timed(self, op, detail=None):
+        """Time the block as one call of `op`; yields the Timing so callers can add counts."""
+        timing = Timing(op, detail)
+        stack = self._stack()
+        stack.append(timing)
+        error = False
+        start = time.perf_counter()
+        try:
+            yield timing
+        except BaseException:
+            error = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            self.record(op, seconds, timing.rows, timing.reads, error, timing)
+
+    def instrumented(self, op):
+        """Decorator: time every call of the function as `op`; a list result counts as rows."""
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timed(op) as timing:
+                    result = fn(*args, **kwargs)
+                    if isinstance(result, list):
+                        self.add(rows=len(result))
+                    return result
+            return wrapper
+        return decorate
+
+    def add(self, rows=0, reads=0):
+        """Count rows/documents and Firestore reads against every op timed on this thread."""
+        for timing in self._stack():
+            timing.rows += rows
+            timing.reads += reads
+
+    def note_query(self, text):
+        """Remember a query's text for the slow log of every op timed on this thread."""
+        stack = getattr(self._local, "stack", None)
+        if not stack:
+            return
+        text = " ".join(text.split())[:MAX_QUERY_LENGTH]
+        for timing in stack:
+            if len(timing.queries) < MAX_QUERY_TEXTS and text not in timing.queries:
+                timing.queries.append(text)
+
+    def record(self, op, seconds=None, rows=0, reads=0, error=False, timing=None):
+        """Add one call to `op`. seconds=None counts rows/reads without a latency sample
+        (e.g. a listener update, whose cost is not a round trip we wait on)."""
+        with self._lock:
+            stats = self.ops.get(op)
+            if stats is None:
+                stats = self.ops[op] = OpStats()
+            stats.count += 1
+            stats.errors += error
+            stats.rows += rows
+            stats.reads += reads
+            if seconds is None:
+                return
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            ms = seconds * 1000
+            bucket = 0
+            while bucket < len(BUCKETS_MS) and ms > BUCKETS_MS[bucket]:
+                bucket += 1
+            stats.buckets[bucket] += 1
+            if seconds >= self.slow_seconds:
+                self.slow.append({
+                    "at": datetime.now().isoformat(timespec="seconds"),
+                    "op": op,
+                    "ms": round(ms, 1),
+                    "rows": rows,
+                    "reads": reads,
+                    "error": error,
+                    "detail": None if timing is None or timing.detail is None else str(timing.detail),
+                    "queries": list(timing.queries) if timing else [],
+                })
+
+    def screens(self):
+        """Rows and reads summed per screen (the part of each op name before the first dot)."""
+        totals = {}
+        with self._lock:
+            for op, stats in self.ops.items():
+                screen = totals.setdefault(op.split(".", 1)[0], {"calls": 0, "rows": 0, "reads": 0})
+                screen["calls"] += stats.count
+                screen["rows"] += stats.rows
+                screen["reads"] += stats.reads
+        return totals
+
+    def snapshot(self):
+        screens = self.screens()
+        with self._lock:
+            return {
+                "since": self.started.isoformat(timespec="seconds"),
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "slow_ms": self.slow_seconds * 1000,
+                "ops": {op: stats.as_dict() for op, stats in sorted(self.ops.items())},
+                "screens": screens,
+                "slow": list(self.slow),
+            }
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self.ops.clear()
+            self.slow.clear()
+            self.started = datetime.now()
+
+
+METRICS = Metrics()
+timed = METRICS.timed
+instrumented = METRICS.instrumented
+add = METRICS.add
+note_query = METRICS.note_query
+record = METRICS.record
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# --------------------------
+# Background work for the Tk apps
+# --------------------------
+class Task:
+    def __init__(self, future, owner=None):
+        self.future = future
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        """Drop the result; also stops the call if it hasn't started yet."""
+        self.cancelled = True
+        self.future.cancel()
+
+
+class TaskRunner:
+    """Runs blocking data calls on a small thread pool, off the Tk mainloop.
+
+    `on_done(result)` / `on_error(exc)` are called back on the Tk thread via
+    root.after. Tasks submitted with an `owner` window are cancelled when that
+    window is destroyed, so a late result never touches a dead widget.
+    `on_busy(count)` is called whenever the number of in-flight tasks changes.
+    Every task is timed in metrics as `op` (default: the function's name).
+    """
+
+    def __init__(self, root, max_workers=4, on_busy=None):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="data")
+        self.on_busy = on_busy
+        self.in_flight = 0
+        self._owned = {}  # owner widget -> set of its tasks
+
+    def submit(self, fn, *args, on_done=None, on_error=None, owner=None, op=None, **kwargs):
+        op = op or getattr(fn, "__qualname__", repr(fn))
+        future = self.executor.submit(self._run, op, fn, args, kwargs)
+        task = Task(future, owner)
+        if owner is not None:
+            if owner not in self._owned:
+                self._owned[owner] = set()
+                owner.bind("<Destroy>", lambda e, w=owner: self.cancel_owner(w) if e.widget is w else None, add="+")
+            self._owned[owner].add(task)
+        self._set_in_flight(self.in_flight + 1)
+        future.add_done_callback(lambda f: self.root.after(0, lambda: self._finish(task, on_done, on_error)))
+        return task
+
+    @staticmethod
+    def _run(op, fn, args, kwargs):
+        with metrics.timed(op):
+            return fn(*args, **kwargs)
+
+    def _finish(self, task, on_done, on_error):
+        self._set_in_flight(self.in_flight - 1)
+        if task.owner is not None:
+            self._owned.get(task.owner, set()).discard(task)
+        if task.cancelled:
+            return
+        error = task.future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+        elif on_done:
+            on_done(task.future.result())
+
+    def cancel_owner(self, owner):
+        for task in self._owned.pop(owner, set()):
+            task.cancel()
+
+    def _set_in_flight(self, count):
+        self.in_flight = count
+        if self.on_busy:
+            self.on_busy(count)
+
+    def shutdown(self):
+        for owner in list(self._owned):
+            self.cancel_owner(owner)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import worklog_db  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "worklogs.db")
+    with worklog_db.transaction(path) as conn:
+        worklog_db.create_schema(conn)
+    yield path
+    worklog_db.close_all()
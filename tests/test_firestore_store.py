@@ -0,0 +1,313 @@
+import pytest
+
+import metrics
+import worklog_db
+from benchmarks.fake_firestore import FakeBatch, FakeFirestoreClient, Increment, transactional
+from firestore_store import (COMPLETED_ON, HISTORY_SNAPSHOT_EVERY, SYNC_BATCH_SIZE, SYNC_MAX_ATTEMPTS, DashboardStats,
+                             JournalSyncer, JobNumberAllocator, WriteJournal, completion_fields, counter_writes, ensure_report_counters,
+                             history_by_technician, history_writes, job_history, job_state_at, load_report_rows)
+
+
+class Rejected(Exception):
+    code = 400  # InvalidArgument: fails the same way every time
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+class RejectingBatch(FakeBatch):
+    def commit(self):
+        for ref, _, _ in self.writes:
+            if ref.id in self.client.rejected:
+                raise self.client.rejected[ref.id]
+        super().commit()
+        if self.client.lost_acks:
+            self.client.lost_acks -= 1
+            raise Unavailable("deadline exceeded")  # the commit landed but the reply did not
+
+
+class RejectingClient(FakeFirestoreClient):
+    """Fake client whose batches fail when they write one of the `rejected` doc ids,
+    or after committing while `lost_acks` is positive."""
+
+    def __init__(self):
+        super().__init__()
+        self.rejected = {}
+        self.lost_acks = 0
+
+    def batch(self):
+        return RejectingBatch(self)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    yield WriteJournal(str(tmp_path / "journal.db"))
+    worklog_db.close_all()
+
+
+@pytest.fixture
+def client():
+    return RejectingClient()
+
+
+def sync_all(journal, client):
+    syncer = JournalSyncer(journal, client)
+    syncer.increment = Increment
+    syncer.transactional = transactional
+    return syncer.sync(journal.pending(syncer.batch_size))
+
+
+# --------------------------
+# Journal sync
+# --------------------------
+def test_update_of_deleted_job_is_dropped(journal, client):
+    client.collection("logs").load([("kept", {"status": "Pending"})])
+    journal.enqueue_many([("logs", "gone", "update", {"status": "Complete"}),
+                          ("report_counters", "c1", "increment", {"set": {}, "increment": {"jobs": 1}})])
+    journal.enqueue("logs", "kept", "update", {"status": "Complete"})
+
+    assert sync_all(journal, client) is None
+    assert "gone" not in client.collection("logs").docs  # not brought back by the update
+    assert "c1" not in client.collection("report_counters").docs  # its whole txn is dropped
+    assert client.collection("logs").docs["kept"] == {"status": "Complete"}
+    assert journal.count() == 0 and journal.failed_count() == 0
+
+
+def test_rejected_txn_is_set_aside_after_max_attempts(journal, client):
+    client.rejected["bad"] = Rejected("invalid argument")
+    journal.enqueue("logs", "bad", "set", {"status": "Pending"})
+    journal.enqueue("logs", "good", "set", {"status": "Pending"})
+
+    for attempt in range(SYNC_MAX_ATTEMPTS):
+        assert isinstance(sync_all(journal, client), Rejected)
+        assert "good" in client.collection("logs").docs  # not held back by the bad txn
+    assert journal.count() == 0
+    assert journal.failed_count() == 1
+
+
+def test_transient_errors_do_not_count_towards_the_cap(journal, client):
+    client.rejected["job"] = Unavailable("service unavailable")
+    journal.enqueue("logs", "job", "set", {"status": "Pending"})
+
+    for attempt in range(SYNC_MAX_ATTEMPTS + 1):
+        assert isinstance(sync_all(journal, client), Unavailable)
+    assert journal.count() == 1 and journal.failed_count() == 0
+
+    del client.rejected["job"]
+    assert sync_all(journal, client) is None
+    assert journal.count() == 0
+    assert client.collection("logs").docs["job"] == {"status": "Pending"}
+
+
+# --------------------------
+# Report counters
+# --------------------------
+def test_reports_seed_totals_and_follow_journal_writes(journal, client, monkeypatch):
+    monkeypatch.setattr(worklog_db, "report_since", lambda today=None, months=12: "2025-11")
+    client.collection("logs").load([("old", {"date": "2024-01-05", "technician": "Sarah", "status": "Complete"}),
+                                    ("new", {"date": "2026-10-17", "technician": "Sarah", "status": "Pending"})])
+    client.collection("counters").document("report_counters").set({"seeded": True})  # before report_totals
+
+    rows, totals = load_report_rows(client)
+    assert rows == [("2026-10", "Sarah", "Pending", 1)]
+    assert sorted(totals) == [("Sarah", "Complete", 1), ("Sarah", "Pending", 1)]
+
+    old = client.collection("logs").docs["new"]
+    journal.enqueue_many(counter_writes([(old, {**old, "status": "Complete"})]))
+    assert sync_all(journal, client) is None
+    rows, totals = load_report_rows(client)
+    assert rows == [("2026-10", "Sarah", "Complete", 1)]
+    assert totals == [("Sarah", "Complete", 2)]
+
+
+def test_replayed_counter_txn_is_not_counted_twice(journal, client):
+    client.collection("logs").load([("a", {"date": "2026-10-17", "technician": "Sarah", "status": "Pending"}),
+                                    ("b", {"date": "2026-10-17", "technician": "Sarah", "status": "Pending"})])
+    docs = client.collection("logs").docs
+    journal.enqueue_txns([[("logs", doc_id, "update", {"status": "Complete"})] +
+                          counter_writes([(docs[doc_id], {**docs[doc_id], "status": "Complete"})])
+                          for doc_id in ("a", "b")])
+    journal.enqueue("logs", "c", "set", {"date": "2026-10-17", "technician": "Tom", "status": "Pending"})
+
+    client.lost_acks = 1
+    assert isinstance(sync_all(journal, client), Unavailable)
+    assert journal.count() > 0  # looks unsent, so it is pushed again
+    assert sync_all(journal, client) is None
+    assert journal.count() == 0 and journal.failed_count() == 0
+    totals = client.collection("report_totals").docs
+    assert [doc["jobs"] for doc in totals.values() if doc["status"] == "Complete"] == [2]
+    assert [doc["jobs"] for doc in totals.values() if doc["status"] == "Pending"] == [-2]
+
+
+def test_counter_txn_markers_fit_in_the_batch(journal, client):
+    journal.enqueue_txns([[("report_counters", f"c{i}", "increment", {"set": {}, "increment": {"jobs": 1}})]
+                          for i in range(SYNC_BATCH_SIZE)])
+    assert sync_all(journal, client) is None
+    assert client.batches_committed == 1  # entries plus one marker per txn, within Firestore's 500
+    assert len(client.collection("applied_txns").docs) == SYNC_BATCH_SIZE
+
+
+# --------------------------
+# Dashboard stats
+# --------------------------
+def test_completed_today_counts_completions_not_job_dates(journal, client):
+    client.collection("logs").load([("a", {"date": "2026-09-01", "technician": "Sarah", "status": "Pending"}),
+                                    ("b", {"date": "2026-10-17", "technician": "Tom", "status": "Complete"}),
+                                    ("c", {"date": "2026-10-17", "technician": "Tom", "status": "In Progress"})])
+    writes = [("a", "update", {"status": "Complete"})]
+    olds = [client.collection("logs").docs["a"]]
+    completion_fields(writes, olds, today="2026-10-17")
+    journal.enqueue_many([("logs", *write) for write in writes] +
+                         counter_writes([(old, {**old, **data}) for (_, _, data), old in zip(writes, olds)]))
+    ensure_report_counters(client)
+    assert sync_all(journal, client) is None
+
+    stats = DashboardStats(client)
+    assert stats.totals("2026-10-17")["completed_today"] == 1  # a, dated last month; not b
+    assert stats.by_technician(["Sarah", "Tom"], "2026-10-17") == {"Sarah": (0, 0, 1), "Tom": (0, 1, 0)}
+
+
+def test_reopening_a_job_clears_its_completion_day():
+    writes = [("a", "update", {"status": "Pending"}), ("b", "update", {"status": "Complete"})]
+    completion_fields(writes, [{"status": "Complete", "completed_on": "2026-10-16"}, {"status": "Complete"}],
+                      today="2026-10-17")
+    assert writes[0][2] == {"status": "Pending", COMPLETED_ON: None}
+    assert writes[1][2] == {"status": "Complete"}  # already complete: keeps its day
+
+
+def test_slow_firestore_reads_log_what_they_queried(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", metrics.Metrics(slow_seconds=0))
+    for name in ("timed", "add", "note_query", "record"):
+        monkeypatch.setattr(metrics, name, getattr(metrics.METRICS, name))
+    client.collection("logs").load([("a", {"technician": "Sarah", "status": "Pending", COMPLETED_ON: "2026-10-17"})])
+
+    with metrics.timed("dashboard.refresh"):
+        DashboardStats(client).by_technician(["Sarah"], "2026-10-17")
+
+    entry, = [entry for entry in metrics.METRICS.slow if entry["op"] == "dashboard.refresh"]
+    assert any('collection_id: "report_totals"' in query and '"status" op: "in"' in query
+               for query in entry["queries"])
+    completed, = [query for query in entry["queries"] if "aggregations" in query]
+    assert 'collection_id: "logs"' in completed and "'Sarah'" in completed and "'2026-10-17'" in completed
+
+
+# --------------------------
+# Job history
+# --------------------------
+def write_job_history(journal, client, doc_id, changes):
+    """Journal and sync a create plus one update per (at, fields) in `changes`."""
+    data, old = {"jobnum": "7", "technician": "Sarah", "status": "Pending"}, None
+    for i, (at, fields) in enumerate([("2026-10-01 09:00:00.000", data)] + changes):
+        write = (doc_id, "set" if old is None else "update", dict(fields))
+        journal.enqueue_many([("logs", *write)] + history_writes([doc_id], at=at))
+        old = {**(old or {}), **write[2]}
+    assert sync_all(journal, client) is None
+
+
+def test_job_state_at_replays_from_the_nearest_snapshot(journal, client):
+    changes = [(f"2026-10-02 10:{minute:02d}:00.000", {"description": f"step {minute}"})
+               for minute in range(1, HISTORY_SNAPSHOT_EVERY + 5)]
+    write_job_history(journal, client, "job1", changes)
+
+    assert job_state_at(client, "job1", "2026-09-30") is None
+    assert job_state_at(client, "job1", "2026-10-01 12:00") == {"jobnum": "7", "technician": "Sarah", "status": "Pending"}
+    state = job_state_at(client, "job1", "2026-10-02 10:22:30")
+    assert state["description"] == "step 22" and state["technician"] == "Sarah"
+    history = job_history(client, "job1")
+    assert [event["version"] for event in history] == list(range(1, HISTORY_SNAPSHOT_EVERY + 6))
+    assert [event["version"] for event in history if event.get("snapshot")] == [HISTORY_SNAPSHOT_EVERY]
+
+
+def test_history_by_technician_spans_jobs(journal, client):
+    write_job_history(journal, client, "job1", [("2026-10-05 08:00:00.000", {"status": "Complete"})])
+    write_job_history(journal, client, "job2", [("2026-10-06 08:00:00.000", {"technician": "Tom"})])
+
+    events = history_by_technician(client, "Sarah", "2026-10-02")
+    assert [(event["job"], event["op"]) for event in events] == [("job1", "update")]
+    assert [event["job"] for event in history_by_technician(client, "Tom", "2026-10-01")] == ["job2"]
+
+
+def test_concurrent_writers_get_consecutive_versions(tmp_path, client):
+    write_job_history(WriteJournal(str(tmp_path / "a.db")), client, "job1", [])
+    terminals = [WriteJournal(str(tmp_path / f"{name}.db")) for name in ("b", "c")]
+    # Both edit version 1 offline, each unaware of the other's change
+    for terminal, fields in zip(terminals, [{"status": "In Progress"}, {"description": "brakes"}]):
+        terminal.enqueue_many([("logs", "job1", "update", fields)]
+                              + history_writes(["job1"], at="2026-10-02 09:00:00.000"))
+    for terminal in terminals:
+        assert sync_all(terminal, client) is None
+    worklog_db.close_all()
+
+    history = job_history(client, "job1")
+    assert [(event["version"], event["op"]) for event in history] == [(1, "create"), (2, "update"), (3, "update")]
+    assert history[1]["changes"] == {"status": ["Pending", "In Progress"]}
+    assert history[2]["changes"] == {"description": [None, "brakes"]}  # not every field
+    assert client.collection("logs").docs["job1"]["history_version"] == 3
+    assert job_state_at(client, "job1", "2026-10-02 12:00")["status"] == "In Progress"
+
+
+# --------------------------
+# Job numbers
+# --------------------------
+class Offline(Exception):
+    pass
+
+
+@pytest.fixture
+def allocator(journal, client, monkeypatch):
+    counter = {"next": 100, "online": True}
+
+    def reserve_block(self):
+        if not counter["online"]:
+            raise Offline("no network")
+        start = counter["next"]
+        counter["next"] += self.block_size
+        return start
+    monkeypatch.setattr(JobNumberAllocator, "_reserve_block", reserve_block)
+    allocator = JobNumberAllocator(client, block_size=4, path=journal.path)
+    allocator.counter = counter
+    return allocator
+
+
+def test_job_numbers_come_from_reserved_blocks(allocator):
+    assert [allocator.next() for _ in range(6)] == ["100", "101", "102", "103", "104", "105"]
+    assert allocator.available() == 2
+
+
+def test_top_up_reserves_ahead_so_numbers_last_offline(allocator, journal, client):
+    allocator.next()
+    allocator.top_up()  # 3 left of 4: nothing to do yet
+    assert allocator.available() == 3
+    allocator.next()
+    allocator.top_up()
+    assert allocator.available() == 6
+
+    allocator.counter["online"] = False
+    assert [allocator.next() for _ in range(4)] == ["102", "103", "104", "105"]
+    with pytest.raises(Offline):
+        allocator.top_up()
+    restarted = JobNumberAllocator(client, block_size=4, path=journal.path)  # kept in the journal database
+    assert [restarted.next() for _ in range(2)] == ["106", "107"]
+    with pytest.raises(Offline):
+        restarted.next()
+
+
+def test_bulk_edit_keeps_jobs_when_one_was_deleted_elsewhere(journal, client):
+    jobs = {doc_id: {"date": "2026-10-17", "technician": "Sarah", "status": "Pending"} for doc_id in ("a", "gone", "b")}
+    client.collection("logs").load(jobs.items())
+    ensure_report_counters(client)
+    journal.enqueue_txns([[("logs", doc_id, "update", {"status": "Complete"})]
+                          + counter_writes([(job, {**job, "status": "Complete"})])
+                          + history_writes([doc_id])
+                          for doc_id, job in jobs.items()])
+    client.collection("logs").docs.pop("gone")  # deleted on another terminal
+
+    assert sync_all(journal, client) is None
+    logs = client.collection("logs").docs
+    assert logs["a"]["status"] == logs["b"]["status"] == "Complete" and "gone" not in logs
+    assert [event["op"] for event in job_history(client, "a")] == ["update"]
+    assert job_history(client, "gone") == []
+    totals = client.collection("report_totals").docs
+    assert totals["Sarah|Complete"]["jobs"] == 2 and totals["Sarah|Pending"]["jobs"] == 1  # the seed counted gone
+    assert journal.count() == 0 and journal.failed_count() == 0
@@ -0,0 +1,105 @@
+import pytest
+
+from view_model import PickerIndex, SortedTreeRows
+
+
+# --------------------------
+# Sorted Treeview rows
+# --------------------------
+class FakeTree:
+    """The ttk.Treeview calls SortedTreeRows makes, on a plain list."""
+
+    def __init__(self):
+        self.children = []
+        self.values = {}
+
+    def get_children(self):
+        return tuple(self.children)
+
+    def insert(self, parent, index, iid, values):
+        self.children.insert(index, iid)
+        self.values[iid] = values
+
+    def item(self, iid, values):
+        self.values[iid] = values
+
+    def move(self, iid, parent, index):
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.children.remove(iid)
+            del self.values[iid]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_rows_stay_in_sort_order_through_upserts_and_removes(descending):
+    tree = FakeTree()
+    rows = SortedTreeRows(tree, descending=descending)
+    for iid, date in [("a", "2026-10-03"), ("b", "2026-10-01"), ("c", "2026-10-02")]:
+        rows.upsert(iid, (date,), (date, iid))
+    rows.upsert("b", ("2026-10-04",), ("2026-10-04", "b"))  # moved by an edit
+    rows.upsert("c", ("edited",), ("2026-10-02", "c"))       # same key: values only
+    assert rows.remove("a") and not rows.remove("a")
+
+    expected = ["c", "b"]
+    assert list(tree.get_children()) == (expected[::-1] if descending else expected)
+    assert tree.values["c"] == ("edited",) and len(rows) == 2 and "a" not in rows
+    assert rows.edge_iids(1, from_top=True) == tree.get_children()[:1]
+
+    rows.reset(descending=not descending)
+    assert tree.get_children() == () and len(rows) == 0
+
+
+def test_covers_is_open_on_the_sides_already_fully_loaded():
+    rows = SortedTreeRows(FakeTree(), descending=True)
+    assert rows.covers(("2026-10-01", "x"))  # empty and complete
+    for iid, date in [("a", "2026-10-05"), ("b", "2026-10-10")]:
+        rows.upsert(iid, (date,), (date, iid))
+
+    assert rows.covers(("2026-10-07", "x"), at_start=False, at_end=False)
+    assert not rows.covers(("2026-10-01", "x"), at_start=True, at_end=False)  # older than the loaded page
+    assert rows.covers(("2026-10-01", "x"), at_start=False, at_end=True)
+    assert not rows.covers(("2026-10-12", "x"), at_start=False, at_end=True)  # newer than the loaded page
+
+
+# --------------------------
+# Picker search index
+# --------------------------
+@pytest.fixture(params=[1, 100], ids=["inserts", "bulk"])
+def padding(request):
+    """Extra entries per add_many call, so both the insert and the re-sort paths run."""
+    return [(f"Filler {i}", "") for i in range(request.param)]
+
+
+def test_duplicate_keys_in_one_batch_are_indexed_once(padding):
+    index = PickerIndex()
+    index.add_many(padding + [("Dup", "AB12 CDE"), ("Dup", "XY99 ZZZ")])
+
+    assert index.search("dup") == ["Dup"]
+    assert index.search("xy99zzz") == ["Dup"]  # the last entry wins
+    assert index.search("ab12") == []
+    index.remove("Dup")
+    assert index.search("dup") == [] and "Dup" not in index
+    assert len(index.word_list) == len(index.word_keys) == sum(len(words) for words in index.words.values())
+
+
+def test_search_puts_prefix_matches_first_and_needs_every_word():
+    index = PickerIndex()
+    index.replace([("Ford Transit", "AB12 CDE"), ("Transit Connect", "XY34 FGH"), ("Ford Focus", "ZZ99 ZZZ")])
+
+    assert index.search("trans") == ["Transit Connect", "Ford Transit"]
+    assert index.search("ford tr") == ["Ford Transit"]
+    assert index.search("ab12cde") == ["Ford Transit"]
+    assert index.search("") == ["Ford Focus", "Ford Transit", "Transit Connect"]
+    assert index.search("fo", limit=1) == ["Ford Focus"]
+
+
+def test_add_replaces_the_entry_under_the_same_key():
+    index = PickerIndex()
+    index.add("Sarah", "day shift")
+    index.add("Sarah", "night shift")
+
+    assert len(index) == 1
+    assert index.search("night") == ["Sarah"] and index.search("day") == []
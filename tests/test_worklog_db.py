@@ -0,0 +1,165 @@
+from datetime import date
+
+import pytest
+
+import worklog_db
+
+
+# --------------------------
+# Schema
+# --------------------------
+def test_create_schema_is_atomic(db_path, monkeypatch):
+    with worklog_db.transaction(db_path) as conn:
+        conn.execute("INSERT INTO logs (jobnum, date) VALUES ('1', '10/17/26')")
+        conn.execute("PRAGMA user_version = 0")
+
+    def fail(cursor):
+        raise RuntimeError("crash after the date migration")
+    monkeypatch.setattr(worklog_db, "create_sort_indexes", fail)
+    with pytest.raises(RuntimeError):
+        with worklog_db.transaction(db_path) as conn:
+            worklog_db.create_schema(conn)
+
+    conn = worklog_db.get_connection(db_path)
+    assert conn.execute("SELECT date FROM logs").fetchone()[0] == "10/17/26"
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+
+    monkeypatch.undo()
+    with worklog_db.transaction(db_path) as conn:
+        worklog_db.create_schema(conn)
+    assert conn.execute("SELECT date FROM logs").fetchone()[0] == "2026-10-17"
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == worklog_db.SCHEMA_VERSION
+
+
+def test_create_schema_twice_keeps_triggers(db_path):
+    with worklog_db.transaction(db_path) as conn:
+        worklog_db.create_schema(conn)
+        worklog_db.insert_log(conn, "1", "1HGCM82633A004352", "Sarah", "brakes", "2026-10-17")
+    assert worklog_db.summary_rows(conn) == [("2026-10", "Sarah", "Pending", 1)]
+    assert [row[2] for row in worklog_db.log_history(conn, 1)] == ["create"]
+
+
+# --------------------------
+# Keyset paging
+# --------------------------
+def add_logs(path, rows):
+    with worklog_db.transaction(path) as conn:
+        for jobnum, vin, technician, description in rows:
+            conn.execute("INSERT INTO logs (jobnum, vin, technician, description, date, date_key) "
+                         "VALUES (?, ?, ?, ?, '2026-10-17', ?)",
+                         (jobnum, vin, technician, description, worklog_db.date_key("2026-10-17")))
+    return worklog_db.get_connection(path)
+
+
+def page_through(conn, sort, descending, limit=1):
+    ids, after = [], None
+    while True:
+        rows = worklog_db.fetch_log_page(conn, {}, sort=sort, descending=descending, after=after, limit=limit)
+        ids += [row[0] for row in rows]
+        if len(rows) < limit:
+            return ids
+        after = worklog_db.log_key(rows[-1])
+
+
+def page_back(conn, sort, descending, last_row, limit=1):
+    ids, before = [], worklog_db.log_key(last_row)
+    while True:
+        rows = worklog_db.fetch_log_page(conn, {}, sort=sort, descending=descending, before=before, limit=limit)
+        ids = [row[0] for row in rows] + ids
+        if len(rows) < limit:
+            return ids
+        before = worklog_db.log_key(rows[0])
+
+
+def test_paging_keeps_null_technicians(db_path):
+    conn = add_logs(db_path, [("1", "A", "bob", "x"), ("2", "B", "carl", "x"), ("3", "C", None, "x"),
+                              ("4", "D", "dave", "x")])
+    assert page_through(conn, "technician", True) == [4, 2, 1, 3]
+    assert page_through(conn, "technician", False) == [3, 1, 2, 4]
+
+
+@pytest.mark.parametrize("sort", list(worklog_db.SORT_KEYS))
+@pytest.mark.parametrize("descending", [True, False])
+def test_paging_matches_full_order_with_nulls(db_path, sort, descending):
+    conn = add_logs(db_path, [(None if i % 4 == 0 else str(i % 5), None if i % 3 == 0 else f"V{i % 6}",
+                               None if i % 5 == 0 else ["amy", "Bob", "cat"][i % 3],
+                               None if i % 7 == 0 else f"job {i % 4}") for i in range(40)])
+    rows = worklog_db.fetch_log_page(conn, {}, sort=sort, descending=descending, limit=1000)
+    expected = [row[0] for row in rows]
+    assert len(expected) == 40
+    assert page_through(conn, sort, descending, limit=3) == expected
+    assert page_back(conn, sort, descending, rows[-1], limit=3) == expected[:-1]
+    assert sorted(rows, key=lambda row: worklog_db.order_key(row, sort), reverse=descending) == rows
+
+
+@pytest.mark.parametrize("sort", [sort for sort in worklog_db.SORT_KEYS if sort != "description"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_page_seeks_the_sort_index(db_path, sort, descending):
+    conn = add_logs(db_path, [(str(i), f"V{i}", f"tech {i % 9}", "x") for i in range(500)])
+    conn.execute("ANALYZE")
+    for after, before in (((0, 250), None), (None, (0, 250))):
+        query, params = worklog_db.log_page_query(conn, {}, sort, descending, after, before)
+        details = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+        assert details.startswith("SEARCH logs"), details
+        assert "TEMP B-TREE" not in details
+
+
+# --------------------------
+# Reports
+# --------------------------
+def test_totals_follow_every_kind_of_write(db_path):
+    with worklog_db.transaction(db_path) as conn:
+        worklog_db.insert_log(conn, "1", "A", "Sarah", "brakes", "2024-01-05")
+        worklog_db.insert_log(conn, "2", "B", "Sarah", "tyres", "2026-10-17")
+        worklog_db.insert_logs(conn, [("3", "C", "Tom", "oil", "2026-09-01", "Complete"),
+                                      ("4", "D", "Sarah", "oil", "2025-02-01", "Pending")])
+        worklog_db.update_log(conn, 1, "1", "A", "Tom", "brakes", "2024-01-05", "Complete")
+        worklog_db.delete_logs(conn, [2])
+    assert sorted(worklog_db.total_rows(conn)) == [("Sarah", "Pending", 1), ("Tom", "Complete", 2)]
+
+
+def test_reports_read_only_recent_months(db_path):
+    with worklog_db.transaction(db_path) as conn:
+        worklog_db.insert_logs(conn, [("1", "A", "Sarah", "x", "2024-01-05", "Complete"),
+                                      ("2", "B", "Sarah", "x", "2026-10-17", "Complete"),
+                                      ("3", "C", "Tom", "x", "2025-11-01", "Pending")])
+    since = worklog_db.report_since(date(2026, 10, 17))
+    assert since == "2025-11"
+    monthly, workload = worklog_db.build_reports(worklog_db.summary_rows(conn, since), worklog_db.total_rows(conn))
+    assert monthly == [("2026-10", 1)]
+    assert workload == [("Tom", 1, 0, 0, 1), ("Sarah", 0, 0, 2, 2)]
+
+
+# --------------------------
+# Ranked search
+# --------------------------
+def test_relevance_sort_pages_best_matches_first(db_path):
+    conn = add_logs(db_path, [("1", "A", "bob", "oil change"), ("2", "B", "bob", "brake pads, brake fluid, brake discs"),
+                              ("3", "C", "bob", "check brake"), ("4", "D", "bob", "brake brake")])
+    search = {"text": "brake"}
+    rows = worklog_db.fetch_log_page(conn, search, sort=worklog_db.RELEVANCE, limit=10)
+    assert [row[0] for row in rows][0] == 4 and sorted(row[0] for row in rows) == [2, 3, 4]
+
+    ids, after = [], None
+    while True:
+        page = worklog_db.fetch_log_page(conn, search, sort=worklog_db.RELEVANCE, after=after, limit=1)
+        if not page:
+            break
+        ids.append(page[0][0])
+        after = worklog_db.log_key(page[0])
+    assert ids == [row[0] for row in rows]
+    assert worklog_db.fetch_log_row(conn, 3, search, worklog_db.RELEVANCE) == rows[ids.index(3)]
+
+
+def test_relevance_without_search_text_sorts_by_date(db_path):
+    conn = add_logs(db_path, [("1", "A", "bob", "x"), ("2", "B", "bob", "y")])
+    assert worklog_db.fetch_log_page(conn, {}, sort=worklog_db.RELEVANCE) == worklog_db.fetch_log_page(conn, {})
+
+
+def test_search_matches_substrings_in_any_field(db_path):
+    conn = add_logs(db_path, [("101", "1HGCM82633A004352", "Sarah", "front brakes"), ("102", "JH4KA", "Tom", "oil")])
+    assert worklog_db.count_logs(conn, text="rake") == 1           # trigram index
+    assert worklog_db.count_logs(conn, text="82633A") == 1         # VIN through the same index
+    assert worklog_db.count_logs(conn, text="il") == 1             # too short for trigrams: LIKE
+    assert worklog_db.count_logs(conn, technician="sar", text="brake") == 1
+    assert worklog_db.count_logs(conn, technician="tom", text="brake") == 0
@@ -0,0 +1,108 @@
+import csv
+import gzip
+import json
+import threading
+
+import pytest
+
+import worklog_db
+import worklog_io
+
+VIN = "1HGCM82633A004352"
+
+
+def write_csv(path, rows, header=("jobnum", "vin", "technician", "description", "date", "status")):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+# --------------------------
+# CSV import
+# --------------------------
+def test_import_batches_rows_and_sets_aside_rejects(db_path, tmp_path):
+    source = write_csv(tmp_path / "jobs.csv", [
+        ("101", VIN, "Sarah", "brakes", "10/17/26", ""),
+        ("102", VIN, "Tom", "tyres", "2026-10-16", "Complete"),
+        ("103", "SHORT", "Tom", "oil", "2026-10-16", ""),
+        ("104", VIN, "Tom", "oil", "someday", ""),
+        ("105", VIN, "Tom", "oil", "2026-10-16", "Lost"),
+        ("106", VIN, "Ann", "", "2026-10-16", ""),
+        ("107", VIN, "Ann", "wipers", "2026-10-15", ""),
+    ])
+    calls = []
+
+    result = worklog_io.import_csv(source, db_path, batch_size=2, progress=lambda *args: calls.append(args))
+
+    assert (result.imported, result.rejected, result.new_technicians) == (3, 4, 2)  # Sarah was already known
+    assert [rows for rows, _ in calls] == [2, 7] and calls[-1][1] == 1.0
+    conn = worklog_db.get_connection(db_path)
+    assert conn.execute("SELECT jobnum, date, status FROM logs ORDER BY jobnum").fetchall() == [
+        ("101", "2026-10-17", "Pending"), ("102", "2026-10-16", "Complete"), ("107", "2026-10-15", "Pending")]
+    assert {"Ann", "Sarah", "Tom"} <= set(worklog_db.load_technician_names(conn))
+    with open(result.reject_path, newline="", encoding="utf-8") as f:
+        rejects = list(csv.DictReader(f))
+    assert [(row["jobnum"], row["error"]) for row in rejects] == [
+        ("103", "VIN must be exactly 17 alphanumeric characters."), ("104", "Unrecognised date: someday"),
+        ("105", "Unknown status: Lost"), ("106", "Missing required field(s)")]
+
+
+def test_import_needs_every_required_column(db_path, tmp_path):
+    source = write_csv(tmp_path / "jobs.csv", [("101", VIN, "Sarah", "2026-10-17")],
+                       header=("JobNum", "VIN", "Technician", "Date"))
+    with pytest.raises(ValueError, match=r"missing column\(s\): description$"):
+        worklog_io.import_csv(source, db_path)
+    assert worklog_db.count_logs(worklog_db.get_connection(db_path)) == 0
+
+
+# --------------------------
+# Export
+# --------------------------
+def fill(db_path, tmp_path, count=25):
+    source = write_csv(tmp_path / "seed.csv", [(str(100 + i), VIN, ("Sarah", "Tom")[i % 2], f"job {i}",
+                                                f"2026-10-{1 + i % 28:02d}", ("Pending", "Complete")[i % 3 == 0])
+                                               for i in range(count)])
+    worklog_io.import_csv(source, db_path)
+
+
+def test_export_then_import_round_trips(db_path, tmp_path):
+    fill(db_path, tmp_path)
+    exported = str(tmp_path / "out.csv")
+    assert worklog_io.export_logs(exported, db_path=db_path) == 25
+
+    copy = str(tmp_path / "copy.db")
+    with worklog_db.transaction(copy) as conn:
+        worklog_db.create_schema(conn)
+    assert worklog_io.import_csv(exported, copy).imported == 25
+
+    query = "SELECT jobnum, vin, technician, description, date, status FROM logs ORDER BY jobnum"
+    assert (worklog_db.get_connection(copy).execute(query).fetchall()
+            == worklog_db.get_connection(db_path).execute(query).fetchall())
+
+
+def test_export_formats_write_the_same_rows(db_path, tmp_path):
+    fill(db_path, tmp_path)
+    filters = {"technician": "Tom"}
+    for name in ("out.csv", "out.csv.gz", "out.jsonl"):
+        assert worklog_io.export_logs(str(tmp_path / name), filters, sort="jobnum", descending=False,
+                                      db_path=db_path) == 12
+
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    with gzip.open(tmp_path / "out.csv.gz", "rt", newline="", encoding="utf-8") as f:
+        assert list(csv.DictReader(f)) == rows
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        assert [{key: str(value) for key, value in json.loads(line).items()} for line in f] == rows
+    assert [row["jobnum"] for row in rows] == [str(100 + i) for i in range(1, 25, 2)]
+
+
+def test_cancelled_export_leaves_no_file(db_path, tmp_path):
+    fill(db_path, tmp_path)
+    cancel = threading.Event()
+    cancel.set()
+    target = tmp_path / "out.csv"
+    with pytest.raises(worklog_io.ExportCancelled):
+        worklog_io.export_logs(str(target), db_path=db_path, cancel=cancel)
+    assert list(tmp_path.glob("out.csv*")) == []
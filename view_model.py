@@ -0,0 +1,200 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+
+# --------------------------
+# Sorted Treeview rows
+# --------------------------
+class SortedTreeRows:
+    """Keeps a ttk.Treeview's rows in sort order and applies changes one row at a time.
+
+    Every row is identified by its iid and placed by a Python-comparable sort
+    key (ending with a unique id, so keys never tie). upsert() and remove()
+    touch exactly one Treeview item; only a new sort or filter needs reset()
+    and a fresh query.
+    """
+
+    def __init__(self, tree, descending=False):
+        self.tree = tree
+        self.descending = descending
+        self.keys = {}   # iid -> sort key
+        self.order = []  # sort keys, ascending
+
+    def reset(self, descending=None):
+        if descending is not None:
+            self.descending = descending
+        self.tree.delete(*self.tree.get_children())
+        self.keys.clear()
+        self.order.clear()
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, iid):
+        return iid in self.keys
+
+    def _index(self, pos):
+        # Position in the Treeview for position `pos` in the ascending list
+        return len(self.order) - 1 - pos if self.descending else pos
+
+    def upsert(self, iid, values, key):
+        """Insert or update one row and move it to where `key` sorts."""
+        old = self.keys.get(iid)
+        if old == key:
+            self.tree.item(iid, values=values)
+            return
+        if old is not None:
+            self.order.pop(bisect_left(self.order, old))
+        pos = bisect_left(self.order, key)
+        self.order.insert(pos, key)
+        self.keys[iid] = key
+        if old is None:
+            self.tree.insert("", self._index(pos), iid=iid, values=values)
+        else:
+            self.tree.item(iid, values=values)
+            self.tree.move(iid, "", self._index(pos))
+
+    def remove(self, iid):
+        key = self.keys.pop(iid, None)
+        if key is None:
+            return False
+        self.order.pop(bisect_left(self.order, key))
+        self.tree.delete(iid)
+        return True
+
+    def edge_iids(self, count, from_top):
+        """iids of the first (from_top) or last `count` rows as displayed."""
+        children = self.tree.get_children()
+        return children[:count] if from_top else children[len(children) - count:]
+
+    def covers(self, key, at_start=True, at_end=True):
+        """Whether `key` falls inside the loaded window of rows.
+
+        at_start / at_end say whether the window already reaches the first /
+        last row of the full result, in which case it is open on that side.
+        """
+        if not self.order:
+            return at_start and at_end
+        low, high = self.order[0], self.order[-1]
+        if self.descending:
+            return (at_start or key <= high) and (at_end or key >= low)
+        return (at_start or key >= low) and (at_end or key <= high)
+
+
+# --------------------------
+# Picker search index
+# --------------------------
+PICKER_LIMIT = 50  # matches shown in a picker's dropdown
+
+
+_WORD = re.compile(r"[^\W_]+")  # runs of letters and digits
+
+
+def picker_words(text):
+    return _WORD.findall((text or "").casefold())
+
+
+class PickerIndex:
+    """Type-to-filter lookup for picker entries (vehicle labels, technician names).
+
+    Every entry is indexed under each word of its key and extra fields, plus
+    multi-word fields run together (so "ab12cde" finds registration
+    "AB12 CDE"). The words are kept in one sorted list beside the key of each,
+    so the entries under a prefix are a bisect and a slice. An entry matches
+    when every typed word prefixes one of its words.
+    """
+
+    def __init__(self, limit=PICKER_LIMIT):
+        self.limit = limit
+        self.word_list = []  # every indexed word, sorted
+        self.word_keys = []  # the key each word_list entry belongs to
+        self.labels = []     # sorted (casefolded key, key)
+        self.words = {}      # key -> the words it is indexed under
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, key):
+        return key in self.words
+
+    def _entry_words(self, key, fields):
+        words = set(picker_words(key))
+        for field in fields:
+            parts = picker_words(str(field or ""))
+            words.update(parts)
+            if len(parts) > 1:
+                words.add("".join(parts))
+        return words
+
+    def add(self, key, *fields):
+        self.add_many([(key, *fields)])
+
+    def add_many(self, entries):
+        """Index (key, *fields) entries, replacing any already indexed under the same key
+        (the last of several with one key wins)."""
+        entries = list({entry[0]: entry for entry in entries}.values())
+        for key, *_ in entries:
+            self.remove(key)
+        if len(entries) > 64:
+            # A first load or big change: one sort beats thousands of list inserts
+            pairs = list(zip(self.word_list, self.word_keys))
+            for key, *fields in entries:
+                self.words[key] = self._entry_words(key, fields)
+                pairs.extend((word, key) for word in self.words[key])
+                self.labels.append((key.casefold(), key))
+            pairs.sort()
+            self.word_list = [word for word, _ in pairs]
+            self.word_keys = [key for _, key in pairs]
+            self.labels.sort()
+            return
+        for key, *fields in entries:
+            self.words[key] = self._entry_words(key, fields)
+            for word in self.words[key]:
+                i = bisect_right(self.word_list, word)
+                self.word_list.insert(i, word)
+                self.word_keys.insert(i, key)
+            insort(self.labels, (key.casefold(), key))
+
+    def remove(self, key):
+        words = self.words.pop(key, None)
+        if words is None:
+            return
+        for word in words:
+            lo = bisect_left(self.word_list, word)
+            i = self.word_keys.index(key, lo, bisect_right(self.word_list, word))
+            del self.word_list[i]
+            del self.word_keys[i]
+        del self.labels[bisect_left(self.labels, (key.casefold(), key))]
+
+    def replace(self, entries):
+        self.word_list, self.word_keys, self.labels = [], [], []
+        self.words.clear()
+        self.add_many(entries)
+
+    def search(self, text, limit=None):
+        """Up to `limit` keys matching `text`: keys starting with it first, then A-Z."""
+        limit = limit or self.limit
+        terms = picker_words(text)
+        if not terms:
+            return [key for _, key in self.labels[:limit]]
+
+        matches = None
+        for term in sorted(set(terms), key=len, reverse=True):  # longest first narrows fastest
+            lo = bisect_left(self.word_list, term)
+            hi = bisect_left(self.word_list, term + "\U0010ffff", lo)
+            found = set(self.word_keys[lo:hi])
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+
+        typed = text.strip().casefold()
+        shown = []
+        for i in range(bisect_left(self.labels, (typed,)), len(self.labels)):
+            folded, key = self.labels[i]
+            if len(shown) == limit or not folded.startswith(typed):
+                break
+            if key in matches:
+                shown.append(key)
+        if len(shown) < limit:
+            rest = sorted(matches.difference(shown), key=str.casefold)
+            shown.extend(rest[:limit - len(shown)])
+        return shown
@@ -0,0 +1,194 @@
+"""Headless command line for the SQLite work log (no Tk needed).
+
+    python -m worklog_cli import jobs.csv
+    python -m worklog_cli export nightly.csv.gz --technician Sarah
+    python -m worklog_cli query --text brake --from 2026-01-01 --limit 20
+    python -m worklog_cli stats
+    python -m worklog_cli history --job 42 --at "2026-03-01 12:00"
+    python -m worklog_cli --metrics timings.json query --text brake
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import metrics
+import worklog_db
+import worklog_io
+
+# --------------------------
+# Commands
+# --------------------------
+def cmd_import(args, conn):
+    def progress(rows_read, fraction):
+        if not args.quiet:
+            print(f"\r{rows_read:,} rows read ({fraction:.0%})", end="", file=sys.stderr, flush=True)
+
+    result = worklog_io.import_csv(args.file, args.db, progress=progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Imported {result.imported} jobs, rejected {result.rejected}, "
+          f"added {result.new_technicians} technician(s)")
+    if result.reject_path:
+        print(f"Rejected rows written to {result.reject_path}")
+    return 0
+
+
+def cmd_export(args, conn):
+    def progress(rows_written, fraction):
+        if not args.quiet:
+            print(f"\r{rows_written:,} rows written ({fraction:.0%})", end="", file=sys.stderr, flush=True)
+
+    written = worklog_io.export_logs(args.file, filters(args), sort(args), not args.asc,
+                                     fmt=args.format, db_path=args.db, progress=progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Exported {written} jobs to {args.file}")
+    return 0
+
+
+def cmd_query(args, conn):
+    rows = worklog_db.fetch_log_page(conn, filters(args), sort=sort(args), descending=not args.asc, limit=args.limit)
+    rows = [row[:len(worklog_io.EXPORT_COLUMNS)] for row in rows]
+    if args.format == "jsonl":
+        for row in rows:
+            print(json.dumps(dict(zip(worklog_io.EXPORT_COLUMNS, row)), ensure_ascii=False))
+    elif args.format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(worklog_io.EXPORT_COLUMNS)
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            print("\t".join(str(value) for value in row))
+    return 0
+
+
+def cmd_stats(args, conn):
+    terms = filters(args)
+    first, last = worklog_db.date_range(conn, **terms)
+    stats = {
+        "jobs": worklog_db.count_logs(conn, **terms),
+        "first_date": first,
+        "last_date": last,
+        "by_status": dict(worklog_db.count_logs_by(conn, "status", **terms)),
+        "by_technician": dict(worklog_db.count_logs_by(conn, "technician", **terms)),
+    }
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+    print(f"Jobs: {stats['jobs']}")
+    print(f"Dates: {first or '-'} to {last or '-'}")
+    for title, key in (("By status", "by_status"), ("By technician", "by_technician")):
+        print(f"{title}:")
+        for value, count in stats[key].items():
+            print(f"  {value:<20} {count}")
+    return 0
+
+
+def cmd_history(args, conn):
+    if args.job is not None and args.at:
+        state = worklog_db.log_state_at(conn, args.job, args.at)
+        print(json.dumps(state, indent=2) if state else f"Job {args.job} did not exist at {args.at}")
+        return 0
+    if args.job is not None:
+        events = [(args.job, *event) for event in worklog_db.log_history(conn, args.job)]
+    elif args.technician:
+        since = args.since or (date.today() - timedelta(days=date.today().weekday())).isoformat()
+        events = [(log_id, version, at, op, None, changes) for log_id, version, at, op, changes
+                  in worklog_db.history_by_technician(conn, args.technician, since)]
+    else:
+        raise ValueError("history needs --job or --technician")
+    for log_id, version, at, op, technician, changes in events:
+        print(f"{at}  job {log_id} v{version}  {worklog_db.describe_changes(op, changes)}")
+    return 0
+
+
+# --------------------------
+# Argument parsing
+# --------------------------
+def sort(args):
+    return args.sort or (worklog_db.RELEVANCE if args.text else "date")
+
+
+def filters(args):
+    return {"jobnum": args.jobnum, "vin": args.vin, "technician": args.technician, "text": args.text,
+            "date_from": args.date_from, "date_to": args.date_to}
+
+
+def add_filter_args(parser):
+    group = parser.add_argument_group("filters (same as the viewer's search boxes)")
+    group.add_argument("--jobnum", default="")
+    group.add_argument("--vin", default="")
+    group.add_argument("--technician", default="")
+    group.add_argument("--text", default="", help="match any field, including the description")
+    group.add_argument("--from", dest="date_from", default="", help="jobs on or after this date (YYYY-MM-DD)")
+    group.add_argument("--to", dest="date_to", default="", help="jobs on or before this date")
+
+
+def add_sort_args(parser):
+    parser.add_argument("--sort", choices=list(worklog_db.SORTS),
+                        help="default: relevance with --text, otherwise date")
+    parser.add_argument("--asc", action="store_true", help="ascending order (default: newest/highest first)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m worklog_cli", description="Work log data tools (SQLite).")
+    parser.add_argument("--db", default=worklog_db.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--metrics", metavar="FILE", help="write per-query timings and the slow-query log here as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import", help="import jobs from a CSV file")
+    p.add_argument("file")
+    p.add_argument("--quiet", "-q", action="store_true", help="no progress output")
+    p.set_defaults(run=cmd_import)
+
+    p = commands.add_parser("export", help="export matching jobs to .csv, .csv.gz or .jsonl")
+    p.add_argument("file")
+    p.add_argument("--quiet", "-q", action="store_true", help="no progress output")
+    p.add_argument("--format", choices=sorted(set(worklog_io.EXPORT_FORMATS.values())),
+                   help="default: from the file extension")
+    add_filter_args(p)
+    add_sort_args(p)
+    p.set_defaults(run=cmd_export)
+
+    p = commands.add_parser("query", help="print matching jobs")
+    p.add_argument("--limit", type=int, default=50)
+    p.add_argument("--format", choices=("table", "csv", "jsonl"), default="table")
+    add_filter_args(p)
+    add_sort_args(p)
+    p.set_defaults(run=cmd_query)
+
+    p = commands.add_parser("stats", help="print job counts")
+    p.add_argument("--json", action="store_true")
+    add_filter_args(p)
+    p.set_defaults(run=cmd_stats)
+
+    p = commands.add_parser("history", help="print a job's change history or a technician's recent changes")
+    p.add_argument("--job", type=int, help="log id")
+    p.add_argument("--at", help="with --job: print the job as it was at this time")
+    p.add_argument("--technician")
+    p.add_argument("--since", help="with --technician: changes from this date (default: start of this week)")
+    p.set_defaults(run=cmd_history)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        with worklog_db.transaction(args.db) as conn:
+            worklog_db.create_schema(conn)
+        with metrics.timed(f"cli.{args.command}"):
+            return args.run(args, conn)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        worklog_db.close_all()
+        if args.metrics:
+            metrics.METRICS.dump(args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,904 @@
+import json
+import sqlite3
+import threading
+import atexit
+from contextlib import contextmanager
+from datetime import datetime, date
+from functools import lru_cache
+
+import metrics
+
+# --------------------------
+# Settings
+# --------------------------
+DB_PATH = "worklogs.db"
+
+SETTINGS = {
+    "busy_timeout_ms": 5000,    # wait this long on a locked database before failing
+    "cache_size_kb": 16384,     # page cache per connection (16 MB)
+    "cached_statements": 256,   # prepared statements kept per connection
+}
+
+
+def configure(**kwargs):
+    """Tune connection settings. Only affects connections opened afterwards."""
+    for key, value in kwargs.items():
+        if key not in SETTINGS:
+            raise KeyError(f"Unknown database setting: {key}")
+        SETTINGS[key] = value
+
+
+# --------------------------
+# Connection pool (one connection per thread and file)
+# --------------------------
+_local = threading.local()
+_all_connections = []
+_all_lock = threading.Lock()
+
+
+class TracedConnection(sqlite3.Connection):
+    """Notes each statement's SQL (once per execute/executemany, without parameters) for the slow-operation log."""
+
+    def execute(self, sql, *args):
+        metrics.note_query(sql)
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        metrics.note_query(sql)
+        return super().executemany(sql, *args)
+
+
+def _open(path):
+    conn = sqlite3.connect(
+        path,
+        factory=TracedConnection,
+        timeout=SETTINGS["busy_timeout_ms"] / 1000,
+        cached_statements=SETTINGS["cached_statements"],
+        check_same_thread=False,  # only so close_all() can run at shutdown
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(SETTINGS['busy_timeout_ms'])}")
+    conn.execute(f"PRAGMA cache_size={-int(SETTINGS['cache_size_kb'])}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def get_connection(path=DB_PATH):
+    """Return this thread's long-lived connection to `path`, opening it on first use."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _open(path)
+        with _all_lock:
+            _all_connections.append(conn)
+    return conn
+
+
+@contextmanager
+def transaction(path=DB_PATH):
+    """Yield the pooled connection and commit on success, roll back on error."""
+    conn = get_connection(path)
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def close_connection(path=DB_PATH):
+    """Close this thread's connection to `path` (e.g. when a worker thread finishes)."""
+    connections = getattr(_local, "connections", {})
+    conn = connections.pop(path, None)
+    if conn is not None:
+        with _all_lock:
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+        conn.close()
+
+
+def close_all():
+    with _all_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.__dict__.pop("connections", None)
+
+
+atexit.register(close_all)
+
+
+# --------------------------
+# Schema
+# --------------------------
+def create_schema(conn):
+    """Create or migrate the schema atomically; call inside transaction(), which commits it.
+
+    Everything, including the PRAGMA user_version bump, runs in one explicit
+    transaction through execute() (never executescript(), which commits
+    first), so a crash mid-migration leaves the database as it was.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            jobnum TEXT,
+            vin TEXT,
+            technician TEXT,
+            description TEXT,
+            date TEXT,
+            date_key INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'Pending'
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS technicians (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE
+        )
+    """)
+    # Add default technicians if empty
+    cursor.execute("SELECT COUNT(*) FROM technicians")
+    if cursor.fetchone()[0] == 0:
+        for name in ["John", "Mike", "Sarah", "Alex"]:
+            cursor.execute("INSERT INTO technicians (name) VALUES (?)", (name,))
+    migrate_date_keys(cursor)
+    if "status" not in _columns(cursor, "logs"):
+        cursor.execute("ALTER TABLE logs ADD COLUMN status TEXT NOT NULL DEFAULT 'Pending'")
+    if cursor.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        migrate_iso_dates(cursor)
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    create_sort_indexes(cursor)
+    # While bulk_insert_active has a row (only ever inside insert_logs()' own
+    # transaction) the per-row insert triggers are skipped and insert_logs()
+    # updates the search index and summary once for the whole batch.
+    _run_script(cursor, """
+        CREATE TABLE IF NOT EXISTS bulk_insert_active (id INTEGER PRIMARY KEY);
+        DROP TABLE IF EXISTS search_index_paused;
+    """)
+    create_search_index(cursor)
+    create_summary_table(cursor)
+    create_history_tables(cursor)
+
+
+def _run_script(cursor, script):
+    """Run each statement of `script` with execute(), keeping the caller's transaction open."""
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip().strip(";").strip():
+                cursor.execute(statement)
+            statement = ""
+
+
+def _columns(cursor, table):
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+
+
+# --------------------------
+# Dates
+# --------------------------
+# Dates are stored as ISO YYYY-MM-DD text plus an integer date_key (proleptic
+# ordinal day, indexed) used for sorting and date-range filters. Other formats
+# (e.g. DateEntry's locale format in older rows) are converted on write.
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%y", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y")
+SCHEMA_VERSION = 1  # PRAGMA user_version once migrate_iso_dates() has run
+
+
+def parse_date(value):
+    value = (value or "").strip()
+    try:
+        return date.fromisoformat(value)  # fast path, no strptime
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS[1:]:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4096)
+def date_key(value):
+    """Chronological sort key for a stored date string (0 if unparseable)."""
+    parsed = parse_date(value)
+    return parsed.toordinal() if parsed else 0
+
+
+@lru_cache(maxsize=4096)
+def normalize_date(value):
+    """ISO YYYY-MM-DD for any recognised date format; other text is kept as entered."""
+    parsed = parse_date(value)
+    return parsed.isoformat() if parsed else (value or "").strip()
+
+
+def migrate_iso_dates(cursor):
+    """Rewrite non-ISO dates (e.g. 10/17/26 from DateEntry) as ISO."""
+    rows = cursor.execute(
+        "SELECT id, date FROM logs WHERE date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+    ).fetchall()
+    cursor.executemany("UPDATE logs SET date=?, date_key=? WHERE id=?",
+                       [(normalize_date(value), date_key(value), log_id)
+                        for log_id, value in rows if parse_date(value)])
+
+
+def migrate_date_keys(cursor):
+    if "date_key" not in _columns(cursor, "logs"):
+        cursor.execute("ALTER TABLE logs ADD COLUMN date_key INTEGER NOT NULL DEFAULT 0")
+        rows = cursor.execute("SELECT id, date FROM logs").fetchall()
+        cursor.executemany("UPDATE logs SET date_key=? WHERE id=?",
+                           [(date_key(date), log_id) for log_id, date in rows])
+
+
+# --------------------------
+# Sorting
+# --------------------------
+# Sortable viewer columns -> SQL sort expression. Each one except description
+# has a matching index, so ORDER BY <expr>, id walks the index instead of sorting.
+# Nullable columns are wrapped in IFNULL: a NULL sort value would make the
+# keyset comparison NULL and drop the row from every page after the first.
+SORT_KEYS = {
+    "id": "logs.id",
+    "jobnum": "IFNULL(CAST(logs.jobnum AS INTEGER), 0)",
+    "vin": "IFNULL(logs.vin, '')",
+    "technician": "IFNULL(logs.technician, '') COLLATE NOCASE",
+    "description": "IFNULL(logs.description, '') COLLATE NOCASE",
+    "date": "logs.date_key",
+    "status": "logs.status",
+}
+# Best full-text match first (bm25 via the FTS5 rank, negated so that the
+# usual descending order puts the best match on top). Without search text
+# long enough for the index there is nothing to rank, and it sorts by date.
+RELEVANCE = "relevance"
+SORTS = tuple(SORT_KEYS) + (RELEVANCE,)
+
+
+def _sort_expr(sort, ranked):
+    if sort == RELEVANCE:
+        return "-logs_fts.rank" if ranked else SORT_KEYS["date"]
+    return SORT_KEYS[sort]
+
+
+def create_sort_indexes(cursor):
+    _run_script(cursor, """
+        DROP INDEX IF EXISTS idx_logs_jobnum;
+        DROP INDEX IF EXISTS idx_logs_technician;
+        DROP INDEX IF EXISTS idx_logs_vin;
+        CREATE INDEX IF NOT EXISTS idx_logs_date ON logs(date_key, id);
+        CREATE INDEX IF NOT EXISTS idx_logs_jobnum_key ON logs(IFNULL(CAST(jobnum AS INTEGER), 0), id);
+        CREATE INDEX IF NOT EXISTS idx_logs_technician_key ON logs(IFNULL(technician, '') COLLATE NOCASE, id);
+        CREATE INDEX IF NOT EXISTS idx_logs_vin_key ON logs(IFNULL(vin, ''), id);
+        CREATE INDEX IF NOT EXISTS idx_logs_status ON logs(status, id);
+    """)
+
+
+# --------------------------
+# Full-text search index
+# --------------------------
+# Trigram FTS5 shadow index over the searchable log columns. It is an
+# external-content table (no second copy of the text) kept in sync by triggers.
+SEARCH_COLUMNS = ("jobnum", "vin", "technician", "description")
+TRIGRAM_MIN_LENGTH = 3  # trigram can't match shorter terms; those fall back to LIKE
+
+
+def create_search_index(cursor):
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='logs_fts'"
+    ).fetchone()
+    if not exists:
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE logs_fts USING fts5(
+                    jobnum, vin, technician, description,
+                    content='logs', content_rowid='id', tokenize='trigram'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return  # SQLite built without FTS5 / trigram (< 3.34): searches use LIKE
+    # Triggers are recreated on every start so older databases pick up changes.
+    _run_script(cursor, """
+        DROP TRIGGER IF EXISTS logs_fts_ai;
+        DROP TRIGGER IF EXISTS logs_fts_ad;
+        DROP TRIGGER IF EXISTS logs_fts_au;
+        CREATE TRIGGER logs_fts_ai AFTER INSERT ON logs
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_insert_active) BEGIN
+            INSERT INTO logs_fts(rowid, jobnum, vin, technician, description)
+            VALUES (new.id, new.jobnum, new.vin, new.technician, new.description);
+        END;
+        CREATE TRIGGER logs_fts_ad AFTER DELETE ON logs BEGIN
+            INSERT INTO logs_fts(logs_fts, rowid, jobnum, vin, technician, description)
+            VALUES ('delete', old.id, old.jobnum, old.vin, old.technician, old.description);
+        END;
+        CREATE TRIGGER logs_fts_au AFTER UPDATE OF jobnum, vin, technician, description ON logs BEGIN
+            INSERT INTO logs_fts(logs_fts, rowid, jobnum, vin, technician, description)
+            VALUES ('delete', old.id, old.jobnum, old.vin, old.technician, old.description);
+            INSERT INTO logs_fts(rowid, jobnum, vin, technician, description)
+            VALUES (new.id, new.jobnum, new.vin, new.technician, new.description);
+        END;
+    """)
+    if not exists:
+        # Index any rows that were logged before the search index existed
+        cursor.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+
+
+def has_search_index(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='logs_fts'"
+    ).fetchone() is not None
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+# --------------------------
+# Reporting summary
+# --------------------------
+# log_summary holds job counts per (month, technician, status), kept current by
+# triggers on logs, so reports read a few hundred rows instead of scanning
+# every job. month is derived from date_key ('' when the date is unparseable).
+# log_totals rolls log_summary up per (technician, status) through triggers of
+# its own, so the workload table doesn't grow with the number of months
+# logged and the monthly table reads only the report's months.
+SUMMARY_MONTH = "CASE WHEN {row}.date_key > 0 THEN strftime('%Y-%m', {row}.date_key + 1721424.5) ELSE '' END"
+REPORT_MONTHS = 12
+
+
+def create_summary_table(cursor):
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='log_summary'"
+    ).fetchone()
+    old_month = SUMMARY_MONTH.format(row="old")
+    new_month = SUMMARY_MONTH.format(row="new")
+    _run_script(cursor, f"""
+        CREATE TABLE IF NOT EXISTS log_summary (
+            month TEXT NOT NULL,
+            technician TEXT NOT NULL,
+            status TEXT NOT NULL,
+            jobs INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, technician, status)
+        ) WITHOUT ROWID;
+        DROP TRIGGER IF EXISTS log_summary_ai;
+        DROP TRIGGER IF EXISTS log_summary_ad;
+        DROP TRIGGER IF EXISTS log_summary_au;
+        CREATE TRIGGER log_summary_ai AFTER INSERT ON logs
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_insert_active) BEGIN
+            INSERT INTO log_summary (month, technician, status, jobs)
+            VALUES ({new_month}, IFNULL(new.technician, ''), new.status, 1)
+            ON CONFLICT (month, technician, status) DO UPDATE SET jobs = jobs + 1;
+        END;
+        CREATE TRIGGER log_summary_ad AFTER DELETE ON logs BEGIN
+            UPDATE log_summary SET jobs = jobs - 1
+            WHERE month = {old_month} AND technician = IFNULL(old.technician, '') AND status = old.status;
+        END;
+        CREATE TRIGGER log_summary_au AFTER UPDATE OF date_key, technician, status ON logs BEGIN
+            UPDATE log_summary SET jobs = jobs - 1
+            WHERE month = {old_month} AND technician = IFNULL(old.technician, '') AND status = old.status;
+            INSERT INTO log_summary (month, technician, status, jobs)
+            VALUES ({new_month}, IFNULL(new.technician, ''), new.status, 1)
+            ON CONFLICT (month, technician, status) DO UPDATE SET jobs = jobs + 1;
+        END;
+    """)
+    if not exists:
+        # One full scan to summarise jobs logged before the table existed
+        cursor.execute(f"""
+            INSERT INTO log_summary (month, technician, status, jobs)
+            SELECT {SUMMARY_MONTH.format(row="logs")}, IFNULL(technician, ''), status, COUNT(*)
+            FROM logs GROUP BY 1, 2, 3
+        """)
+    create_totals_table(cursor)
+
+
+def create_totals_table(cursor):
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='log_totals'"
+    ).fetchone()
+    add = """
+        INSERT INTO log_totals (technician, status, jobs) VALUES (new.technician, new.status, {jobs})
+        ON CONFLICT (technician, status) DO UPDATE SET jobs = jobs + excluded.jobs;
+    """
+    _run_script(cursor, f"""
+        CREATE TABLE IF NOT EXISTS log_totals (
+            technician TEXT NOT NULL,
+            status TEXT NOT NULL,
+            jobs INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (technician, status)
+        ) WITHOUT ROWID;
+        DROP TRIGGER IF EXISTS log_totals_ai;
+        DROP TRIGGER IF EXISTS log_totals_au;
+        DROP TRIGGER IF EXISTS log_totals_ad;
+        CREATE TRIGGER log_totals_ai AFTER INSERT ON log_summary BEGIN
+            {add.format(jobs="new.jobs")}
+        END;
+        CREATE TRIGGER log_totals_au AFTER UPDATE OF jobs ON log_summary BEGIN
+            {add.format(jobs="new.jobs - old.jobs")}
+        END;
+        CREATE TRIGGER log_totals_ad AFTER DELETE ON log_summary BEGIN
+            UPDATE log_totals SET jobs = jobs - old.jobs
+            WHERE technician = old.technician AND status = old.status;
+        END;
+    """)
+    if not exists:
+        cursor.execute("""
+            INSERT INTO log_totals (technician, status, jobs)
+            SELECT technician, status, SUM(jobs) FROM log_summary GROUP BY 1, 2
+        """)
+
+
+def report_since(today=None, months=REPORT_MONTHS):
+    """First month ('YYYY-MM') of a report covering the latest `months` months."""
+    today = today or date.today()
+    month = today.year * 12 + today.month - months
+    return f"{month // 12:04d}-{month % 12 + 1:02d}"
+
+
+@metrics.instrumented("db.summary_rows")
+def summary_rows(conn, since=""):
+    """[(month, technician, status, jobs)] from log_summary for months >= `since` (non-zero counts only)."""
+    return conn.execute(
+        "SELECT month, technician, status, jobs FROM log_summary WHERE month >= ? AND jobs > 0", (since,)
+    ).fetchall()
+
+
+@metrics.instrumented("db.total_rows")
+def total_rows(conn):
+    """[(technician, status, jobs)] from log_totals (non-zero counts only)."""
+    return conn.execute("SELECT technician, status, jobs FROM log_totals WHERE jobs > 0").fetchall()
+
+
+def build_reports(rows, totals, months=REPORT_MONTHS):
+    """Turn summary rows and per-technician totals into the two report tables.
+
+    `rows` are (month, technician, status, jobs), `totals` (technician,
+    status, jobs). Returns (monthly, workload): monthly is [(month, completed
+    jobs)] for the latest `months` months in `rows`, newest first; workload is
+    [(technician, pending, in progress, complete, total)] ordered by open
+    jobs. Shared by both apps.
+    """
+    completed = {}
+    workload = {}
+    for month, technician, status, jobs in rows:
+        if status == "Complete" and month:
+            completed[month] = completed.get(month, 0) + jobs
+    for technician, status, jobs in totals:
+        counts = workload.setdefault(technician or "(none)", dict.fromkeys(STATUSES, 0))
+        if status in counts:
+            counts[status] += jobs
+    monthly = sorted(completed.items(), reverse=True)[:months]
+    table = [(tech, *counts.values(), sum(counts.values())) for tech, counts in workload.items()]
+    table.sort(key=lambda row: (-(row[1] + row[2]), row[0]))
+    return monthly, table
+
+
+# --------------------------
+# History
+# --------------------------
+# log_history is an append-only audit trail: one row per create, update or
+# delete holding only the fields that changed, as {"field": [old, new]}.
+# Every HISTORY_SNAPSHOT_EVERY versions of a job log_snapshots stores its full
+# state, so "job X at time T" replays a handful of events from the nearest
+# snapshot instead of the job's whole history.
+HISTORY_FIELDS = ("jobnum", "vin", "technician", "description", "date", "status")
+HISTORY_SNAPSHOT_EVERY = 20
+HISTORY_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+
+def _history_json(old, new):
+    # json_object of [old, new] per field; `old`/`new` are row names or NULL
+    pair = lambda row, col: "NULL" if row == "NULL" else f"{row}.{col}"
+    return "json_object(" + ", ".join(
+        f"'{col}', json_array({pair(old, col)}, {pair(new, col)})" for col in HISTORY_FIELDS
+    ) + ")"
+
+
+def create_history_tables(cursor):
+    next_version = "(SELECT IFNULL(MAX(version), 0) + 1 FROM log_history WHERE log_id = {row}.id)"
+    changed = " OR ".join(f"old.{col} IS NOT new.{col}" for col in HISTORY_FIELDS)
+    diff_rows = " UNION ALL ".join(f"SELECT '{col}' AS field, old.{col} AS before, new.{col} AS after"
+                                   for col in HISTORY_FIELDS)
+    state = "json_object(" + ", ".join(f"'{col}', {col}" for col in HISTORY_FIELDS) + ")"
+    _run_script(cursor, f"""
+        CREATE TABLE IF NOT EXISTS log_history (
+            id INTEGER PRIMARY KEY,
+            log_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            at TEXT NOT NULL,
+            op TEXT NOT NULL,
+            technician TEXT,
+            changes TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_history_log ON log_history(log_id, version);
+        CREATE INDEX IF NOT EXISTS idx_history_technician ON log_history(technician COLLATE NOCASE, at);
+        CREATE TABLE IF NOT EXISTS log_snapshots (
+            log_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            at TEXT NOT NULL,
+            state TEXT NOT NULL,
+            PRIMARY KEY (log_id, version)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS log_history_ai AFTER INSERT ON logs
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_insert_active) BEGIN
+            INSERT INTO log_history (log_id, version, at, op, technician, changes)
+            VALUES (new.id, {next_version.format(row="new")}, {HISTORY_NOW}, 'create', new.technician,
+                    {_history_json("NULL", "new")});
+        END;
+        CREATE TRIGGER IF NOT EXISTS log_history_au
+        AFTER UPDATE OF {", ".join(HISTORY_FIELDS)} ON logs WHEN {changed} BEGIN
+            INSERT INTO log_history (log_id, version, at, op, technician, changes)
+            SELECT new.id, {next_version.format(row="new")}, {HISTORY_NOW}, 'update', new.technician,
+                   json_group_object(field, json_array(before, after))
+            FROM ({diff_rows}) WHERE before IS NOT after;
+        END;
+        CREATE TRIGGER IF NOT EXISTS log_history_ad AFTER DELETE ON logs BEGIN
+            INSERT INTO log_history (log_id, version, at, op, technician, changes)
+            VALUES (old.id, {next_version.format(row="old")}, {HISTORY_NOW}, 'delete', old.technician,
+                    {_history_json("old", "NULL")});
+        END;
+        CREATE TRIGGER IF NOT EXISTS log_history_snapshot AFTER INSERT ON log_history
+        WHEN new.version % {HISTORY_SNAPSHOT_EVERY} = 0 AND new.op != 'delete' BEGIN
+            INSERT OR REPLACE INTO log_snapshots (log_id, version, at, state)
+            SELECT id, new.version, new.at, {state} FROM logs WHERE id = new.log_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS log_history_no_update BEFORE UPDATE ON log_history BEGIN
+            SELECT RAISE(ABORT, 'log_history is append-only');
+        END;
+        CREATE TRIGGER IF NOT EXISTS log_history_no_delete BEFORE DELETE ON log_history BEGIN
+            SELECT RAISE(ABORT, 'log_history is append-only');
+        END;
+    """)
+
+
+def apply_history(state, op, changes):
+    """Job state (dict or None) after one history event. Shared by both apps."""
+    if op == "delete":
+        return None
+    state = dict(state or {})
+    for field, (old, new) in changes.items():
+        state[field] = new
+    return state
+
+
+def describe_changes(op, changes):
+    """One-line summary of a history event for the History windows."""
+    if op != "update":
+        return op.title()
+    return "; ".join(f"{field}: {old} → {new}" for field, (old, new) in changes.items())
+
+
+@metrics.instrumented("db.log_history")
+def log_history(conn, log_id):
+    """[(version, at, op, technician, changes)] for one job, oldest first."""
+    rows = conn.execute(
+        "SELECT version, at, op, technician, changes FROM log_history WHERE log_id = ? ORDER BY version",
+        (log_id,)
+    ).fetchall()
+    return [(*row[:4], json.loads(row[4])) for row in rows]
+
+
+@metrics.instrumented("db.log_state_at")
+def log_state_at(conn, log_id, at):
+    """A job's fields as they were at timestamp `at` ('YYYY-MM-DD[ HH:MM:SS]'), or None.
+
+    Starts from the latest snapshot taken at or before `at` and replays the
+    events after it, both read through the (log_id, version) keys.
+    """
+    snapshot = conn.execute(
+        "SELECT version, state FROM log_snapshots WHERE log_id = ? AND at <= ? ORDER BY version DESC LIMIT 1",
+        (log_id, at)
+    ).fetchone()
+    version, state = (snapshot[0], json.loads(snapshot[1])) if snapshot else (0, None)
+    for op, changes in conn.execute(
+        "SELECT op, changes FROM log_history WHERE log_id = ? AND version > ? AND at <= ? ORDER BY version",
+        (log_id, version, at)
+    ):
+        state = apply_history(state, op, json.loads(changes))
+    return state
+
+
+@metrics.instrumented("db.history_by_technician")
+def history_by_technician(conn, technician, since, until=None):
+    """[(log_id, version, at, op, changes)] for one technician's jobs from `since`, oldest first."""
+    clauses = ["technician = ? COLLATE NOCASE", "at >= ?"]
+    params = [technician, since]
+    if until:
+        clauses.append("at < ?")
+        params.append(until)
+    rows = conn.execute(
+        f"SELECT log_id, version, at, op, changes FROM log_history{_where(clauses)} ORDER BY at",
+        params
+    ).fetchall()
+    return [(*row[:4], json.loads(row[4])) for row in rows]
+
+
+# --------------------------
+# Validation
+# --------------------------
+STATUSES = ("Pending", "In Progress", "Complete")
+
+
+def validate_job(jobnum, vin):
+    """Return (title, message) for the first invalid field, or None if both are valid."""
+    if not jobnum.isdigit() or len(jobnum) > 5:
+        return ("Invalid Job Number", "Job number must be numeric and up to 5 digits.")
+    if len(vin) != 17 or not vin.isalnum():
+        return ("Invalid VIN", "VIN must be exactly 17 alphanumeric characters.")
+    return None
+
+
+# --------------------------
+# Log writes
+# --------------------------
+@metrics.instrumented("db.insert_log")
+def insert_log(conn, jobnum, vin, technician, description, date, status="Pending"):
+    cursor = conn.execute(
+        "INSERT INTO logs (jobnum, vin, technician, description, date, date_key, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (jobnum, vin, technician, description, normalize_date(date), date_key(date), status)
+    )
+    return cursor.lastrowid
+
+
+@metrics.instrumented("db.update_log")
+def update_log(conn, log_id, jobnum, vin, technician, description, date, status="Pending"):
+    conn.execute("""
+        UPDATE logs
+        SET jobnum=?, vin=?, technician=?, description=?, date=?, date_key=?, status=?
+        WHERE id=?
+    """, (jobnum, vin, technician, description, normalize_date(date), date_key(date), status, log_id))
+
+
+@metrics.instrumented("db.set_logs_field")
+def set_logs_field(conn, log_ids, field, value):
+    """Set status or technician on many logs with one executemany (call inside a transaction)."""
+    if field not in ("status", "technician"):
+        raise ValueError(f"Bulk update not supported for: {field}")
+    conn.executemany(f"UPDATE logs SET {field}=? WHERE id=?", [(value, log_id) for log_id in log_ids])
+
+
+@metrics.instrumented("db.delete_logs")
+def delete_logs(conn, log_ids):
+    conn.executemany("DELETE FROM logs WHERE id=?", [(log_id,) for log_id in log_ids])
+
+
+@metrics.instrumented("db.insert_logs")
+def insert_logs(conn, rows):
+    """Bulk insert (jobnum, vin, technician, description, date, status) tuples in one executemany.
+
+    Call inside a transaction. The search index and reporting summary are
+    updated once for the whole batch rather than by the per-row triggers.
+    """
+    last_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM logs").fetchone()[0]
+    params = [(*row[:4], normalize_date(row[4]), *row[5:], date_key(row[4])) for row in rows]
+    conn.execute("INSERT INTO bulk_insert_active DEFAULT VALUES")
+    conn.executemany(
+        "INSERT INTO logs (jobnum, vin, technician, description, date, status, date_key) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        params
+    )
+    metrics.add(rows=len(params))
+    if has_search_index(conn):
+        conn.execute("""
+            INSERT INTO logs_fts(rowid, jobnum, vin, technician, description)
+            SELECT id, jobnum, vin, technician, description FROM logs WHERE id > ?
+        """, (last_id,))
+    conn.execute(f"""
+        INSERT INTO log_summary (month, technician, status, jobs)
+        SELECT {SUMMARY_MONTH.format(row="logs")}, IFNULL(technician, ''), status, COUNT(*)
+        FROM logs WHERE id > ? GROUP BY 1, 2, 3
+        ON CONFLICT (month, technician, status) DO UPDATE SET jobs = jobs + excluded.jobs
+    """, (last_id,))
+    conn.execute(f"""
+        INSERT INTO log_history (log_id, version, at, op, technician, changes)
+        SELECT id, 1, {HISTORY_NOW}, 'create', technician, {_history_json("NULL", "logs")}
+        FROM logs WHERE id > ?
+    """, (last_id,))
+    conn.execute("DELETE FROM bulk_insert_active")
+
+
+@metrics.instrumented("db.load_technician_names")
+def load_technician_names(conn):
+    return [row[0] for row in conn.execute("SELECT name FROM technicians ORDER BY name")]
+
+
+@metrics.instrumented("db.add_technicians")
+def add_technicians(conn, names):
+    conn.executemany("INSERT OR IGNORE INTO technicians (name) VALUES (?)", [(name,) for name in names])
+
+
+# --------------------------
+# Log queries
+# --------------------------
+PAGE_SIZE = 200
+LOG_COLUMNS = "logs.id, logs.jobnum, logs.vin, logs.technician, logs.description, logs.date, logs.status"
+
+
+def date_range_keys(date_from="", date_to=""):
+    """(low, high) date_key bounds for a date range, or None if neither end is set.
+
+    Either end may be blank (open-ended); raises ValueError for text that is
+    not a recognised date.
+    """
+    date_from, date_to = (date_from or "").strip(), (date_to or "").strip()
+    if not date_from and not date_to:
+        return None
+    keys = []
+    for value, default in ((date_from, 1), (date_to, date.max.toordinal())):
+        if value and not date_key(value):
+            raise ValueError(f"Unrecognised date: {value}")
+        keys.append(date_key(value) if value else default)
+    return tuple(keys)
+
+
+def _log_filter(conn, jobnum="", vin="", technician="", text="", date_from="", date_to=""):
+    """Build the FROM/WHERE part shared by every log query.
+
+    Returns (source, clauses, params, ranked). Terms long enough for the
+    trigram index go through FTS5 (`ranked` is then True); anything else
+    uses a plain LIKE. A date range is a BETWEEN on the indexed date_key.
+    """
+    use_fts = has_search_index(conn)
+    match_terms = []
+    clauses = []
+    params = []
+
+    for col, value in (("jobnum", jobnum), ("vin", vin), ("technician", technician)):
+        value = (value or "").strip()
+        if not value:
+            continue
+        if use_fts and len(value) >= TRIGRAM_MIN_LENGTH:
+            match_terms.append(f"{col} : {_fts_phrase(value)}")
+        else:
+            clauses.append(f"logs.{col} LIKE ?")
+            params.append(f"%{value}%")
+
+    text = (text or "").strip()
+    if text:
+        if use_fts and len(text) >= TRIGRAM_MIN_LENGTH:
+            match_terms.append(_fts_phrase(text))
+        else:
+            clauses.append("(" + " OR ".join(f"logs.{col} LIKE ?" for col in SEARCH_COLUMNS) + ")")
+            params.extend([f"%{text}%"] * len(SEARCH_COLUMNS))
+
+    bounds = date_range_keys(date_from, date_to)
+    if bounds:
+        clauses.append("logs.date_key BETWEEN ? AND ?")
+        params.extend(bounds)
+
+    if match_terms:
+        clauses.insert(0, "logs_fts MATCH ?")
+        params.insert(0, " AND ".join(match_terms))
+        return "logs_fts JOIN logs ON logs.id = logs_fts.rowid", clauses, params, True
+    return "logs", clauses, params, False
+
+
+def _where(clauses):
+    return (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+
+@metrics.instrumented("db.count_logs")
+def count_logs(conn, **filters):
+    source, clauses, params, _ = _log_filter(conn, **filters)
+    return conn.execute(f"SELECT COUNT(*) FROM {source}{_where(clauses)}", params).fetchone()[0]
+
+
+STAT_COLUMNS = ("status", "technician")
+
+
+@metrics.instrumented("db.count_logs_by")
+def count_logs_by(conn, column, **filters):
+    """[(value, count)] for one of STAT_COLUMNS, most common first."""
+    if column not in STAT_COLUMNS:
+        raise ValueError(f"Cannot group logs by: {column}")
+    source, clauses, params, _ = _log_filter(conn, **filters)
+    return conn.execute(
+        f"SELECT logs.{column}, COUNT(*) FROM {source}{_where(clauses)} "
+        f"GROUP BY logs.{column} ORDER BY COUNT(*) DESC, logs.{column}",
+        params
+    ).fetchall()
+
+
+@metrics.instrumented("db.date_range")
+def date_range(conn, **filters):
+    """(first date, last date) among matching logs, by date_key; (None, None) if none match."""
+    source, clauses, params, _ = _log_filter(conn, **filters)
+    clauses = list(clauses) + ["logs.date_key > 0"]
+    first = conn.execute(f"SELECT logs.date FROM {source}{_where(clauses)} ORDER BY logs.date_key LIMIT 1",
+                         params).fetchone()
+    last = conn.execute(f"SELECT logs.date FROM {source}{_where(clauses)} ORDER BY logs.date_key DESC LIMIT 1",
+                        params).fetchone()
+    return (first[0] if first else None, last[0] if last else None)
+
+
+def log_key(row):
+    """Keyset position of a fetch_log_page() row: (sort value, id)."""
+    return (row[-1], row[0])
+
+
+# SQLite's NOCASE only folds ASCII letters; mirror that for Python-side ordering
+_NOCASE = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+NOCASE_SORTS = ("technician", "description")
+
+
+def order_key(row, sort="date"):
+    """Python sort key for a fetch_log_page() row that agrees with ORDER BY <sort>, id."""
+    value = row[-1]
+    if sort in NOCASE_SORTS and value is not None:
+        value = value.translate(_NOCASE)
+    return (value is not None, value, row[0])
+
+
+@metrics.instrumented("db.fetch_log_row")
+def fetch_log_row(conn, log_id, filters, sort="date"):
+    """The fetch_log_page() row for one log, or None if it is gone or doesn't match `filters`."""
+    source, clauses, params, ranked = _log_filter(conn, **filters)
+    clauses = list(clauses) + ["logs.id = ?"]
+    return conn.execute(f"SELECT {LOG_COLUMNS}, {_sort_expr(sort, ranked)} FROM {source}{_where(clauses)}",
+                        params + [log_id]).fetchone()
+
+
+def log_page_query(conn, filters, sort="date", descending=True, after=None, before=None, limit=PAGE_SIZE):
+    """(sql, params) for one fetch_log_page() page, before any reversal of a backwards page."""
+    source, clauses, params, ranked = _log_filter(conn, **filters)
+    sort_expr = _sort_expr(sort, ranked)
+    clauses = list(clauses)
+    # Going backwards = walking the index the other way, then flipping the page
+    ascending = (not descending) if before is None else descending
+    if after is not None or before is not None:
+        # Spelled out rather than as a row value: SQLite only seeks an
+        # expression index for the leading `expr >= ?` form
+        op = ">" if ascending else "<"
+        value, log_id = after if before is None else before
+        clauses.append(f"{sort_expr} {op}= ? AND ({sort_expr} {op} ? OR logs.id {op} ?)")
+        params.extend((value, value, log_id))
+    direction = "ASC" if ascending else "DESC"
+    query = (f"SELECT {LOG_COLUMNS}, {sort_expr} FROM {source}{_where(clauses)} "
+             f"ORDER BY {sort_expr} {direction}, logs.id {direction} LIMIT ?")
+    return query, params + [limit]
+
+
+@metrics.instrumented("db.fetch_log_page")
+def fetch_log_page(conn, filters, sort="date", descending=True, after=None, before=None, limit=PAGE_SIZE):
+    """Return one page of log rows ordered by `sort` (one of SORTS) then id.
+
+    Rows are the seven viewer columns followed by the sort value. Pass the
+    log_key() of the last row already shown as `after` for the next page, or
+    of the first row shown as `before` for the previous one. Both seek
+    straight to the position in the sort index instead of skipping rows
+    with OFFSET.
+    """
+    rows = conn.execute(*log_page_query(conn, filters, sort, descending, after, before, limit)).fetchall()
+    if before is not None:
+        rows.reverse()
+    return rows
+
+
+def iter_logs(conn, filters, sort="date", descending=True, batch_size=1000):
+    """Yield every matching log row in viewer order, `batch_size` rows at a time.
+
+    Rows are streamed from one cursor with fetchmany, so memory use stays flat
+    however many rows match.
+    """
+    source, clauses, params, ranked = _log_filter(conn, **filters)
+    sort_expr = _sort_expr(sort, ranked)
+    direction = "DESC" if descending else "ASC"
+    cursor = conn.execute(
+        f"SELECT {LOG_COLUMNS} FROM {source}{_where(clauses)} "
+        f"ORDER BY {sort_expr} {direction}, logs.id {direction}",
+        params
+    )
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        metrics.add(rows=len(rows))  # counted against the caller's timed export
+        yield rows
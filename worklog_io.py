@@ -0,0 +1,174 @@
+import csv
+import gzip
+import json
+import os
+
+import worklog_db
+
+# --------------------------
+# CSV import
+# --------------------------
+IMPORT_COLUMNS = ("jobnum", "vin", "technician", "description", "date")  # plus optional "status"
+IMPORT_BATCH_SIZE = 20000  # rows per transaction
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.new_technicians = 0
+        self.reject_path = None
+
+    def __repr__(self):
+        return f"<ImportResult imported={self.imported} rejected={self.rejected}>"
+
+
+def rejects_path_for(file_path):
+    root, ext = os.path.splitext(file_path)
+    return f"{root}.rejected{ext or '.csv'}"
+
+
+def import_csv(file_path, db_path=worklog_db.DB_PATH, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Stream a CSV of jobs into the logs table.
+
+    The file is read row by row and written in batches of `batch_size` with one
+    executemany per batch, each batch in its own transaction. Rows failing the
+    same checks as the entry form are written, with the reason, to a
+    `<name>.rejected.csv` file next to the source. `progress(rows_read, fraction)`
+    is called after each batch. Safe to run on a worker thread, which then uses
+    its own pooled connection.
+    """
+    result = ImportResult()
+    total_bytes = os.path.getsize(file_path) or 1
+    conn = worklog_db.get_connection(db_path)
+    reject_file = None
+    reject_writer = None
+    try:
+        known_techs = set(worklog_db.load_technician_names(conn))
+
+        with open(file_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            keys = {k.lower().strip(): k for k in (reader.fieldnames or [])}
+            missing = [col for col in IMPORT_COLUMNS if col not in keys]
+            if missing:
+                raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+            batch = []
+            new_techs = set()
+            rows_read = 0
+
+            def flush():
+                with worklog_db.transaction(db_path) as conn:
+                    if new_techs:
+                        worklog_db.add_technicians(conn, new_techs)
+                        known_techs.update(new_techs)
+                        result.new_technicians += len(new_techs)
+                        new_techs.clear()
+                    worklog_db.insert_logs(conn, batch)
+                result.imported += len(batch)
+                batch.clear()
+                if progress:
+                    progress(rows_read, min(f.buffer.tell() / total_bytes, 1.0))
+
+            for row in reader:
+                rows_read += 1
+                values = [(row[keys[col]] or "").strip() for col in IMPORT_COLUMNS]
+                jobnum, vin, technician, description, date = values
+                status = (row[keys["status"]] or "").strip() if "status" in keys else ""
+
+                if not all(values):
+                    error = "Missing required field(s)"
+                elif status and status not in worklog_db.STATUSES:
+                    error = f"Unknown status: {status}"
+                elif not worklog_db.date_key(date):
+                    error = f"Unrecognised date: {date}"
+                else:
+                    error = worklog_db.validate_job(jobnum, vin)
+                    error = error[1] if error else None
+                if error:
+                    if reject_writer is None:
+                        result.reject_path = rejects_path_for(file_path)
+                        reject_file = open(result.reject_path, "w", newline="", encoding="utf-8")
+                        reject_writer = csv.writer(reject_file)
+                        reject_writer.writerow(list(IMPORT_COLUMNS) + ["status", "error"])
+                    reject_writer.writerow(values + [status, error])
+                    result.rejected += 1
+                    continue
+
+                if technician not in known_techs:
+                    new_techs.add(technician)
+                batch.append((*values, status or "Pending"))
+                if len(batch) >= batch_size:
+                    flush()
+            if batch or new_techs:
+                flush()
+            elif progress:
+                progress(rows_read, 1.0)
+    finally:
+        if reject_file:
+            reject_file.close()
+    return result
+
+
+# --------------------------
+# Export
+# --------------------------
+EXPORT_COLUMNS = ("id", "jobnum", "vin", "technician", "description", "date", "status")
+EXPORT_FORMATS = {".csv": "csv", ".gz": "csv.gz", ".jsonl": "jsonl"}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_format_for(file_path):
+    return EXPORT_FORMATS.get(os.path.splitext(file_path)[1].lower(), "csv")
+
+
+def _open_export(path, fmt):
+    if fmt == "csv.gz":
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def export_logs(file_path, filters=None, sort="date", descending=True, fmt=None,
+                db_path=worklog_db.DB_PATH, progress=None, cancel=None):
+    """Stream matching logs from the database straight into `file_path`.
+
+    `fmt` is "csv", "csv.gz" or "jsonl" (default: from the file extension).
+    Rows are written as they are fetched, so memory stays constant. Output goes
+    to a `.part` file that is renamed into place only when complete; setting the
+    `cancel` event stops the export and removes it (raises ExportCancelled).
+    `progress(rows_written, fraction)` is called after each batch. Returns the
+    number of rows written.
+    """
+    filters = filters or {}
+    fmt = fmt or export_format_for(file_path)
+    conn = worklog_db.get_connection(db_path)
+    total = worklog_db.count_logs(conn, **filters) or 1
+    part_path = file_path + ".part"
+    written = 0
+    try:
+        with _open_export(part_path, fmt) as f:
+            if fmt == "jsonl":
+                def write_rows(rows):
+                    f.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+                                 for row in rows)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_COLUMNS)
+                write_rows = writer.writerows
+
+            for rows in worklog_db.iter_logs(conn, filters, sort, descending):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                write_rows(rows)
+                written += len(rows)
+                if progress:
+                    progress(written, min(written / total, 1.0))
+        os.replace(part_path, file_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return written